@@ -10,18 +10,28 @@ a = Analysis(
         (os.path.join('src', 'core'), 'core')  # 将core目录添加到datas，确保打包后能找到core模块
     ],
     hiddenimports=[
-        'pandas', 
+        'xlrd',  # 读取xls文件时才按需导入
         'openpyxl', 
-        'qrcode', 
+        'qrcode',  # 选用qrcode库编码时才按需导入
         'PIL', 
         'tkinter',
         'concurrent.futures',  # 添加concurrent.futures
-        'pandas._libs.tslibs.parquet',  # pandas相关依赖
-        'pandas._libs.tslibs.nattype',  # pandas相关依赖
+        'multiprocessing',  # 多进程执行后端
         'core',  # 显式添加core模块作为hiddenimport
         'core.qrcode_processor',  # 显式添加core.qrcode_processor模块
         'core.config',  # 显式添加core.config模块
-        'docx'  # 添加python-docx库支持
+        'core.qr_matrix',  # 显式添加core.qr_matrix模块
+        'core.qr_encoder',  # 显式添加core.qr_encoder模块
+        'core.qr_payload',  # 显式添加core.qr_payload模块
+        'core.pdf_writer',  # 显式添加core.pdf_writer模块
+        'core.svg_writer',  # 显式添加core.svg_writer模块
+        'core.input_sources',  # 显式添加core.input_sources模块
+        'core.qr_cache',  # 显式添加core.qr_cache模块
+        'core.job_manifest',  # 显式添加core.job_manifest模块
+        'core.progress',  # 显式添加core.progress模块
+        'core.metrics',  # 显式添加core.metrics模块
+        'core.batch_jobs',  # 显式添加core.batch_jobs模块
+        'core.docx_writer'  # 显式添加core.docx_writer模块
     ],
     hookspath=[],
     hooksconfig={},
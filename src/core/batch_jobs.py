@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量任务
+
+把一个目录、一个通配符或一个工作簿的多个工作表展开为一组任务，每个任务对应一个输入文件
+（或其中一个工作表）和输出目录下的一个子目录。任务由QRCodeProcessor.run_batch_jobs在同一个进程中
+调度，共用同一组执行池和二维码缓存，不必为每个文件重新启动解释器、导入依赖和创建执行池。
+"""
+
+import glob
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional, Sequence
+
+from core.config import ERROR_MESSAGES
+from core.input_sources import input_extensions, list_sheets
+
+# 文件名中不能使用的字符，工作表名称作为子目录名时替换为下划线
+_UNSAFE_NAME = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+class BatchJob:
+    """批量任务中的一个任务及其运行结果"""
+
+    def __init__(self, name: str, file_path: str, sheet: Optional[str], output_dir: str):
+        """
+        Args:
+            name (str): 任务名称，文件名或"文件名/工作表名"
+            file_path (str): 输入文件路径
+            sheet (str, optional): 工作表名称，为None时按读取条件选择（默认第一个工作表）
+            output_dir (str): 任务的输出目录
+        """
+        self.name = name
+        self.file_path = file_path
+        self.sheet = sheet
+        self.output_dir = output_dir
+        self.status = "pending"  # pending、running、done、failed、cancelled
+        self.error = None
+        self.qr_codes = 0
+        self.pages = 0
+        self.output_files = []
+        self.seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name, "file": self.file_path, "sheet": self.sheet, "output_dir": self.output_dir,
+            "status": self.status, "error": self.error, "qr_codes": self.qr_codes, "pages": self.pages,
+            "output_files": len(self.output_files), "seconds": self.seconds,
+        }
+
+
+def _safe_name(name: str) -> str:
+    return _UNSAFE_NAME.sub("_", name).strip(" .") or "_"
+
+
+def _is_pattern(source: str) -> bool:
+    return not os.path.exists(source) and any(char in source for char in "*?[")
+
+
+def find_input_files(source: str) -> List[str]:
+    """
+    按目录或通配符找出输入文件，按路径排序
+
+    目录中只取扩展名可以识别的文件，不进入子目录，跳过Excel打开文件时生成的"~$"临时文件。
+    """
+    if os.path.isdir(source):
+        extensions = set(input_extensions())
+        paths = [os.path.join(source, name) for name in os.listdir(source)
+                 if os.path.splitext(name)[1].lower() in extensions]
+    elif _is_pattern(source):
+        paths = glob.glob(source)
+    else:
+        paths = [source]
+    return sorted(path for path in paths
+                  if os.path.isfile(path) and not os.path.basename(path).startswith("~$"))
+
+
+def expand_batch_jobs(source: str, output_dir: str, sheets: Optional[Sequence[str]] = None,
+                      input_format: Optional[str] = None) -> List[BatchJob]:
+    """
+    展开批量任务
+
+    Args:
+        source (str): 输入文件、目录或通配符
+        output_dir (str): 输出目录，每个任务的结果保存在其中以文件名（和工作表名）命名的子目录中
+        sheets (Sequence[str], optional): 每个工作簿中要生成的工作表名称或序号，"*"表示全部工作表；
+                                          为None时每个文件一个任务
+        input_format (str, optional): 输入格式，为None时按扩展名判断
+
+    Returns:
+        List[BatchJob]: 按文件和工作表顺序排列的任务
+    """
+    files = find_input_files(source)
+    if not files:
+        raise ValueError(ERROR_MESSAGES["NO_BATCH_INPUTS"].format(source))
+
+    jobs = []
+    used_dirs = set()
+    for file_path in files:
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        file_sheets = [None]
+        if sheets:
+            available = list_sheets(file_path, input_format)
+            if available:
+                file_sheets = available if "*" in sheets else list(sheets)
+        for sheet in file_sheets:
+            name = stem if sheet is None else f"{stem}/{sheet}"
+            # 同名的文件（如a.xlsx和a.csv）输出到不同的子目录
+            base = os.path.join(output_dir, _safe_name(stem))
+            if sheet is not None:
+                base = os.path.join(base, _safe_name(sheet))
+            job_dir, suffix = base, 2
+            while job_dir in used_dirs:
+                job_dir = f"{base}_{suffix}"
+                suffix += 1
+            used_dirs.add(job_dir)
+            jobs.append(BatchJob(name, file_path, sheet, job_dir))
+    return jobs
+
+
+def write_batch_report(path: str, jobs: Sequence[BatchJob], elapsed: float, metrics: Optional[Dict] = None):
+    """把各任务的状态、数量和耗时以及整批的汇总写成JSON报告"""
+    report = {
+        "timestamp": time.time(),
+        "seconds": elapsed,
+        "jobs": [job.to_dict() for job in jobs],
+        "totals": {
+            "jobs": len(jobs),
+            "done": sum(job.status == "done" for job in jobs),
+            "failed": sum(job.status == "failed" for job in jobs),
+            "cancelled": sum(job.status == "cancelled" for job in jobs),
+            "qr_codes": sum(job.qr_codes for job in jobs),
+            "pages": sum(job.pages for job in jobs),
+        },
+        "metrics": metrics,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
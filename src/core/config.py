@@ -10,13 +10,48 @@ import multiprocessing
 # 系统设置
 MAX_WORKERS = os.cpu_count() or 4  # 根据CPU核心数自动调整线程数
 MAX_IMAGE_WORKERS = min(MAX_WORKERS, 4)  # 图像处理对内存要求较高，限制线程数
+EXECUTOR_BACKENDS = ("thread", "process")  # 可选的执行后端：多线程或多进程
+EXECUTOR_BACKEND = "thread"  # 默认执行后端，多进程可绕过GIL，适合CPU核心数较多的机器
+PROCESS_CHUNK_SIZE = 32  # 多进程模式下每次提交给进程池的二维码任务数，减少进程间通信次数
+THREAD_CHUNK_SIZE = 8  # 多线程模式下每次提交的二维码任务数，同一块内的二维码批量编码
 
 # 文件处理设置
 BATCH_SIZE_EXCEL = 5000  # Excel文件读取的批次大小
+INPUT_FORMATS = ("xlsx", "xls", "csv", "tsv", "txt")  # 可选的输入格式，默认按文件扩展名选择读取器
+INPUT_TEXT_ENCODING = "utf-8-sig"  # CSV、TSV和纯文本输入文件的编码，可兼容带BOM的UTF-8文件
+INPUT_COLUMN_SEPARATOR = ","  # 选择多列且未指定内容模板时，各列的值以此连接为二维码内容
 BATCH_SIZE_QR = 100  # 二维码生成的批处理大小
 QR_PER_IMAGE = 10  # 每个二维码图片包含的字符串数量
 QR_PER_A4 = 15  # 每个A4页面包含的二维码数量
 DEFAULT_QR_LENGTH = 3  # 二维码默认边长，单位厘米
+OUTPUT_FORMATS = ("image", "docx", "pdf")  # 可选的输出格式：A4图片、Word文档、多页PDF文档
+PDF_QR_RENDERINGS = ("vector", "image")  # PDF中二维码的绘制方式：矢量路径或1位图像蒙版
+PDF_QR_RENDERING = "vector"  # 默认使用矢量路径；图像蒙版每个模块一个像素，文件约为矢量方式的1/3
+DOCX_PAGES_PER_FILE = 0  # Word文档每个文件的页数，超过后另起一个文件；0表示所有页面写入同一个文件
+QR_CACHE_ENABLED = True  # 是否使用跨运行的二维码编码缓存，重新生成相同数据时跳过编码
+QR_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".qrcode_generator", "qr_cache.sqlite3")  # 缓存数据库，命令行和图形界面共用
+QR_CACHE_MAX_MB = 256  # 缓存大小上限（MB），超过后淘汰最久未用的二维码
+JOB_MANIFEST_NAME = ".qrcode_job.json"  # 输出目录中的任务清单文件名，记录已完成的页面和内容摘要，供续传和增量更新使用
+JOB_MANIFEST_SAVE_INTERVAL = 1.0  # 任务清单的最短保存间隔（秒），任务结束或取消时总会保存
+BATCH_JOB_CONCURRENCY = 2  # 批量任务同时运行的任务数，各任务共用同一组执行池，前一个任务收尾时下一个任务已开始读取和编码
+BATCH_REPORT_NAME = "batch_report.json"  # 批量任务的汇总报告文件名，保存在输出目录中
+SAVE_QR_FILES = False  # 是否把每个二维码另存为PNG文件（默认只在内存中传递给排版）
+PIPELINE_QR_QUEUE_DEPTH = MAX_WORKERS * 4  # 流水线模式下最多同时在途的二维码任务数（多进程模式下为任务块数）
+PIPELINE_PAGE_QUEUE_DEPTH = MAX_IMAGE_WORKERS * 2  # 流水线模式下最多同时在途的A4页面任务数
+MAX_IN_FLIGHT_TASKS = MAX_WORKERS * 4  # 批量生成二维码时最多同时在途的任务块数，任务按窗口提交，内存占用与数据量无关
+MAX_IN_FLIGHT_PAGES = MAX_IMAGE_WORKERS * 2  # 批量生成A4图片时最多同时在途的页面任务数
+IN_FLIGHT_REORDER_FACTOR = 2  # 已完成但等待按顺序产出的结果最多为在途窗口的几倍，前面的任务较慢时后面的任务仍可继续提交
+PAGE_IMAGE_MODES = ("RGB", "L", "1")  # 可选的A4页面图片模式：彩色、灰度、黑白（1位）
+PAGE_IMAGE_MODE = "RGB"  # 默认页面模式；黑白模式每页内存约为RGB的1/24，编码更快、文件更小
+PAGE_IMAGE_FORMATS = ("png", "tiff", "svg")  # 可选的A4页面文件格式，TIFF在黑白模式下使用CCITT G4压缩，SVG为矢量页面
+PAGE_IMAGE_FORMAT = "png"  # 默认页面文件格式
+# 各页面模式下图像处理的并发数：单页内存越小，可同时合成的页面越多
+PAGE_IMAGE_WORKERS = {
+    "RGB": MAX_IMAGE_WORKERS,
+    "L": min(MAX_WORKERS, MAX_IMAGE_WORKERS * 3),
+    "1": MAX_WORKERS,
+}
+PAGE_TEMPLATE_CACHE_SIZE = 2  # 缓存的A4页面模板数（按标题、二维码边长和行列数区分）
 
 # 辅助函数：根据二维码边长计算A4页面上可容纳的行列数
 def calculate_a4_layout(qr_length_cm=DEFAULT_QR_LENGTH):
@@ -52,6 +87,14 @@ QR_VERSION = 2  # 二维码版本，增加版本以容纳更多数据
 QR_ERROR_CORRECTION = 3  # ERROR_CORRECT_H级别（3），高纠错级别更适合打印
 QR_BOX_SIZE = 12  # 二维码方块大小
 QR_BORDER = 4  # 二维码边框大小
+QR_ENCODERS = ("native", "qrcode")  # 可选的编码器：内置批量编码器或qrcode库，两者结果逐位一致
+QR_ENCODER = "native"  # 默认使用内置编码器，速度比qrcode库快十倍以上
+QR_SEGMENTATIONS = ("optimal", "qrcode")  # 数据分段方式：按位数最少分为数字、字母数字和字节段，或沿用qrcode库的规则（连续20个以上字符才单独分段）
+QR_SEGMENTATION = "qrcode"  # 默认沿用qrcode库的规则，二维码与以前的版本相同；改为"optimal"时内容不变、二维码版本可能更小，但与以前生成的二维码不同（两种编码器之间仍逐位一致）
+QR_GROUPINGS = ("fixed", "capacity")  # 可选的分组方式：每组固定QR_PER_IMAGE个字符串，或按目标版本的容量装入尽可能多的字符串
+QR_GROUPING = "fixed"  # 默认每QR_PER_IMAGE个字符串生成一个二维码
+QR_SEPARATOR = ";"  # 同一个二维码中各字符串之间的分隔符；序列号只含大写字母和数字时，用空格、$%*+-./:之一作分隔符可使整个内容按字母数字模式编码
+QR_TARGET_VERSION = 13  # 按容量分组时的目标版本，每个二维码不超过此版本（单个字符串本身放不下时除外）；默认与每组10个18位序列号相当
 
 # 图像处理设置
 IMAGE_DPI = 600  # 图像DPI值，影响打印质量
@@ -90,6 +133,16 @@ LOG_LEVEL = "INFO"  # 日志级别: DEBUG, INFO, WARNING, ERROR
 # 进度条设置
 PROGRESS_INTERVAL = 500  # 进度条更新间隔（毫秒）
 PROGRESS_INCREMENT = 0.5  # 每次更新的进度增量
+PROGRESS_CALLBACK_INTERVAL = 0.1  # 二维码生成进度回调的最短间隔（秒）
+PROGRESS_LOG_INTERVAL = 2.0  # 批次进度汇总日志的最短间隔（秒）
+
+# 运行指标：各阶段耗时、计数、队列深度和执行池利用率，路径为None时不导出
+METRICS_PREFIX = "qrcode"  # Prometheus指标名前缀
+METRICS_JSONL_PATH = None  # 每次运行追加一行JSON的文件路径
+METRICS_PROMETHEUS_PATH = None  # Prometheus文本格式文件路径，可指向node exporter的textfile collector目录下的.prom文件
+
+# 启动耗时测试：设置此环境变量时图形界面绘制完窗口即退出（见utils/startup_benchmark.py）
+STARTUP_BENCHMARK_ENV = "QRCODE_STARTUP_BENCHMARK"
 
 # 路径设置
 def get_temp_qr_dir(output_dir):
@@ -135,11 +188,27 @@ ERROR_MESSAGES = {
     "INVALID_BATCH_SIZE": "请输入有效的批次大小（必须大于等于1）",
     "OUTPUT_DIR_ERROR": "请选择有效的输出目录",
     "NO_DATA": "没有读取到任何数据",
-    "EXCEL_ERROR": "读取Excel文件时出错: {}",
+    "EXCEL_ERROR": "读取输入文件时出错: {}",
+    "XLRD_REQUIRED": "读取xls文件需要安装xlrd（xlsx、csv、tsv和txt文件无需xlrd）",
+    "UNSUPPORTED_INPUT_FORMAT": "不支持的输入格式: {}（可选格式: {}），可以用--format指定",
+    "SHEET_NOT_FOUND": "工作表不存在: {}（工作簿中的工作表: {}）",
+    "COLUMN_NOT_FOUND": "列不存在: {}（表头: {}），可以用表头名称或从1开始的序号指定列",
+    "COLUMN_NAME_WITHOUT_HEADER": "纯文本文件没有表头，只能读取第1列: {}",
+    "INVALID_FILTER": "筛选条件格式不正确: {}（应为 列=值、列!=值 或 列~正则表达式）",
     "QR_GENERATION_ERROR": "生成二维码时出错 (任务 {}): {}",
     "IMAGE_GENERATION_ERROR": "生成A4图片时出错 (页面 {}): {}",
     "GENERAL_ERROR": "程序执行出错: {}",
-    "CREATE_DIR_ERROR": "创建目录时出错: {}"
+    "NO_BATCH_INPUTS": "没有找到可读取的输入文件: {}",
+    "BATCH_JOB_FAILED": "批量任务 {} 失败: {}",
+    "CREATE_DIR_ERROR": "创建目录时出错: {}",
+    "INVALID_PAGE_MODE": "无效的页面图片模式: {}（可选: RGB, L, 1）",
+    "INVALID_PAGE_FORMAT": "无效的页面文件格式: {}（可选: png, tiff, svg）",
+    "QR_CACHE_ERROR": "二维码缓存不可用，本次运行不再使用缓存: {}",
+    "METRICS_EXPORT_ERROR": "导出运行指标时出错: {}",
+    "INVALID_BACKEND": "不支持的执行后端: {}（可选: thread, process）",
+    "INVALID_QR_GROUPING": "不支持的二维码分组方式: {}（可选: fixed, capacity）",
+    "INVALID_QR_VERSION": "无效的二维码目标版本: {}（应为1~40）",
+    "INVALID_QR_SEPARATOR": "二维码内容的分隔符不能为空"
 }
 
 # 成功消息模板
@@ -164,9 +233,25 @@ INFO_MESSAGES = {
     "EXCEL_READ_TIME": "读取Excel文件耗时: {:.2f}秒",
     "TOTAL_TIME": "总用时: {:.2f}秒",
     "CANCELLED": "操作已取消",
-    "BATCH_COMPLETED": "批次生成完成: 第{}批 - 共{}个二维码，用时: {:.2f}秒",
-    "SHUTDOWN_COMPLETE": "线程池已关闭，资源已释放",
+    "BATCH_PROGRESS": "批次生成进度: 已完成{}/{}批 - 最近{}批共{}个二维码，用时: {:.2f}秒（{:.0f}个/秒）",
+    "SHUTDOWN_COMPLETE": "执行池已关闭，资源已释放",
     "DOCX_FILE_GENERATED": "Word文档已生成: {}",
     "DOCX_GENERATION_FAILED": "Word文档生成失败",
-    "TRYING_IMAGE_AS_FALLBACK": "尝试生成A4图片作为备选..."
+    "DOCX_GENERATION_TIME": "Word文档生成完成: 共{}页，{}个文件，耗时: {:.2f}秒",
+    "START_PDF_GENERATION": "开始生成PDF文档...",
+    "PDF_GENERATION_COMPLETE": "PDF文档生成完成: 共{}页，耗时: {:.2f}秒",
+    "PDF_FILE_GENERATED": "PDF文档已生成: {}",
+    "TRYING_IMAGE_AS_FALLBACK": "尝试生成A4图片作为备选...",
+    "START_PIPELINE": "开始流水线生成（读取Excel、生成二维码和合成A4图片同时进行）...",
+    "RESUME_JOB": "沿用输出目录中的任务清单: 已记录{}页，只生成缺失或内容变化的页面",
+    "RESUME_NOT_FOUND": "输出目录中没有参数相同的任务清单，从头开始生成",
+    "INCREMENTAL_SUMMARY": "保留{}页，重新生成{}页（{}个二维码组为新增或内容有变化），删除{}页多余的旧页面",
+    "JOB_ALREADY_COMPLETE": "任务已全部完成，无需重新生成",
+    "QR_CACHE_STATS": "二维码缓存: 命中{}个，新编码{}个",
+    "METRICS_EXPORTED": "运行指标已导出: {}",
+    "PIPELINE_COMPLETE": "流水线生成完成: 共{}条数据，{}个二维码，{}页，耗时: {:.2f}秒",
+    "START_BATCH_JOBS": "开始批量生成: 共{}个任务，同时运行{}个，共用同一组执行池",
+    "BATCH_JOB_PROGRESS": "批量任务进度: 已完成{}/{}个任务，共{}个二维码，{}页，用时: {:.2f}秒",
+    "BATCH_JOB_SUMMARY": "  {}: {}，{}个二维码，{}个文件，耗时: {:.2f}秒",
+    "BATCH_JOBS_COMPLETE": "批量生成完成: {}个任务成功，{}个失败，{}个取消，共{}个二维码，{}页，耗时: {:.2f}秒（{:.0f}个二维码/秒），报告已保存: {}"
 }
\ No newline at end of file
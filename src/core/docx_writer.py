@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式Word文档输出
+
+直接按Office Open XML格式写出.docx压缩包，不在内存中构建文档对象树。
+图片一生成就写入压缩包并从内存释放；正文XML逐页追加到临时文件，
+关闭时再拷贝为word/document.xml，内存占用与页数无关。
+内容完全相同的图片只保存一份，各处引用同一个图片部件。
+文档附带只含正文和标题两种样式的最小样式部件，标题段落使用Word内置的"标题"样式。
+"""
+
+import hashlib
+import shutil
+import tempfile
+import zipfile
+from typing import List, Optional
+from xml.sax.saxutils import escape
+
+EMU_PER_CM = 360000  # DrawingML长度单位：每厘米360000 EMU
+TWIPS_PER_CM = 1440 / 2.54  # WordprocessingML长度单位：每英寸1440缇
+
+_NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture"'
+)
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Default Extension="png" ContentType="image/png"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+
+_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+# 正文和标题样式，标题与Word默认模板中的"标题"样式相同（26磅、深蓝色、下边框）
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:docDefaults><w:rPrDefault><w:rPr>'
+    '<w:rFonts w:asciiTheme="minorHAnsi" w:eastAsiaTheme="minorEastAsia" w:hAnsiTheme="minorHAnsi" '
+    'w:cstheme="minorBidi"/><w:sz w:val="22"/><w:szCs w:val="22"/>'
+    '</w:rPr></w:rPrDefault><w:pPrDefault><w:pPr><w:spacing w:after="200" w:line="276" w:lineRule="auto"/>'
+    '</w:pPr></w:pPrDefault></w:docDefaults>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:qFormat/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Title"><w:name w:val="Title"/><w:basedOn w:val="Normal"/>'
+    '<w:next w:val="Normal"/><w:uiPriority w:val="10"/><w:qFormat/><w:pPr>'
+    '<w:pBdr><w:bottom w:val="single" w:sz="8" w:space="4" w:color="4F81BD"/></w:pBdr>'
+    '<w:spacing w:after="300" w:line="240" w:lineRule="auto"/><w:contextualSpacing/></w:pPr>'
+    '<w:rPr><w:rFonts w:asciiTheme="majorHAnsi" w:eastAsiaTheme="majorEastAsia" w:hAnsiTheme="majorHAnsi" '
+    'w:cstheme="majorBidi"/><w:color w:val="17365D"/><w:spacing w:val="5"/><w:kern w:val="28"/>'
+    '<w:sz w:val="52"/><w:szCs w:val="52"/></w:rPr></w:style>'
+    '</w:styles>'
+)
+
+_IMAGE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+_STYLES_REL = (
+    '<Relationship Id="rIdStyles" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+)
+
+_PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+def _twips(cm: float) -> int:
+    return round(cm * TWIPS_PER_CM)
+
+
+class DocxWriter:
+    """
+    逐页写入的Word文档
+
+    每页是一个居中的表格，每个单元格放一张图片，页与页之间插入分页符。
+    """
+
+    def __init__(self, path: str, page_width_cm: float = 21.0, page_height_cm: float = 29.7,
+                 margin_cm: float = 1.0):
+        """
+        Args:
+            path (str): 输出文件路径
+            page_width_cm (float): 页面宽度，单位厘米
+            page_height_cm (float): 页面高度，单位厘米
+            margin_cm (float): 四边页边距，单位厘米
+        """
+        self.path = path
+        self.page_size = (page_width_cm, page_height_cm)
+        self.margin_cm = margin_cm
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self._body = tempfile.TemporaryFile()
+        self._media = {}  # 图片内容的摘要 -> 关系ID
+        self._drawing_count = 0
+        self._page_count = 0
+
+    @property
+    def page_count(self) -> int:
+        return self._page_count
+
+    def _write_body(self, xml: str):
+        self._body.write(xml.encode('utf-8'))
+
+    def _add_image(self, png: bytes) -> str:
+        """写入PNG图片部件并返回其关系ID，内容相同的图片只写入一次"""
+        digest = hashlib.sha1(png).digest()
+        rel_id = self._media.get(digest)
+        if rel_id is None:
+            rel_id = f"rId{len(self._media) + 1}"
+            # PNG本身已压缩，直接存储
+            self._zip.writestr(f"word/media/image{len(self._media) + 1}.png", png,
+                               compress_type=zipfile.ZIP_STORED)
+            self._media[digest] = rel_id
+        return rel_id
+
+    def _picture_run(self, png: bytes, width_cm: float, height_cm: float) -> str:
+        """生成嵌入一张图片的文本块"""
+        rel_id = self._add_image(png)
+        self._drawing_count += 1
+        drawing_id = self._drawing_count
+        cx = round(width_cm * EMU_PER_CM)
+        cy = round(height_cm * EMU_PER_CM)
+        return (
+            f'<w:r><w:drawing><wp:inline distT="0" distB="0" distL="0" distR="0">'
+            f'<wp:extent cx="{cx}" cy="{cy}"/><wp:docPr id="{drawing_id}" name="Picture {drawing_id}"/>'
+            f'<wp:cNvGraphicFramePr><a:graphicFrameLocks noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+            f'<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+            f'<pic:pic><pic:nvPicPr><pic:cNvPr id="{drawing_id}" name="image.png"/><pic:cNvPicPr/></pic:nvPicPr>'
+            f'<pic:blipFill><a:blip r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+            f'<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+            f'<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr></pic:pic>'
+            f'</a:graphicData></a:graphic></wp:inline></w:drawing></w:r>'
+        )
+
+    def add_title(self, title: str, font_size: Optional[float] = None):
+        """
+        添加使用"标题"样式的居中段落
+
+        Args:
+            title (str): 标题文字
+            font_size (float, optional): 字号（磅），为None时使用样式中的字号
+        """
+        run_props = ''
+        if font_size:
+            half_points = round(font_size * 2)
+            run_props = f'<w:rPr><w:sz w:val="{half_points}"/><w:szCs w:val="{half_points}"/></w:rPr>'
+        self._write_body(
+            f'<w:p><w:pPr><w:pStyle w:val="Title"/><w:jc w:val="center"/></w:pPr>'
+            f'<w:r>{run_props}<w:t xml:space="preserve">{escape(title)}</w:t></w:r></w:p>'
+        )
+
+    def add_page(self, pictures: List[bytes], cols: int, cell_width_cm: float, picture_width_cm: float):
+        """
+        写入一页，图片按行优先顺序排列在表格中，第一页之外的页面前插入分页符
+
+        Args:
+            pictures (List[bytes]): 本页的PNG图片数据，为None的位置留空
+            cols (int): 表格列数
+            cell_width_cm (float): 单元格宽度，单位厘米
+            picture_width_cm (float): 图片宽度（与高度相同），单位厘米
+        """
+        cell_width = _twips(cell_width_cm)
+        parts = [_PAGE_BREAK] if self._page_count else []
+        parts.append(
+            '<w:tbl><w:tblPr><w:tblW w:w="0" w:type="auto"/><w:jc w:val="center"/>'
+            '<w:tblLayout w:type="fixed"/></w:tblPr><w:tblGrid>'
+        )
+        parts.append(f'<w:gridCol w:w="{cell_width}"/>' * cols)
+        parts.append('</w:tblGrid>')
+        for row_start in range(0, len(pictures), cols):
+            parts.append('<w:tr>')
+            row = pictures[row_start:row_start + cols]
+            for png in row + [None] * (cols - len(row)):
+                run = self._picture_run(png, picture_width_cm, picture_width_cm) if png else ''
+                parts.append(
+                    f'<w:tc><w:tcPr><w:tcW w:w="{cell_width}" w:type="dxa"/></w:tcPr>'
+                    f'<w:p><w:pPr><w:jc w:val="center"/></w:pPr>{run}</w:p></w:tc>'
+                )
+            parts.append('</w:tr>')
+        parts.append('</w:tbl>')
+        self._write_body("".join(parts))
+        self._page_count += 1
+
+    def close(self):
+        """写出正文、样式、关系和内容类型部件并关闭文件"""
+        if self._body.closed:
+            return
+        width, height = self.page_size
+        margin = _twips(self.margin_cm)
+        with self._zip.open("word/document.xml", 'w') as document:
+            document.write(
+                f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<w:document {_NAMESPACES}><w:body>'.encode('utf-8')
+            )
+            self._body.seek(0)
+            shutil.copyfileobj(self._body, document)
+            document.write(
+                f'<w:sectPr><w:pgSz w:w="{_twips(width)}" w:h="{_twips(height)}"/>'
+                f'<w:pgMar w:top="{margin}" w:right="{margin}" w:bottom="{margin}" w:left="{margin}" '
+                f'w:header="720" w:footer="720" w:gutter="0"/></w:sectPr>'
+                f'</w:body></w:document>'.encode('utf-8')
+            )
+        self._body.close()
+
+        rels = "".join(
+            f'<Relationship Id="{rel_id}" Type="{_IMAGE_REL_TYPE}" Target="media/image{rel_id[3:]}.png"/>'
+            for rel_id in self._media.values()
+        )
+        self._zip.writestr(
+            "word/_rels/document.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{_STYLES_REL}{rels}</Relationships>'
+        )
+        self._zip.writestr("word/styles.xml", _STYLES)
+        self._zip.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _PACKAGE_RELS)
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
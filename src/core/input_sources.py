@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输入数据源
+
+按文件格式选择读取器，每次产出一批二维码内容字符串，中间不经过pandas DataFrame。
+xlsx、CSV、TSV和纯文本文件逐行流式读取，内存占用与文件大小无关；
+xls文件由xlrd整表解析后逐行产出。
+
+默认读取第一个工作表的第一列。InputSelection可以指定工作表、按表头名称或序号选择一列或多列、
+按条件筛选行，并用模板把多列组合成二维码内容。选择在读取器中完成：
+xlsx工作表的XML按行扫描，只转换选中列的单元格，宽表中未选中的列不做类型转换和字符串查找。
+
+表格格式（xlsx、xls、csv、tsv）的第1行为表头，数据从第2行开始；
+纯文本文件每行一条数据，没有表头，只有第1列。选中的列全部为空的行跳过。
+
+新的格式用register_reader注册读取器函数即可，读取器接收文件路径、需要跳过的数据行数、
+InputSelection和文本编码，用selection.resolve按表头确定选中列的位置，
+逐行产出选中列的值组成的元组（空单元格为None）。
+"""
+
+import csv
+import itertools
+import os
+import posixpath
+import re
+import string
+import xml.parsers.expat
+import zipfile
+from xml.etree import ElementTree
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from core.config import ERROR_MESSAGES, INPUT_COLUMN_SEPARATOR, INPUT_TEXT_ENCODING
+
+Reader = Callable[[str, int, "InputSelection", str], Iterator[Tuple]]
+
+_READERS: Dict[str, Reader] = {}  # 格式名称 -> 读取器
+_EXTENSIONS: Dict[str, str] = {}  # 文件扩展名 -> 格式名称
+_SHEET_LISTERS: Dict[str, Callable[[str], List[str]]] = {}  # 格式名称 -> 列出工作表名称的函数
+
+# 工作表XML中的元素名（expat按"命名空间}元素名"给出）
+_SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_ROW, _CELL, _VALUE, _TEXT = _SHEET_NS + "row", _SHEET_NS + "c", _SHEET_NS + "v", _SHEET_NS + "t"
+_INLINE, _PHONETIC = _SHEET_NS + "is", _SHEET_NS + "rPh"
+_PACKAGE_RELS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_DOCUMENT_RELS_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+# 筛选条件：列=值、列!=值、列~正则表达式（re.search）
+_FILTER_PATTERN = re.compile(r"^(.+?)(!=|=|~)(.*)$", re.S)
+
+
+def register_reader(name: str, extensions: Iterable[str], list_sheets: Optional[Callable[[str], List[str]]] = None):
+    """
+    注册一种输入格式的读取器（装饰器）
+
+    Args:
+        name (str): 格式名称，可在命令行的--format中指定
+        extensions (Iterable[str]): 按扩展名自动选择此读取器的文件扩展名，如".csv"
+        list_sheets (callable, optional): 列出文件中工作表名称的函数，没有工作表的格式不需要
+    """
+    def decorator(reader: Reader) -> Reader:
+        _READERS[name] = reader
+        for extension in extensions:
+            _EXTENSIONS[extension.lower()] = name
+        if list_sheets is not None:
+            _SHEET_LISTERS[name] = list_sheets
+        return reader
+    return decorator
+
+
+def input_extensions() -> List[str]:
+    """可以按扩展名自动识别的输入文件扩展名"""
+    return list(_EXTENSIONS)
+
+
+def list_sheets(file_path: str, input_format: Optional[str] = None) -> List[str]:
+    """
+    列出文件中各工作表的名称，顺序与按序号选择工作表时一致
+
+    没有工作表的格式（CSV、TSV、纯文本）返回空列表。
+    """
+    lister = _SHEET_LISTERS.get(input_format or detect_format(file_path))
+    return lister(file_path) if lister else []
+
+
+def detect_format(file_path: str) -> str:
+    """按文件扩展名判断输入格式"""
+    extension = os.path.splitext(file_path)[1].lower()
+    name = _EXTENSIONS.get(extension)
+    if name is None:
+        raise ValueError(ERROR_MESSAGES["UNSUPPORTED_INPUT_FORMAT"].format(extension or file_path, ", ".join(_READERS)))
+    return name
+
+
+def parse_filter(text: str) -> Tuple[str, Callable[[str], bool]]:
+    """
+    解析筛选条件
+
+    Args:
+        text (str): "列=值"、"列!=值"或"列~正则表达式"，列为表头名称或从1开始的序号
+
+    Returns:
+        Tuple: (列, 对单元格字符串的判断函数)
+    """
+    match = _FILTER_PATTERN.match(text)
+    if not match:
+        raise ValueError(ERROR_MESSAGES["INVALID_FILTER"].format(text))
+    column, operator, value = match.groups()
+    if operator == "=":
+        return column.strip(), value.__eq__
+    if operator == "!=":
+        return column.strip(), value.__ne__
+    try:
+        pattern = re.compile(value)
+    except re.error:
+        raise ValueError(ERROR_MESSAGES["INVALID_FILTER"].format(text))
+    return column.strip(), lambda cell: pattern.search(cell) is not None
+
+
+class InputSelection:
+    """
+    输入文件中要读取的工作表和列、行的筛选条件以及二维码内容的组合方式
+
+    列可以用表头名称或从1开始的序号指定，名称优先。内容模板按str.format的语法书写，
+    {0}、{1}等位置字段依次对应选中的列，{名称}直接引用表头中的列（无需另外选择）；
+    未指定模板时，选中的多列以INPUT_COLUMN_SEPARATOR连接。
+    """
+
+    def __init__(self, sheet: Optional[str] = None, columns: Optional[Sequence] = None,
+                 template: Optional[str] = None, filters: Optional[Sequence[str]] = None,
+                 predicate: Optional[Callable[[Dict[str, str]], bool]] = None):
+        """
+        Args:
+            sheet (str, optional): 工作表名称或从1开始的序号，默认为第一个工作表
+            columns (Sequence, optional): 组成二维码内容的列，默认为第1列
+            template (str, optional): 二维码内容模板
+            filters (Sequence[str], optional): 筛选条件，见parse_filter，全部满足的行才保留
+            predicate (callable, optional): 自定义筛选函数，接收以列名为键、单元格字符串为值的字典，
+                                            字典中只包含选中的列、模板和筛选条件引用的列
+        """
+        self.sheet = None if sheet is None else str(sheet)
+        self.template = template
+        self.filters = list(filters or [])
+        self.predicate = predicate
+
+        named, positional = [], False
+        if template is not None:
+            for _, field, _, _ in string.Formatter().parse(template):
+                if field is None:
+                    continue
+                root = re.split(r"[.\[]", field, 1)[0]
+                if root == "" or root.isdigit():
+                    positional = True
+                else:
+                    named.append(root)
+        if columns:
+            self.columns = [str(column).strip() for column in columns]
+        else:
+            self.columns = ["1"] if positional or template is None else []
+
+        tests = [parse_filter(text) for text in self.filters]
+        # 需要读取的全部列，选中的列在前，与模板中的位置字段一一对应
+        self.fields = list(dict.fromkeys(self.columns + named + [column for column, _ in tests]))
+        position = {field: i for i, field in enumerate(self.fields)}
+        self._columns = [position[column] for column in self.columns]
+        self._payload = sorted({position[field] for field in self.columns + named})
+        self._tests = [(position[column], test) for column, test in tests]
+        self._simple = template is None and not tests and predicate is None and len(self.fields) == 1
+        self._formatter = string.Formatter()
+
+    def with_sheet(self, sheet: Optional[str]) -> "InputSelection":
+        """列、模板和筛选条件相同，读取另一个工作表的选择条件"""
+        return InputSelection(sheet, self.columns, self.template, self.filters, self.predicate)
+
+    def describe(self) -> Dict:
+        """选择条件的字典形式，记录在任务清单中"""
+        return {
+            "sheet": self.sheet, "columns": self.columns, "template": self.template, "filters": self.filters,
+            "predicate": None if self.predicate is None else getattr(self.predicate, "__qualname__", repr(self.predicate)),
+        }
+
+    def pick_sheet(self, names: Sequence[str]) -> int:
+        """按名称或序号确定工作表的位置"""
+        if self.sheet is None:
+            return 0
+        if self.sheet in names:
+            return list(names).index(self.sheet)
+        if self.sheet.isdigit() and 1 <= int(self.sheet) <= len(names):
+            return int(self.sheet) - 1
+        raise ValueError(ERROR_MESSAGES["SHEET_NOT_FOUND"].format(self.sheet, ", ".join(names)))
+
+    def resolve(self, header: Optional[Sequence], width: Optional[int] = None) -> List[int]:
+        """
+        按表头确定需要读取的各列的位置（从0开始）
+
+        Args:
+            header (Sequence, optional): 表头各单元格的值，没有表头的格式为None
+            width (int, optional): 没有表头的格式的列数
+        """
+        names = [] if header is None else ["" if value is None else str(value).strip() for value in header]
+        indices = []
+        for field in self.fields:
+            if field in names:
+                indices.append(names.index(field))
+            elif field.isdigit() and int(field) >= 1 and (width is None or int(field) <= width):
+                indices.append(int(field) - 1)
+            elif header is None and not field.isdigit():
+                raise ValueError(ERROR_MESSAGES["COLUMN_NAME_WITHOUT_HEADER"].format(field))
+            else:
+                raise ValueError(ERROR_MESSAGES["COLUMN_NOT_FOUND"].format(field, ", ".join(filter(None, names))))
+        return indices
+
+    def payloads(self, rows: Iterable[Tuple]) -> Iterator[str]:
+        """把读取器产出的行转换为二维码内容，跳过空行和不满足筛选条件的行"""
+        if self._simple:
+            # 只选一列时不组合字符串，逐行的开销与原先只读取第一列时相同
+            return (str(value) for (value,) in rows if value is not None and value != "")
+        return filter(None, map(self._build, rows))
+
+    def _build(self, row: Tuple) -> Optional[str]:
+        values = ["" if value is None else str(value) for value in row]
+        if not any(values[i] for i in self._payload):
+            return None
+        for i, test in self._tests:
+            if not test(values[i]):
+                return None
+        named = dict(zip(self.fields, values))
+        if self.predicate is not None and not self.predicate(named):
+            return None
+        selected = [values[i] for i in self._columns]
+        if self.template is None:
+            return INPUT_COLUMN_SEPARATOR.join(selected)
+        return self._formatter.vformat(self.template, selected, named)
+
+
+def iter_batches(file_path: str, skip_rows: int, batch_size: int, input_format: Optional[str] = None,
+                 encoding: str = INPUT_TEXT_ENCODING,
+                 selection: Optional[InputSelection] = None) -> Iterator[List[str]]:
+    """
+    读取输入文件，每次产出一批二维码内容字符串
+
+    Args:
+        file_path (str): 输入文件路径
+        skip_rows (int): 跳过的数据行数（不含表头）
+        batch_size (int): 每批产出的字符串数量
+        input_format (str, optional): 输入格式，为None时按扩展名判断
+        encoding (str): CSV、TSV和纯文本文件的编码
+        selection (InputSelection, optional): 工作表、列、筛选条件和内容模板，默认读取第一列
+    """
+    name = input_format or detect_format(file_path)
+    reader = _READERS.get(name)
+    if reader is None:
+        raise ValueError(ERROR_MESSAGES["UNSUPPORTED_INPUT_FORMAT"].format(name, ", ".join(_READERS)))
+    selection = selection or InputSelection()
+    return _batched(selection.payloads(reader(file_path, skip_rows, selection, encoding)), max(1, batch_size))
+
+
+def _batched(values: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    values = iter(values)
+    while True:
+        batch = list(itertools.islice(values, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _column_index(letters: str) -> int:
+    """列字母对应的列号，如"AB"为28"""
+    column = 0
+    for char in letters:
+        column = column * 26 + ord(char) - 64
+    return column
+
+
+class _XlsxSheetScanner:
+    """
+    按行扫描xlsx工作表的XML，只转换选中列的单元格
+
+    openpyxl的只读模式会把每一行的所有单元格都解析、转换后再按列截取，
+    这里用expat逐块解析，未选中的单元格只读取其列号。
+    共享字符串表、日期和时长格式以及日期基准沿用openpyxl加载工作簿时的结果，转换规则与openpyxl一致。
+    这些属于openpyxl的内部接口，不可用时构造函数抛出AttributeError，由调用方改用_XlsxRowReader。
+    """
+
+    def __init__(self, workbook, sheet):
+        from openpyxl.utils.datetime import from_excel, from_ISO8601
+
+        self.shared_strings = sheet._shared_strings
+        self.date_formats = workbook._date_formats
+        # 较早的openpyxl没有时长格式，这类单元格与日期一样转换
+        self.timedelta_formats = getattr(workbook, '_timedelta_formats', ())
+        self.epoch = workbook.epoch
+        self._get_source = sheet._get_source
+        self.from_excel = from_excel
+        self.from_ISO8601 = from_ISO8601
+        self.columns = None  # 需要转换的列号集合，None表示全部（用于读取表头）
+        self._letters = {}  # 列字母 -> 列号
+        self._rows = []
+        self._row = None
+        self._cells = None
+        self._column = 0
+        self._cell = None  # 当前选中单元格的(列号, 类型, 样式)
+        self._text = None  # 当前选中单元格的文本，只在<v>和内联字符串的<t>中收集
+        self._capture = False
+        self._in_inline = False
+        self._in_phonetic = False
+
+    def _start(self, name, attrs):
+        if name == _CELL:
+            reference = attrs.get('r')
+            if reference:
+                letters = reference.rstrip("0123456789")
+                column = self._letters.get(letters)
+                if column is None:
+                    column = self._letters[letters] = _column_index(letters)
+            else:
+                column = self._column + 1
+            self._column = column
+            if self.columns is None or column in self.columns:
+                self._cell = (column, attrs.get('t', 'n'), attrs.get('s'))
+                self._text = []
+            else:
+                self._cell = None
+        elif self._cell is None:
+            if name == _ROW:
+                row = attrs.get('r')
+                self._row = int(float(row)) if row else (self._row or 0) + 1
+                self._cells = {}
+                self._column = 0
+        elif name == _VALUE:
+            self._capture = True
+        elif name == _INLINE:
+            self._in_inline = True
+        elif name == _PHONETIC:
+            self._in_phonetic = True
+        elif name == _TEXT and self._in_inline and not self._in_phonetic:
+            self._capture = True
+
+    def _end(self, name):
+        if self._cell is None:
+            if name == _ROW:
+                self._rows.append((self._row, self._cells))
+        elif name == _VALUE or name == _TEXT:
+            self._capture = False
+        elif name == _PHONETIC:
+            self._in_phonetic = False
+        elif name == _INLINE:
+            self._in_inline = False
+        elif name == _CELL:
+            column, data_type, style = self._cell
+            value = self._convert(data_type, style, "".join(self._text))
+            if value is not None:
+                self._cells[column] = value
+            self._cell = None
+
+    def _data(self, data):
+        if self._capture:
+            self._text.append(data)
+
+    def _convert(self, data_type: str, style: Optional[str], text: str):
+        if data_type == 'inlineStr':
+            return text or None
+        if not text:
+            return None
+        if data_type == 'n':
+            value = float(text) if '.' in text or 'E' in text or 'e' in text else int(text)
+            if style and int(style) in self.date_formats:
+                try:
+                    return self.from_excel(value, self.epoch, timedelta=int(style) in self.timedelta_formats)
+                except (OverflowError, ValueError):
+                    return "#VALUE!"
+            return value
+        if data_type == 's':
+            return self.shared_strings[int(text)]
+        if data_type == 'b':
+            return bool(int(text))
+        if data_type == 'd':
+            return self.from_ISO8601(text)
+        return text
+
+    def rows(self, chunk_size: int = 1 << 16) -> Iterator[Tuple[int, Dict[int, object]]]:
+        """逐行产出(行号, {列号: 值})，空单元格不包含在内"""
+        parser = xml.parsers.expat.ParserCreate(namespace_separator='}')
+        parser.buffer_text = True
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = self._data
+        source = self._get_source()
+        try:
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                parser.Parse(chunk, False)
+                yield from self._rows
+                self._rows = []
+            parser.Parse(b"", True)
+            yield from self._rows
+            self._rows = []
+        finally:
+            source.close()
+
+
+class _XlsxRowReader:
+    """
+    openpyxl内部接口不可用时的退路：用公开的iter_rows(values_only=True)逐行读取，
+    接口与_XlsxSheetScanner相同，但每一行的所有单元格都会被转换
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.columns = None  # 与_XlsxSheetScanner一致，此处不使用
+
+    def rows(self) -> Iterator[Tuple[int, Dict[int, object]]]:
+        """逐行产出(行号, {列号: 值})，空单元格不包含在内"""
+        for row, values in enumerate(self.sheet.iter_rows(values_only=True), 1):
+            yield row, {column: value for column, value in enumerate(values, 1) if value is not None}
+
+
+def _xlsx_sheets(file_path: str) -> List[str]:
+    """只读取工作簿的目录和关系文件列出工作表名称，不加载共享字符串表和样式"""
+    with zipfile.ZipFile(file_path) as archive:
+        package_rels = ElementTree.fromstring(archive.read("_rels/.rels"))
+        workbook_path = next(rel.get("Target") for rel in package_rels.iter(_PACKAGE_RELS_NS + "Relationship")
+                             if rel.get("Type", "").endswith("/officeDocument")).lstrip("/")
+        directory, name = posixpath.split(workbook_path)
+        rels = ElementTree.fromstring(archive.read(posixpath.join(directory, "_rels", name + ".rels")))
+        # 图表工作表没有单元格，与openpyxl的worksheets一致只列出普通工作表
+        worksheets = {rel.get("Id") for rel in rels.iter(_PACKAGE_RELS_NS + "Relationship")
+                      if rel.get("Type", "").endswith("/worksheet")}
+        workbook = ElementTree.fromstring(archive.read(workbook_path))
+    return [sheet.get("name") for sheet in workbook.iter("{" + _SHEET_NS + "sheet")
+            if sheet.get(_DOCUMENT_RELS_NS + "id") in worksheets]
+
+
+def _xls_sheets(file_path: str) -> List[str]:
+    try:
+        import xlrd
+    except ImportError:
+        raise ImportError(ERROR_MESSAGES["XLRD_REQUIRED"])
+    workbook = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        return workbook.sheet_names()
+    finally:
+        workbook.release_resources()
+
+
+@register_reader("xlsx", (".xlsx", ".xlsm"), _xlsx_sheets)
+def read_xlsx(file_path: str, skip_rows: int, selection: InputSelection, encoding: str) -> Iterator[Tuple]:
+    """使用openpyxl只读模式加载工作簿，逐行扫描选中的工作表，只转换选中列的单元格"""
+    import openpyxl
+
+    # 只读模式下工作表按需解析，不会把整张表加载到内存
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[selection.pick_sheet([worksheet.title for worksheet in workbook.worksheets])]
+        try:
+            scanner = _XlsxSheetScanner(workbook, sheet)
+        except AttributeError:
+            scanner = _XlsxRowReader(sheet)
+        first_row = skip_rows + 2  # 第1行为表头，数据从第2行开始
+        columns = None
+        for row, cells in scanner.rows():
+            if columns is None:
+                header = cells if row == 1 else {}
+                columns = [index + 1 for index in selection.resolve(
+                    [header.get(column) for column in range(1, max(header, default=0) + 1)])]
+                scanner.columns = set(columns)
+            if row >= first_row:
+                yield tuple(cells.get(column) for column in columns)
+        if columns is None:
+            selection.resolve([])
+    finally:
+        workbook.close()
+
+
+@register_reader("xls", (".xls",), _xls_sheets)
+def read_xls(file_path: str, skip_rows: int, selection: InputSelection, encoding: str) -> Iterator[Tuple]:
+    """使用xlrd读取旧版xls文件，xlrd只在读取xls文件时才需要"""
+    try:
+        import xlrd
+    except ImportError:
+        raise ImportError(ERROR_MESSAGES["XLRD_REQUIRED"])
+
+    workbook = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = workbook.sheet_by_index(selection.pick_sheet(workbook.sheet_names()))
+
+        def value(row, column):
+            if column >= sheet.row_len(row):
+                return None
+            cell = sheet.cell(row, column)
+            if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+                return None
+            # 与xlsx的读取结果保持一致：整数不带小数点，日期转换为datetime
+            if cell.ctype == xlrd.XL_CELL_NUMBER and cell.value.is_integer():
+                return int(cell.value)
+            if cell.ctype == xlrd.XL_CELL_DATE:
+                return xlrd.xldate_as_datetime(cell.value, workbook.datemode)
+            if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                return bool(cell.value)
+            return cell.value
+
+        header = [value(0, column) for column in range(sheet.row_len(0))] if sheet.nrows else []
+        columns = selection.resolve(header)
+        for row in range(skip_rows + 1, sheet.nrows):
+            yield tuple(value(row, column) for column in columns)
+    finally:
+        workbook.release_resources()
+
+
+def _read_delimited(file_path: str, skip_rows: int, selection: InputSelection, encoding: str,
+                    delimiter: str) -> Iterator[Tuple]:
+    """逐行解析分隔符文件，取选中列的字段"""
+    with open(file_path, newline='', encoding=encoding) as f:
+        rows = csv.reader(f, delimiter=delimiter)
+        columns = selection.resolve(next(rows, []))
+        # 第1行为表头，与Excel文件的行号保持一致
+        rows = itertools.islice(rows, skip_rows, None)
+        if columns == [0]:
+            yield from ((row[0] if row else None,) for row in rows)
+            return
+        for row in rows:
+            width = len(row)
+            yield tuple(row[column] if column < width else None for column in columns)
+
+
+@register_reader("csv", (".csv",))
+def read_csv(file_path: str, skip_rows: int, selection: InputSelection, encoding: str) -> Iterator[Tuple]:
+    """读取逗号分隔的CSV文件"""
+    return _read_delimited(file_path, skip_rows, selection, encoding, ",")
+
+
+@register_reader("tsv", (".tsv", ".tab"))
+def read_tsv(file_path: str, skip_rows: int, selection: InputSelection, encoding: str) -> Iterator[Tuple]:
+    """读取制表符分隔的TSV文件"""
+    return _read_delimited(file_path, skip_rows, selection, encoding, "\t")
+
+
+@register_reader("txt", (".txt",))
+def read_text(file_path: str, skip_rows: int, selection: InputSelection, encoding: str) -> Iterator[Tuple]:
+    """读取纯文本文件，每行一条数据，没有表头，只有第1列"""
+    columns = selection.resolve(None, width=1)
+    with open(file_path, encoding=encoding) as f:
+        lines = itertools.islice(f, skip_rows, None)
+        yield from ((line.rstrip("\n"),) * len(columns) for line in lines)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可断点续传、可增量更新的任务清单
+
+流水线运行时在输出目录中保存一个JSON清单，记录输入文件的摘要、开始行、版面参数，
+以及已经写出的A4页面、它们包含的二维码组和每组内容的摘要。清单先写入临时文件再原子替换，
+程序中途被取消或崩溃时清单始终完整。
+
+再次运行同一任务时，内容摘要与清单一致且文件仍然存在的页面原样保留，不再编码和排版：
+续传要求输入文件没有变化，只补齐上次缺失的页面；增量更新允许输入文件变化，
+只重新生成内容有变化的页面，并删除数据减少后不再需要的页面文件。
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+from core.config import JOB_MANIFEST_NAME, JOB_MANIFEST_SAVE_INTERVAL
+
+MANIFEST_VERSION = 2
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """按块计算文件的SHA-256摘要"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_digest(payload: str) -> str:
+    """计算一个二维码组内容的短摘要，用于比较两次运行之间的内容变化"""
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class JobManifest:
+    """
+    输出目录中的任务清单
+
+    版面参数与已有清单完全相同时才沿用其中的页面记录：续传还要求输入文件摘要相同，
+    增量更新则逐页比较内容摘要。只有续传和增量更新才计算输入文件摘要，
+    没有摘要的清单（上次运行时未要求续传）按增量更新的方式逐页比较后沿用。
+    """
+
+    def __init__(self, output_dir: str, job: Dict, input_sha256: Optional[str], resume: bool = False,
+                 incremental: bool = False):
+        """
+        Args:
+            output_dir (str): 输出目录路径，清单保存在其中
+            job (Dict): 标识任务的参数（开始行、版面参数等），须可序列化为JSON
+            input_sha256 (str, optional): 输入文件的SHA-256摘要，不续传也不增量更新时为None
+            resume (bool): 是否续传输入文件相同的未完成任务
+            incremental (bool): 是否在输入文件变化后增量更新
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, JOB_MANIFEST_NAME)
+        self.job = job
+        self.input_sha256 = input_sha256
+        # 页面序号 -> {"file": 文件名, "groups": [第一个二维码组, 最后一个二维码组], "digests": 各组内容摘要}
+        self.pages = {}
+        self.outputs = []  # 任务完成后的输出文件名
+        self.complete = False
+        self.reused = False
+        self._seen = set()  # 本次运行中经过（保留或重新生成）的页面序号
+        self._last_save = 0.0
+
+        existing = self.load(self.path) if resume or incremental else None
+        same_input = input_sha256 is not None and existing is not None and existing.get("input_sha256") == input_sha256
+        if existing and existing.get("job") == job and (incremental or same_input or existing.get("input_sha256") is None):
+            self.pages = {int(index): page for index, page in existing.get("pages", {}).items()}
+            self.outputs = existing.get("outputs", [])
+            self.complete = existing.get("complete", False) and same_input
+            self.reused = True
+
+    @staticmethod
+    def load(path: str) -> Optional[Dict]:
+        """读取清单，文件不存在、已损坏或版本不同时返回None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return data
+
+    def _page_path(self, index: int) -> str:
+        return os.path.join(self.output_dir, self.pages[index]["file"])
+
+    def page_unchanged(self, index: int, digests: Sequence[str]) -> bool:
+        """
+        判断页面内容是否与清单记录一致且文件仍然存在，一致时记为本次运行保留的页面
+
+        Args:
+            index (int): 页面序号（从0开始）
+            digests (Sequence[str]): 页面中各二维码组的内容摘要
+
+        Returns:
+            bool: 页面可以原样保留时返回True
+        """
+        self._seen.add(index)
+        page = self.pages.get(index)
+        return bool(page) and page.get("digests") == list(digests) and os.path.exists(self._page_path(index))
+
+    def changed_groups(self, index: int, digests: Sequence[str]) -> int:
+        """统计页面中内容与清单记录不同的二维码组数，清单中没有的组也计为变化"""
+        old = self.pages.get(index, {}).get("digests", [])
+        return sum(1 for i, digest in enumerate(digests) if i >= len(old) or old[i] != digest)
+
+    def page_files(self) -> List[str]:
+        """按页面顺序排列的已完成页面文件路径"""
+        return [self._page_path(index) for index in sorted(self.pages)]
+
+    def output_files(self) -> List[str]:
+        """任务完成后仍然存在的输出文件路径，有文件缺失时返回空列表"""
+        paths = [os.path.join(self.output_dir, name) for name in self.outputs]
+        return paths if paths and all(os.path.exists(path) for path in paths) else []
+
+    def mark_page_done(self, index: int, file_path: str, first_group: int, last_group: int, digests: Sequence[str]):
+        """
+        记录一个已写出的页面，距上次保存超过JOB_MANIFEST_SAVE_INTERVAL秒时保存清单
+
+        同一页面以前的文件名不同（页面的行号范围变化）时删除以前的文件。
+
+        Args:
+            index (int): 页面序号（从0开始）
+            file_path (str): 页面文件路径
+            first_group (int): 页面中第一个二维码组的序号（从0开始）
+            last_group (int): 页面中最后一个二维码组的序号
+            digests (Sequence[str]): 页面中各二维码组的内容摘要
+        """
+        name = os.path.basename(file_path)
+        old = self.pages.get(index)
+        if old and old["file"] != name:
+            self._remove_file(old["file"])
+        self.pages[index] = {"file": name, "groups": [first_group, last_group], "digests": list(digests)}
+        self._seen.add(index)
+        if time.monotonic() - self._last_save >= JOB_MANIFEST_SAVE_INTERVAL:
+            self.save()
+
+    def remove_stale_pages(self) -> int:
+        """
+        删除本次运行没有经过的页面记录及其文件，在数据变少后清理多余的页面，只应在任务完成时调用
+
+        Returns:
+            int: 删除的页面数
+        """
+        stale = [index for index in self.pages if index not in self._seen]
+        for index in stale:
+            self._remove_file(self.pages.pop(index)["file"])
+        return len(stale)
+
+    def _remove_file(self, name: str):
+        try:
+            os.remove(os.path.join(self.output_dir, name))
+        except FileNotFoundError:
+            pass
+
+    def mark_complete(self, output_files: List[str]):
+        """记录任务已完成及其输出文件，并立即保存清单"""
+        self.outputs = [os.path.basename(path) for path in output_files]
+        self.complete = True
+        self.save()
+
+    def save(self):
+        """先写入临时文件再原子替换，保存过程中断也不会留下不完整的清单"""
+        data = {
+            "version": MANIFEST_VERSION,
+            "job": self.job,
+            "input_sha256": self.input_sha256,
+            "complete": self.complete,
+            "outputs": self.outputs,
+            "pages": {str(index): self.pages[index] for index in sorted(self.pages)},
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._last_save = time.monotonic()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标
+
+按阶段（读取、编码、光栅化、合成、保存）累计耗时和次数，并记录行数、二维码数、缓存命中、
+写出的文件数和字节数等计数、执行池的在途任务数和工作线程（进程）的利用率。
+一次运行的指标可以追加到JSON Lines文件，也可以写成Prometheus文本格式，
+供node exporter的textfile collector采集。
+
+执行池中的任务经run_timed包装后，任务耗时和任务内部各阶段的耗时随结果一起返回，
+在主进程中汇总，多进程后端下同样可以得到完整的指标。
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from core.config import METRICS_PREFIX
+
+# 当前线程中正在执行的任务的阶段耗时，只在run_timed包装的任务中存在
+_local = threading.local()
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    在执行池任务内部记录一个阶段的耗时，随任务结果返回
+
+    不在run_timed包装的任务中时不记录。
+    """
+    times = getattr(_local, 'times', None)
+    if times is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        times[stage] = times.get(stage, 0.0) + time.perf_counter() - start
+
+
+def run_timed(worker, task):
+    """
+    执行一个任务并测量耗时，定义在模块级别，可以被pickle后提交到进程池中执行
+
+    Returns:
+        Tuple: (任务结果, 任务耗时, 任务内部各阶段的耗时)
+    """
+    _local.times = times = {}
+    start = time.perf_counter()
+    try:
+        result = worker(task)
+    finally:
+        _local.times = None
+    return result, time.perf_counter() - start, times
+
+
+class Metrics:
+    """
+    一次运行的指标，可以在多个线程中使用
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.workers = {}  # 执行池名称 -> 工作线程（进程）数，切换后端或页面模式时更新，不随reset清空
+        self.reset()
+
+    def reset(self):
+        """清空已记录的指标，开始新一次运行的统计"""
+        with self._lock:
+            self.started = time.time()
+            self._start = time.perf_counter()
+            self.stages = {}  # 阶段 -> [次数, 总耗时, 最长耗时]
+            self.counters = {}
+            self.queues = {}  # 队列名称 -> [采样次数, 深度总和, 最大深度]
+            self.busy = {}  # 执行池名称 -> 任务总耗时
+
+    def _add_time(self, stage: str, seconds: float, count: int = 1):
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [count, seconds, seconds]
+        else:
+            entry[0] += count
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def add_time(self, stage: str, seconds: float, count: int = 1):
+        """记录一个阶段的耗时"""
+        with self._lock:
+            self._add_time(stage, seconds, count)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """测量with块的耗时并计入阶段"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def count(self, name: str, value: int = 1):
+        """累加计数"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_file(self, path: str):
+        """记录一个写出的文件及其大小"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            self.counters["files_written"] = self.counters.get("files_written", 0) + 1
+            self.counters["bytes_written"] = self.counters.get("bytes_written", 0) + size
+
+    def queue_depth(self, queue: str, depth: int):
+        """采样队列深度（在途任务数）"""
+        with self._lock:
+            entry = self.queues.get(queue)
+            if entry is None:
+                self.queues[queue] = [1, depth, depth]
+            else:
+                entry[0] += 1
+                entry[1] += depth
+                entry[2] = max(entry[2], depth)
+
+    def add_task(self, pool: str, stage: str, elapsed: float, inner_times: Dict[str, float]):
+        """
+        汇总一个执行池任务的耗时：任务内部单独记录的阶段分别计入，其余时间计入任务所属的阶段
+
+        Args:
+            pool (str): 执行池名称，用于计算利用率
+            stage (str): 任务所属的阶段
+            elapsed (float): 任务耗时
+            inner_times (Dict[str, float]): 任务内部各阶段的耗时
+        """
+        with self._lock:
+            self.busy[pool] = self.busy.get(pool, 0.0) + elapsed
+            for inner_stage, seconds in inner_times.items():
+                self._add_time(inner_stage, seconds)
+            self._add_time(stage, max(0.0, elapsed - sum(inner_times.values())))
+
+    def snapshot(self) -> Dict:
+        """当前指标的字典形式"""
+        with self._lock:
+            duration = time.perf_counter() - self._start
+            return {
+                "timestamp": self.started,
+                "duration_seconds": duration,
+                "stages": {
+                    stage: {"count": count, "seconds": seconds, "max_seconds": longest}
+                    for stage, (count, seconds, longest) in self.stages.items()
+                },
+                "counters": dict(self.counters),
+                "queues": {
+                    queue: {"mean_depth": total / samples, "max_depth": deepest}
+                    for queue, (samples, total, deepest) in self.queues.items()
+                },
+                "pools": {
+                    pool: {
+                        "workers": workers,
+                        "busy_seconds": self.busy.get(pool, 0.0),
+                        "utilization": self.busy.get(pool, 0.0) / (workers * duration) if duration > 0 else 0.0,
+                    }
+                    for pool, workers in self.workers.items()
+                },
+            }
+
+    def write_jsonl(self, path: str, labels: Optional[Dict[str, str]] = None):
+        """把本次运行的指标作为一行JSON追加到文件末尾"""
+        record = self.snapshot()
+        record["labels"] = labels or {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path: str, labels: Optional[Dict[str, str]] = None):
+        """
+        按Prometheus文本格式写出本次运行的指标
+
+        先写入临时文件再原子替换，textfile collector不会读到写了一半的文件。
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, help_text, samples):
+            full_name = f"{METRICS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} gauge")
+            for sample_labels, value in samples:
+                lines.append(f"{full_name}{_format_labels({**(labels or {}), **sample_labels})} {_format_value(value)}")
+
+        metric("run_timestamp_seconds", "Start time of the last run.", [({}, snapshot["timestamp"])])
+        metric("run_duration_seconds", "Wall time of the last run.", [({}, snapshot["duration_seconds"])])
+        stages = snapshot["stages"].items()
+        metric("stage_seconds", "Total time spent in each stage.",
+               [({"stage": stage}, entry["seconds"]) for stage, entry in stages])
+        metric("stage_calls", "Number of timed units in each stage.",
+               [({"stage": stage}, entry["count"]) for stage, entry in stages])
+        metric("stage_max_seconds", "Longest single unit in each stage.",
+               [({"stage": stage}, entry["max_seconds"]) for stage, entry in stages])
+        for name, value in sorted(snapshot["counters"].items()):
+            metric(name, f"Count of {name.replace('_', ' ')} in the last run.", [({}, value)])
+        queues = snapshot["queues"].items()
+        metric("queue_depth_mean", "Mean number of in-flight tasks per queue.",
+               [({"queue": queue}, entry["mean_depth"]) for queue, entry in queues])
+        metric("queue_depth_max", "Maximum number of in-flight tasks per queue.",
+               [({"queue": queue}, entry["max_depth"]) for queue, entry in queues])
+        pools = snapshot["pools"].items()
+        metric("pool_workers", "Worker threads or processes per pool.",
+               [({"pool": pool}, entry["workers"]) for pool, entry in pools])
+        metric("pool_busy_seconds", "Total task time per pool.",
+               [({"pool": pool}, entry["busy_seconds"]) for pool, entry in pools])
+        metric("pool_utilization", "Busy time divided by workers times run duration.",
+               [({"pool": pool}, entry["utilization"]) for pool, entry in pools])
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, path)
+
+
+def _format_value(value) -> str:
+    """整数原样输出，浮点数保留全部精度（时间戳按%g会丢失秒以下的部分）"""
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """按Prometheus文本格式生成标签，值中的反斜杠、引号和换行需要转义"""
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
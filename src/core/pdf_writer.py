@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式多页PDF输出
+
+二维码以矢量矩形路径写入（同一行中连续的黑色模块合并为一个矩形），
+或者以每个模块一个像素的1位图像蒙版写入，文件更小。
+标题使用PDF阅读器内置的STSong-Light中文字体，无需嵌入字体文件。
+每合成一页就立即写入文件，内存占用与页数无关，打印文件也比600 DPI的位图小得多。
+"""
+
+import zlib
+from typing import Dict, List, Optional
+
+from PIL import ImageColor
+
+from core.qr_matrix import PackedMatrix, module_runs, unpack_matrix
+
+# STSong-Light中ASCII字符（CID 1~95，对应U+0020~U+007E）的字宽，单位为千分之一字号，其余字符为全角
+_ASCII_WIDTHS = (
+    207, 270, 342, 467, 462, 797, 710, 239, 374, 374, 423, 605, 238, 375, 238, 334,
+    462, 462, 462, 462, 462, 462, 462, 462, 462, 462, 238, 238, 605, 605, 605, 344,
+    748, 684, 560, 695, 739, 563, 511, 729, 793, 318, 312, 666, 526, 896, 758, 772,
+    544, 772, 628, 465, 607, 753, 711, 972, 647, 620, 607, 374, 333, 374, 606, 500,
+    239, 417, 503, 427, 529, 415, 264, 444, 518, 241, 230, 495, 228, 793, 527, 524,
+    524, 504, 338, 336, 277, 517, 450, 652, 466, 452, 407, 370, 258, 370, 605,
+)
+
+# 标题字体：Adobe-GB1字符集的宋体，UTF-16编码，阅读器内置无需嵌入
+_TITLE_FONT_OBJECTS = (
+    b"<< /Type /Font /Subtype /Type0 /BaseFont /STSong-Light /Encoding /UniGB-UTF16-H "
+    b"/DescendantFonts [%d 0 R] >>",
+    b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /STSong-Light "
+    b"/CIDSystemInfo << /Registry (Adobe) /Ordering (GB1) /Supplement 4 >> "
+    b"/FontDescriptor %d 0 R /DW 1000 /W [1 [" + " ".join(map(str, _ASCII_WIDTHS)).encode('ascii') + b"]] >>",
+    b"<< /Type /FontDescriptor /FontName /STSong-Light /Flags 6 /FontBBox [-25 -254 1000 880] "
+    b"/ItalicAngle 0 /Ascent 880 /Descent -120 /CapHeight 880 /StemV 93 >>",
+)
+TITLE_FONT_ASCENT = 0.88
+
+
+def _number(value: float) -> bytes:
+    """把数值格式化为紧凑的PDF数字"""
+    text = f"{value:.3f}".rstrip('0').rstrip('.')
+    return (text if text not in ('', '-0') else '0').encode('ascii')
+
+
+def _color_operator(color) -> bytes:
+    """把颜色名称或RGB元组转换为PDF填充颜色操作符"""
+    r, g, b = ImageColor.getrgb(color)[:3] if isinstance(color, str) else color[:3]
+    if r == g == b:
+        return _number(r / 255) + b" g"
+    return b" ".join(_number(c / 255) for c in (r, g, b)) + b" rg"
+
+
+def title_width(title: str, font_size: float) -> float:
+    """按标题字体的字宽计算标题宽度（点）"""
+    return sum(
+        _ASCII_WIDTHS[ord(ch) - 0x20] if 0x20 <= ord(ch) < 0x7F else 1000 for ch in title
+    ) * font_size / 1000
+
+
+def title_operators(title: str, x: float, baseline: float, font_size: float, color) -> bytes:
+    """
+    生成绘制标题的内容流操作符
+
+    Args:
+        title (str): 标题文字
+        x (float): 起点横坐标（点）
+        baseline (float): 基线纵坐标（点，原点在页面左下角）
+        font_size (float): 字号（点）
+        color: 文字颜色
+
+    Returns:
+        bytes: 内容流片段
+    """
+    text = title.encode('utf-16-be').hex().upper().encode('ascii')
+    return b"".join((
+        _color_operator(color), b"\nBT /F1 ", _number(font_size), b" Tf ",
+        _number(x), b" ", _number(baseline), b" Td <", text, b"> Tj ET\n",
+    ))
+
+
+def qr_operators(matrix: PackedMatrix, x: float, top: float, width: float, height: float,
+                 border: int, color) -> bytes:
+    """
+    生成以矢量矩形绘制一个二维码的内容流操作符
+
+    坐标变换把一个模块映射为单位正方形，纵轴向下，
+    每行连续的黑色模块合并为一个矩形，整个二维码只需一次填充。
+
+    Args:
+        matrix (PackedMatrix): 压缩的模块矩阵（不含边框）
+        x (float): 二维码（含边框）左边缘横坐标（点）
+        top (float): 二维码（含边框）上边缘纵坐标（点，原点在页面左下角）
+        width (float): 二维码（含边框）宽度（点）
+        height (float): 二维码（含边框）高度（点）
+        border (int): 边框宽度，单位为模块
+        color: 模块颜色
+
+    Returns:
+        bytes: 内容流片段
+    """
+    total = matrix.size + 2 * border
+    rows, starts, lengths = module_runs(unpack_matrix(matrix))
+    rows += border
+    starts += border
+
+    parts = [
+        b"q ", _color_operator(color), b" ", _number(width / total), b" 0 0 ",
+        _number(-height / total), b" ", _number(x), b" ", _number(top), b" cm\n",
+    ]
+    parts.extend(b"%d %d %d 1 re\n" % item for item in zip(starts.tolist(), rows.tolist(), lengths.tolist()))
+    parts.append(b"f Q\n")
+    return b"".join(parts)
+
+
+def qr_image_operators(name: str, matrix: PackedMatrix, x: float, top: float, width: float, height: float,
+                       border: int, color) -> bytes:
+    """
+    生成以1位图像蒙版绘制一个二维码的内容流操作符，蒙版由PdfWriter.add_page写入
+
+    Args:
+        name (str): 图像蒙版在页面资源中的名称
+        matrix (PackedMatrix): 压缩的模块矩阵（不含边框）
+        x, top, width, height, border, color: 与qr_operators相同
+
+    Returns:
+        bytes: 内容流片段
+    """
+    total = matrix.size + 2 * border
+    module_width = width / total
+    module_height = height / total
+    # 边框为空白无需绘制，图像只覆盖模块区域
+    return b"".join((
+        b"q ", _color_operator(color), b" ", _number(module_width * matrix.size), b" 0 0 ",
+        _number(module_height * matrix.size), b" ", _number(x + module_width * border), b" ",
+        _number(top - module_height * (border + matrix.size)), b" cm /", name.encode('ascii'), b" Do Q\n",
+    ))
+
+
+class PdfWriter:
+    """
+    逐页写入的PDF文件
+
+    页面内容写入后即从内存释放，页面树、交叉引用表和文件尾在关闭时写出。
+    """
+
+    def __init__(self, path: str, page_width: float, page_height: float, title_font: bool = False):
+        """
+        Args:
+            path (str): 输出文件路径
+            page_width (float): 页面宽度（点）
+            page_height (float): 页面高度（点）
+            title_font (bool): 是否需要标题字体资源
+        """
+        self.path = path
+        self.page_size = (page_width, page_height)
+        self._file = open(path, 'wb')
+        self._offsets = {}
+        self._page_ids: List[int] = []
+        # 对象1为文档目录，对象2为页面树，均在关闭时写出
+        self._next_id = 3
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._font_id = None
+        if title_font:
+            self._font_id = self._next_id
+            ids = (self._font_id + 1, self._font_id + 2)
+            for template, ref in zip(_TITLE_FONT_OBJECTS, ids + (None,)):
+                self._write_object(self._reserve(), template % ref if ref else template)
+
+    def _reserve(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _write_object(self, obj_id: int, body: bytes, stream: bytes = None):
+        self._offsets[obj_id] = self._file.tell()
+        self._file.write(b"%d 0 obj\n" % obj_id)
+        self._file.write(body)
+        if stream is not None:
+            self._file.write(b"\nstream\n")
+            self._file.write(stream)
+            self._file.write(b"\nendstream")
+        self._file.write(b"\nendobj\n")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def _write_image_mask(self, matrix: PackedMatrix) -> int:
+        """写入二维码模块矩阵的1位图像蒙版，1表示用填充颜色绘制"""
+        data = zlib.compress(matrix.data, 6)
+        obj_id = self._reserve()
+        self._write_object(obj_id, b"".join((
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d " % (matrix.size, matrix.size),
+            b"/ImageMask true /BitsPerComponent 1 /Decode [1 0] /Length %d /Filter /FlateDecode >>" % len(data),
+        )), data)
+        return obj_id
+
+    def add_page(self, content: bytes, image_masks: Optional[Dict[str, PackedMatrix]] = None):
+        """
+        写入一页
+
+        Args:
+            content (bytes): 页面内容流（未压缩），写入时使用FlateDecode压缩
+            image_masks (Dict[str, PackedMatrix], optional): 内容流中按名称引用的二维码图像蒙版
+        """
+        resources = []
+        if self._font_id:
+            resources.append(b"/Font << /F1 %d 0 R >>" % self._font_id)
+        if image_masks:
+            refs = b" ".join(
+                b"/%s %d 0 R" % (name.encode('ascii'), self._write_image_mask(matrix))
+                for name, matrix in image_masks.items()
+            )
+            resources.append(b"/XObject << " + refs + b" >>")
+        resources = b"<< " + b" ".join(resources) + b" >>"
+
+        data = zlib.compress(content, 6)
+        content_id = self._reserve()
+        self._write_object(content_id, b"<< /Length %d /Filter /FlateDecode >>" % len(data), data)
+        page_id = self._reserve()
+        self._write_object(page_id, b"".join((
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 ", _number(self.page_size[0]), b" ",
+            _number(self.page_size[1]), b"] /Resources ", resources, b" /Contents %d 0 R >>" % content_id,
+        )))
+        self._page_ids.append(page_id)
+
+    def close(self):
+        """写出页面树、目录、交叉引用表和文件尾并关闭文件"""
+        if self._file.closed:
+            return
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._write_object(2, b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(self._page_ids))
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self._file.tell()
+        count = self._next_id
+        lines = [b"xref\n0 %d\n" % count, b"0000000000 65535 f \n"]
+        lines.extend(b"%010d 00000 n \n" % self._offsets[obj_id] for obj_id in range(1, count))
+        self._file.write(b"".join(lines))
+        self._file.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref_offset))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度统计
+
+以计数器累计已完成的批次和二维码数量，每完成一个任务只做常数次运算。
+进度回调和进度日志按时间间隔节流：无论任务多少，界面刷新和日志行数只取决于运行时长，
+不再每完成一个批次就回调和输出一次。
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from core.config import INFO_MESSAGES, PROGRESS_CALLBACK_INTERVAL, PROGRESS_LOG_INTERVAL
+
+
+class ProgressTracker:
+    """
+    线程安全的进度计数器
+
+    advance()可以在多个线程中调用，回调和日志在调用advance()的线程中执行，不持有内部锁。
+    """
+
+    def __init__(self, total: int, callback: Optional[Callable[[int], None]] = None,
+                 log: Optional[Callable[[str], None]] = None,
+                 callback_interval: float = PROGRESS_CALLBACK_INTERVAL,
+                 log_interval: float = PROGRESS_LOG_INTERVAL):
+        """
+        Args:
+            total (int): 批次总数
+            callback (callable, optional): 进度回调函数，参数为已完成的批次数
+            log (callable, optional): 日志函数，按间隔输出汇总的批次进度
+            callback_interval (float): 两次进度回调之间的最短间隔，单位秒
+            log_interval (float): 两次进度日志之间的最短间隔，单位秒
+        """
+        self.total = total
+        self.callback = callback
+        self.log = log
+        self.callback_interval = callback_interval
+        self.log_interval = log_interval
+        self.completed = 0  # 已完成的批次数
+        self.items = 0  # 已完成批次中的二维码数量
+        self.start_time = time.monotonic()
+        self._lock = threading.Lock()
+        self._last_callback = float('-inf')
+        # 上次输出日志时的时间和计数，日志中报告这段时间内完成的批次
+        self._last_log = self.start_time
+        self._logged_completed = 0
+        self._logged_items = 0
+
+    def advance(self, batches: int = 1, items: int = 0):
+        """
+        记录完成的批次，距上次回调或日志超过间隔时调用回调或输出一行汇总日志
+
+        Args:
+            batches (int): 完成的批次数
+            items (int): 这些批次中的二维码数量
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.completed += batches
+            self.items += items
+            completed = self.completed
+            notify = self.callback is not None and now - self._last_callback >= self.callback_interval
+            if notify:
+                self._last_callback = now
+            message = self._take_log_message(now) if now - self._last_log >= self.log_interval else None
+        if notify:
+            self.callback(completed)
+        if message:
+            self.log(message)
+
+    def _take_log_message(self, now: float) -> Optional[str]:
+        """生成上次日志以来的批次汇总并记下当前计数，须在持有锁时调用"""
+        if self.log is None or self.completed == self._logged_completed:
+            return None
+        elapsed = now - self._last_log
+        batches = self.completed - self._logged_completed
+        items = self.items - self._logged_items
+        message = INFO_MESSAGES["BATCH_PROGRESS"].format(
+            self.completed, self.total, batches, items, elapsed, items / elapsed if elapsed > 0 else 0.0
+        )
+        self._last_log = now
+        self._logged_completed = self.completed
+        self._logged_items = self.items
+        return message
+
+    def finish(self):
+        """输出剩余的批次汇总，并以最终的完成批次数调用一次回调"""
+        with self._lock:
+            completed = self.completed
+            message = self._take_log_message(time.monotonic())
+        if message:
+            self.log(message)
+        if self.callback is not None:
+            self.callback(completed)
+
+    @property
+    def elapsed(self) -> float:
+        """从创建到现在经过的秒数"""
+        return time.monotonic() - self.start_time
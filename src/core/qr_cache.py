@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨运行的二维码编码缓存
+
+以二维码内容和编码参数的摘要为键，把压缩的模块矩阵保存在SQLite数据库中。
+数据库位于用户目录下，命令行和图形界面共用同一份缓存，重新生成相同的数据时直接取出结果，无需再编码。
+缓存总大小超过上限时按最近使用时间淘汰最久未用的条目。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence
+
+from core.config import (
+    QR_VERSION, QR_ERROR_CORRECTION, QR_SEGMENTATION, QR_BOX_SIZE, QR_BORDER, QR_CACHE_PATH, QR_CACHE_MAX_MB
+)
+from core.qr_matrix import PackedMatrix
+
+# 积累到这么多条新结果或命中记录时写入一次数据库，避免每个二维码一次事务
+_FLUSH_THRESHOLD = 1000
+# 淘汰时清理到上限的这个比例以下，避免每次写入都触发淘汰
+_EVICT_TARGET = 0.9
+# 按键批量查询时每条语句的键数，低于旧版SQLite每条语句999个参数的限制
+_QUERY_BATCH = 500
+
+
+class QRCache:
+    """
+    以内容摘要为键的二维码模块矩阵缓存
+
+    可以在多个线程中使用，数据库连接在第一次使用时才打开。
+    """
+
+    def __init__(self, path: str = QR_CACHE_PATH, max_mb: float = QR_CACHE_MAX_MB):
+        """
+        Args:
+            path (str): 数据库文件路径
+            max_mb (float): 缓存的大小上限，单位MB
+        """
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        # 自创建以来的累计命中和未命中数，各次运行的命中情况由调用方分别统计
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._pending = {}  # 等待写入的新结果：键 -> 压缩的模块矩阵
+        self._used = set()  # 等待更新使用时间的命中键
+
+    @staticmethod
+    def key(payload: str) -> bytes:
+        """按二维码内容和影响编码结果的参数计算缓存键"""
+        params = f"{QR_VERSION}|{QR_ERROR_CORRECTION}|{QR_SEGMENTATION}|{QR_BOX_SIZE}|{QR_BORDER}|".encode('utf-8')
+        return hashlib.sha1(params + payload.encode('utf-8')).digest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # 命令行和图形界面可能同时使用缓存，写入时等待对方释放锁
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS qr_matrix "
+                "(key BLOB PRIMARY KEY, size INTEGER NOT NULL, data BLOB NOT NULL, used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS qr_matrix_used ON qr_matrix (used)")
+            # 总大小只在打开时统计一次，之后随写入和淘汰增减
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM qr_matrix").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, payloads: Sequence[str]) -> List[Optional[PackedMatrix]]:
+        """
+        批量查找二维码
+
+        Args:
+            payloads (Sequence[str]): 二维码内容列表
+
+        Returns:
+            List[Optional[PackedMatrix]]: 与输入一一对应的模块矩阵，未命中的位置为None
+        """
+        keys = [self.key(payload) for payload in payloads]
+        with self._lock:
+            found = {key: self._pending[key] for key in keys if key in self._pending}
+            missing = [key for key in keys if key not in found]
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._connect().execute(
+                    f"SELECT key, size, data FROM qr_matrix WHERE key IN ({placeholders})", missing
+                )
+                for key, size, data in rows:
+                    found[key] = PackedMatrix(size, data)
+                    self._used.add(key)
+            results = [found.get(key) for key in keys]
+            hits = sum(result is not None for result in results)
+            self.hits += hits
+            self.misses += len(results) - hits
+            if len(self._used) >= _FLUSH_THRESHOLD:
+                self._flush_locked()
+        return results
+
+    def put(self, payload: str, matrix: PackedMatrix):
+        """
+        保存新编码的二维码，积累到一定数量后批量写入
+
+        Args:
+            payload (str): 二维码内容
+            matrix (PackedMatrix): 压缩的模块矩阵
+        """
+        with self._lock:
+            self._pending[self.key(payload)] = matrix
+            if len(self._pending) >= _FLUSH_THRESHOLD:
+                self._flush_locked()
+
+    def flush(self):
+        """把积累的新结果和使用时间写入数据库，超过大小上限时淘汰最久未用的条目"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending and not self._used:
+            return
+        conn = self._connect()
+        now = time.time()
+        keys = list(self._pending)
+        with conn:
+            # 已有的键（其他进程写入过或淘汰前重新编码）被整行替换，总大小先减去旧数据
+            replaced = 0
+            for start in range(0, len(keys), _QUERY_BATCH):
+                batch = keys[start:start + _QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                replaced += conn.execute(
+                    f"SELECT COALESCE(SUM(LENGTH(data)), 0) FROM qr_matrix WHERE key IN ({placeholders})", batch
+                ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO qr_matrix (key, size, data, used) VALUES (?, ?, ?, ?)",
+                [(key, matrix.size, matrix.data, now) for key, matrix in self._pending.items()],
+            )
+            conn.executemany("UPDATE qr_matrix SET used = ? WHERE key = ?", [(now, key) for key in self._used])
+        self._total_bytes += sum(len(matrix.data) for matrix in self._pending.values()) - replaced
+        self._pending.clear()
+        self._used.clear()
+        self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """总大小超过上限时按使用时间从旧到新删除条目"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        excess = self._total_bytes - int(self.max_bytes * _EVICT_TARGET)
+        victims = []
+        for key, length in conn.execute("SELECT key, LENGTH(data) FROM qr_matrix ORDER BY used"):
+            victims.append((key,))
+            excess -= length
+            self._total_bytes -= length
+            if excess <= 0:
+                break
+        with conn:
+            conn.executemany("DELETE FROM qr_matrix WHERE key = ?", victims)
+
+    def close(self):
+        """写入积累的结果并关闭数据库连接"""
+        with self._lock:
+            if self._conn is None and not self._pending:
+                return
+            self._flush_locked()
+            self._conn.close()
+            self._conn = None
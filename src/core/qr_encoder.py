@@ -0,0 +1,899 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内置二维码编码器
+
+与qrcode库（7.x）的编码结果逐位一致：相同的版本选择、Reed-Solomon纠错码、
+数据排布和掩码选择规则，但针对批量编码做了优化：
+
+- GF(256)运算使用预先计算的对数/反对数表和乘法表
+- 每个版本和纠错级别的分块方式、生成多项式、功能图形和数据位坐标只计算一次
+- 同一版本的一批二维码一起计算纠错码，并用NumPy一次性评估全部8种掩码的罚分
+
+数据分段可选qrcode库的规则（连续至少20个字符才单独分为数字或字母数字段），或按位数最少分段：
+例如以";"连接的字母数字序列号，每个序列号单独作为字母数字段，只有分隔符按字节编码。
+qrcode库编码时也按segment()给出的分段写入，两种编码器的结果保持一致。
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from core.config import QR_VERSION, QR_ERROR_CORRECTION, QR_SEGMENTATION, QR_SEGMENTATIONS
+
+# 纠错级别，数值与qrcode库的常量保持一致
+ERROR_CORRECT_L = 1
+ERROR_CORRECT_M = 0
+ERROR_CORRECT_Q = 3
+ERROR_CORRECT_H = 2
+
+# 数据模式
+MODE_NUMBER = 1
+MODE_ALPHA_NUM = 2
+MODE_8BIT_BYTE = 4
+
+ALPHA_NUM = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+
+# 与qrcode.QRCode.add_data的默认值一致：连续至少20个字符才单独分为数字或字母数字段
+OPTIMIZE_MINIMUM = 20
+
+# 每批评估掩码时最多同时处理的模块数，避免大版本二维码占用过多内存
+_MAX_BATCH_MODULES = 1 << 22
+
+_RS_BLOCK_OFFSET = {ERROR_CORRECT_L: 0, ERROR_CORRECT_M: 1, ERROR_CORRECT_Q: 2, ERROR_CORRECT_H: 3}
+
+# 每个版本按L、M、Q、H顺序排列的分块表：(块数, 总码字数, 数据码字数)，可能有两组
+_RS_BLOCK_TABLE = (
+    (1, 26, 19), (1, 26, 16), (1, 26, 13), (1, 26, 9),  # 1
+    (1, 44, 34), (1, 44, 28), (1, 44, 22), (1, 44, 16),  # 2
+    (1, 70, 55), (1, 70, 44), (2, 35, 17), (2, 35, 13),  # 3
+    (1, 100, 80), (2, 50, 32), (2, 50, 24), (4, 25, 9),  # 4
+    (1, 134, 108), (2, 67, 43), (2, 33, 15, 2, 34, 16), (2, 33, 11, 2, 34, 12),  # 5
+    (2, 86, 68), (4, 43, 27), (4, 43, 19), (4, 43, 15),  # 6
+    (2, 98, 78), (4, 49, 31), (2, 32, 14, 4, 33, 15), (4, 39, 13, 1, 40, 14),  # 7
+    (2, 121, 97), (2, 60, 38, 2, 61, 39), (4, 40, 18, 2, 41, 19), (4, 40, 14, 2, 41, 15),  # 8
+    (2, 146, 116), (3, 58, 36, 2, 59, 37), (4, 36, 16, 4, 37, 17), (4, 36, 12, 4, 37, 13),  # 9
+    (2, 86, 68, 2, 87, 69), (4, 69, 43, 1, 70, 44), (6, 43, 19, 2, 44, 20), (6, 43, 15, 2, 44, 16),  # 10
+    (4, 101, 81), (1, 80, 50, 4, 81, 51), (4, 50, 22, 4, 51, 23), (3, 36, 12, 8, 37, 13),  # 11
+    (2, 116, 92, 2, 117, 93), (6, 58, 36, 2, 59, 37), (4, 46, 20, 6, 47, 21), (7, 42, 14, 4, 43, 15),  # 12
+    (4, 133, 107), (8, 59, 37, 1, 60, 38), (8, 44, 20, 4, 45, 21), (12, 33, 11, 4, 34, 12),  # 13
+    (3, 145, 115, 1, 146, 116), (4, 64, 40, 5, 65, 41), (11, 36, 16, 5, 37, 17), (11, 36, 12, 5, 37, 13),  # 14
+    (5, 109, 87, 1, 110, 88), (5, 65, 41, 5, 66, 42), (5, 54, 24, 7, 55, 25), (11, 36, 12, 7, 37, 13),  # 15
+    (5, 122, 98, 1, 123, 99), (7, 73, 45, 3, 74, 46), (15, 43, 19, 2, 44, 20), (3, 45, 15, 13, 46, 16),  # 16
+    (1, 135, 107, 5, 136, 108), (10, 74, 46, 1, 75, 47), (1, 50, 22, 15, 51, 23), (2, 42, 14, 17, 43, 15),  # 17
+    (5, 150, 120, 1, 151, 121), (9, 69, 43, 4, 70, 44), (17, 50, 22, 1, 51, 23), (2, 42, 14, 19, 43, 15),  # 18
+    (3, 141, 113, 4, 142, 114), (3, 70, 44, 11, 71, 45), (17, 47, 21, 4, 48, 22), (9, 39, 13, 16, 40, 14),  # 19
+    (3, 135, 107, 5, 136, 108), (3, 67, 41, 13, 68, 42), (15, 54, 24, 5, 55, 25), (15, 43, 15, 10, 44, 16),  # 20
+    (4, 144, 116, 4, 145, 117), (17, 68, 42), (17, 50, 22, 6, 51, 23), (19, 46, 16, 6, 47, 17),  # 21
+    (2, 139, 111, 7, 140, 112), (17, 74, 46), (7, 54, 24, 16, 55, 25), (34, 37, 13),  # 22
+    (4, 151, 121, 5, 152, 122), (4, 75, 47, 14, 76, 48), (11, 54, 24, 14, 55, 25), (16, 45, 15, 14, 46, 16),  # 23
+    (6, 147, 117, 4, 148, 118), (6, 73, 45, 14, 74, 46), (11, 54, 24, 16, 55, 25), (30, 46, 16, 2, 47, 17),  # 24
+    (8, 132, 106, 4, 133, 107), (8, 75, 47, 13, 76, 48), (7, 54, 24, 22, 55, 25), (22, 45, 15, 13, 46, 16),  # 25
+    (10, 142, 114, 2, 143, 115), (19, 74, 46, 4, 75, 47), (28, 50, 22, 6, 51, 23), (33, 46, 16, 4, 47, 17),  # 26
+    (8, 152, 122, 4, 153, 123), (22, 73, 45, 3, 74, 46), (8, 53, 23, 26, 54, 24), (12, 45, 15, 28, 46, 16),  # 27
+    (3, 147, 117, 10, 148, 118), (3, 73, 45, 23, 74, 46), (4, 54, 24, 31, 55, 25), (11, 45, 15, 31, 46, 16),  # 28
+    (7, 146, 116, 7, 147, 117), (21, 73, 45, 7, 74, 46), (1, 53, 23, 37, 54, 24), (19, 45, 15, 26, 46, 16),  # 29
+    (5, 145, 115, 10, 146, 116), (19, 75, 47, 10, 76, 48), (15, 54, 24, 25, 55, 25), (23, 45, 15, 25, 46, 16),  # 30
+    (13, 145, 115, 3, 146, 116), (2, 74, 46, 29, 75, 47), (42, 54, 24, 1, 55, 25), (23, 45, 15, 28, 46, 16),  # 31
+    (17, 145, 115), (10, 74, 46, 23, 75, 47), (10, 54, 24, 35, 55, 25), (19, 45, 15, 35, 46, 16),  # 32
+    (17, 145, 115, 1, 146, 116), (14, 74, 46, 21, 75, 47), (29, 54, 24, 19, 55, 25), (11, 45, 15, 46, 46, 16),  # 33
+    (13, 145, 115, 6, 146, 116), (14, 74, 46, 23, 75, 47), (44, 54, 24, 7, 55, 25), (59, 46, 16, 1, 47, 17),  # 34
+    (12, 151, 121, 7, 152, 122), (12, 75, 47, 26, 76, 48), (39, 54, 24, 14, 55, 25), (22, 45, 15, 41, 46, 16),  # 35
+    (6, 151, 121, 14, 152, 122), (6, 75, 47, 34, 76, 48), (46, 54, 24, 10, 55, 25), (2, 45, 15, 64, 46, 16),  # 36
+    (17, 152, 122, 4, 153, 123), (29, 74, 46, 14, 75, 47), (49, 54, 24, 10, 55, 25), (24, 45, 15, 46, 46, 16),  # 37
+    (4, 152, 122, 18, 153, 123), (13, 74, 46, 32, 75, 47), (48, 54, 24, 14, 55, 25), (42, 45, 15, 32, 46, 16),  # 38
+    (20, 147, 117, 4, 148, 118), (40, 75, 47, 7, 76, 48), (43, 54, 24, 22, 55, 25), (10, 45, 15, 67, 46, 16),  # 39
+    (19, 148, 118, 6, 149, 119), (18, 75, 47, 31, 76, 48), (34, 54, 24, 34, 55, 25), (20, 45, 15, 61, 46, 16),  # 40
+)
+
+# 每个版本的校正图形中心坐标
+_PATTERN_POSITION_TABLE = (
+    (), (6, 18), (6, 22), (6, 26), (6, 30), (6, 34), (6, 22, 38), (6, 24, 42), (6, 26, 46), (6, 28, 50),
+    (6, 30, 54), (6, 32, 58), (6, 34, 62), (6, 26, 46, 66), (6, 26, 48, 70), (6, 26, 50, 74),
+    (6, 30, 54, 78), (6, 30, 56, 82), (6, 30, 58, 86), (6, 34, 62, 90), (6, 28, 50, 72, 94),
+    (6, 26, 50, 74, 98), (6, 30, 54, 78, 102), (6, 28, 54, 80, 106), (6, 32, 58, 84, 110),
+    (6, 30, 58, 86, 114), (6, 34, 62, 90, 118), (6, 26, 50, 74, 98, 122), (6, 30, 54, 78, 102, 126),
+    (6, 26, 52, 78, 104, 130), (6, 30, 56, 82, 108, 134), (6, 34, 60, 86, 112, 138),
+    (6, 30, 58, 86, 114, 142), (6, 34, 62, 90, 118, 146), (6, 30, 54, 78, 102, 126, 150),
+    (6, 24, 50, 76, 102, 128, 154), (6, 28, 54, 80, 106, 132, 158), (6, 32, 58, 84, 110, 136, 162),
+    (6, 26, 54, 82, 110, 138, 166), (6, 30, 58, 86, 114, 142, 170),
+)
+
+# 字符计数指示符的位数，按版本分为1-9、10-26、27-40三档
+_MODE_SIZE_SMALL = {MODE_NUMBER: 10, MODE_ALPHA_NUM: 9, MODE_8BIT_BYTE: 8}
+_MODE_SIZE_MEDIUM = {MODE_NUMBER: 12, MODE_ALPHA_NUM: 11, MODE_8BIT_BYTE: 16}
+_MODE_SIZE_LARGE = {MODE_NUMBER: 14, MODE_ALPHA_NUM: 13, MODE_8BIT_BYTE: 16}
+
+# 数字模式下1~3位数字对应的位数
+_NUMBER_LENGTH = {3: 10, 2: 7, 1: 4}
+
+_PAD0 = 0xEC
+_PAD1 = 0x11
+
+_G15 = 0b10100110111
+_G18 = 0b1111100100101
+_G15_MASK = 0b101010000010010
+
+_NUM_RE = re.compile(rb"\d{%d,}" % OPTIMIZE_MINIMUM)
+_ALPHA_RE = re.compile(b"[" + re.escape(ALPHA_NUM) + b"]{%d,}" % OPTIMIZE_MINIMUM)
+_NUM_FULL_RE = re.compile(rb"^\d+$")
+_ALPHA_FULL_RE = re.compile(b"^[" + re.escape(ALPHA_NUM) + b"]+$")
+# 按位数最少分段时先把数据切分为字母数字字符和其他字节的连续片段，再从字母数字片段中找出较长的数字串
+_ALPHA_RUN_RE = re.compile(b"[" + re.escape(ALPHA_NUM) + b"]+|[^" + re.escape(ALPHA_NUM) + b"]+")
+# 紧邻其他字母数字字符的数字不超过3位时，单独成段的段头开销总是大于节省的位数，留在字母数字片段中
+_LONG_NUMBER_RE = re.compile(rb"\d{4,}")
+# 动态规划中的模式下标：0数字、1字母数字、2字节；每个字符的位数以1/6位为单位
+# （字母数字每2个字符11位，数字每3个字符10位）
+_DP_MODES = (MODE_NUMBER, MODE_ALPHA_NUM, MODE_8BIT_BYTE)
+_DP_CHAR_COST = (20, 33, 48)
+# 数字段和字母数字段凑不满3个或2个字符时最多多出2/3位，每段多计4/6位，使估算的代价不小于实际位数
+_DP_ROUNDING = (4, 4, 0)
+
+
+class DataOverflowError(ValueError):
+    """数据超出最大版本（40）的容量"""
+
+
+# ---- GF(256) 运算表 ----
+
+def _build_gf_tables() -> Tuple[List[int], List[int], np.ndarray]:
+    """生成GF(256)的反对数表、对数表和乘法表（本原多项式x^8+x^4+x^3+x^2+1）"""
+    exp = [0] * 512
+    log = [0] * 256
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= 0x11D
+    for i in range(255, 512):
+        exp[i] = exp[i - 255]
+    mul = np.zeros((256, 256), dtype=np.uint8)
+    log_arr = np.array(log)
+    exp_arr = np.array(exp, dtype=np.uint8)
+    mul[1:, 1:] = exp_arr[log_arr[1:, None] + log_arr[None, 1:]]
+    return exp, log, mul
+
+
+_GF_EXP, _GF_LOG, _GF_MUL = _build_gf_tables()
+
+
+@lru_cache(maxsize=None)
+def _generator_polynomial(ec_count: int) -> np.ndarray:
+    """纠错码字数为ec_count的生成多项式系数（首项系数1省略，高次在前）"""
+    poly = [1]
+    for i in range(ec_count):
+        # 乘以 (x - α^i)
+        root = _GF_EXP[i]
+        nxt = poly + [0]
+        for j, coef in enumerate(poly):
+            if coef:
+                nxt[j + 1] ^= _GF_EXP[_GF_LOG[coef] + _GF_LOG[root]]
+        poly = nxt
+    return np.array(poly[1:], dtype=np.uint8)
+
+
+def _rs_remainder(data: np.ndarray, generator: np.ndarray) -> np.ndarray:
+    """
+    批量计算Reed-Solomon纠错码字
+
+    Args:
+        data (np.ndarray): (块数, 数据码字数)的uint8数组
+        generator (np.ndarray): 生成多项式系数
+
+    Returns:
+        np.ndarray: (块数, 纠错码字数)的uint8数组
+    """
+    remainder = np.zeros((data.shape[0], len(generator)), dtype=np.uint8)
+    for i in range(data.shape[1]):
+        factor = data[:, i] ^ remainder[:, 0]
+        remainder[:, :-1] = remainder[:, 1:]
+        remainder[:, -1] = 0
+        remainder ^= _GF_MUL[factor[:, None], generator[None, :]]
+    return remainder
+
+
+# ---- 按版本和纠错级别缓存的结构信息 ----
+
+def _mode_sizes(version: int) -> Dict[int, int]:
+    """字符计数指示符位数表，相同档位返回同一个对象"""
+    if version < 10:
+        return _MODE_SIZE_SMALL
+    if version < 27:
+        return _MODE_SIZE_MEDIUM
+    return _MODE_SIZE_LARGE
+
+
+@lru_cache(maxsize=None)
+def _rs_blocks(version: int, ecc: int) -> Tuple[Tuple[int, int], ...]:
+    """返回每个块的(总码字数, 数据码字数)"""
+    entry = _RS_BLOCK_TABLE[(version - 1) * 4 + _RS_BLOCK_OFFSET[ecc]]
+    blocks = []
+    for i in range(0, len(entry), 3):
+        count, total_count, data_count = entry[i:i + 3]
+        blocks.extend([(total_count, data_count)] * count)
+    return tuple(blocks)
+
+
+@lru_cache(maxsize=None)
+def _bit_limits(ecc: int) -> Tuple[int, ...]:
+    """各版本可容纳的数据位数，下标为版本号（下标0占位）"""
+    return (0,) + tuple(
+        sum(data_count * 8 for _, data_count in _rs_blocks(version, ecc))
+        for version in range(1, 41)
+    )
+
+
+@lru_cache(maxsize=None)
+def _codeword_layout(version: int, ecc: int):
+    """
+    缓存纠错编码和交织所需的信息
+
+    Returns:
+        Tuple: (数据码字总数, 按数据码字数分组的块列表[(数据码字数, 各块起始位置, 生成多项式)],
+                交织顺序下标数组)
+    """
+    blocks = _rs_blocks(version, ecc)
+    data_total = sum(data_count for _, data_count in blocks)
+    ec_count = blocks[0][0] - blocks[0][1]
+    generator = _generator_polynomial(ec_count)
+
+    groups: Dict[int, List[int]] = {}
+    offset = 0
+    for _, data_count in blocks:
+        groups.setdefault(data_count, []).append(offset)
+        offset += data_count
+    block_groups = [(data_count, offsets, generator) for data_count, offsets in groups.items()]
+
+    # 纠错码字按块依次放在数据码字之后，再按qrcode的顺序交织
+    dc_index = []
+    ec_index = []
+    offset = 0
+    for block_no, (_, data_count) in enumerate(blocks):
+        dc_index.append(list(range(offset, offset + data_count)))
+        ec_start = data_total + block_no * ec_count
+        ec_index.append(list(range(ec_start, ec_start + ec_count)))
+        offset += data_count
+    order = []
+    for i in range(max(len(dc) for dc in dc_index)):
+        order.extend(dc[i] for dc in dc_index if i < len(dc))
+    for i in range(ec_count):
+        order.extend(ec[i] for ec in ec_index)
+    return data_total, ec_count, block_groups, np.array(order, dtype=np.intp)
+
+
+def _bch_digit(data: int) -> int:
+    return data.bit_length()
+
+
+def _bch_type_info(data: int) -> int:
+    d = data << 10
+    while _bch_digit(d) - _bch_digit(_G15) >= 0:
+        d ^= _G15 << (_bch_digit(d) - _bch_digit(_G15))
+    return ((data << 10) | d) ^ _G15_MASK
+
+
+def _bch_type_number(data: int) -> int:
+    d = data << 12
+    while _bch_digit(d) - _bch_digit(_G18) >= 0:
+        d ^= _G18 << (_bch_digit(d) - _bch_digit(_G18))
+    return (data << 12) | d
+
+
+def _type_info_positions(count: int) -> List[Tuple[int, int]]:
+    """格式信息15位依次对应的模块坐标，竖向和横向各一份"""
+    vertical = []
+    horizontal = []
+    for i in range(15):
+        if i < 6:
+            vertical.append((i, 8))
+        elif i < 8:
+            vertical.append((i + 1, 8))
+        else:
+            vertical.append((count - 15 + i, 8))
+        if i < 8:
+            horizontal.append((8, count - i - 1))
+        elif i < 9:
+            horizontal.append((8, 15 - i))
+        else:
+            horizontal.append((8, 15 - i - 1))
+    return vertical + horizontal
+
+
+def _type_number_positions(count: int) -> List[Tuple[int, int]]:
+    """版本信息18位依次对应的模块坐标，两份"""
+    first = [(i // 3, i % 3 + count - 11) for i in range(18)]
+    second = [(i % 3 + count - 11, i // 3) for i in range(18)]
+    return first + second
+
+
+def _mask_patterns(count: int) -> np.ndarray:
+    """8种掩码在整个矩阵上的取值，形状为(8, count, count)"""
+    i, j = np.indices((count, count))
+    return np.stack([
+        (i + j) % 2 == 0,
+        i % 2 == 0,
+        j % 3 == 0,
+        (i + j) % 3 == 0,
+        (i // 2 + j // 3) % 2 == 0,
+        (i * j) % 2 + (i * j) % 3 == 0,
+        ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+        ((i * j) % 3 + (i + j) % 2) % 2 == 0,
+    ])
+
+
+@lru_cache(maxsize=None)
+def _version_template(version: int):
+    """
+    缓存版本相关的固定结构
+
+    Returns:
+        Tuple: (功能图形矩阵（格式信息和版本信息为浅色，即掩码评估时的状态）,
+                数据位的行坐标, 数据位的列坐标, 数据位上的8种掩码取值,
+                格式信息坐标, 版本信息坐标)
+    """
+    count = version * 4 + 17
+    modules = [[None] * count for _ in range(count)]
+
+    # 位置探测图形及分隔符
+    for row, col in ((0, 0), (count - 7, 0), (0, count - 7)):
+        for r in range(-1, 8):
+            if row + r <= -1 or count <= row + r:
+                continue
+            for c in range(-1, 8):
+                if col + c <= -1 or count <= col + c:
+                    continue
+                modules[row + r][col + c] = (
+                    (0 <= r <= 6 and c in {0, 6})
+                    or (0 <= c <= 6 and r in {0, 6})
+                    or (2 <= r <= 4 and 2 <= c <= 4)
+                )
+
+    # 校正图形，与已有图形重叠的位置跳过
+    positions = _PATTERN_POSITION_TABLE[version - 1]
+    for row in positions:
+        for col in positions:
+            if modules[row][col] is not None:
+                continue
+            for r in range(-2, 3):
+                for c in range(-2, 3):
+                    modules[row + r][col + c] = (
+                        r == -2 or r == 2 or c == -2 or c == 2 or (r == 0 and c == 0)
+                    )
+
+    # 定位图形
+    for r in range(8, count - 8):
+        if modules[r][6] is None:
+            modules[r][6] = r % 2 == 0
+    for c in range(8, count - 8):
+        if modules[6][c] is None:
+            modules[6][c] = c % 2 == 0
+
+    # 格式信息、固定深色模块和版本信息先占位
+    type_info = _type_info_positions(count)
+    for r, c in type_info:
+        modules[r][c] = False
+    modules[count - 8][8] = False
+    type_number = _type_number_positions(count) if version >= 7 else []
+    for r, c in type_number:
+        modules[r][c] = False
+
+    # 按之字形顺序收集数据位坐标
+    rows = []
+    cols = []
+    inc = -1
+    row = count - 1
+    for col in range(count - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        while True:
+            for c in (col, col - 1):
+                if modules[row][c] is None:
+                    rows.append(row)
+                    cols.append(c)
+            row += inc
+            if row < 0 or count <= row:
+                row -= inc
+                inc = -inc
+                break
+
+    base = np.array([[bool(m) for m in line] for line in modules], dtype=bool)
+    rows = np.array(rows, dtype=np.intp)
+    cols = np.array(cols, dtype=np.intp)
+    masks = _mask_patterns(count)[:, rows, cols]
+    return base, rows, cols, masks, type_info, type_number
+
+
+# ---- 数据分段与编码 ----
+
+def _split(data: bytes, pattern) -> List[Tuple[bool, bytes]]:
+    parts = []
+    while data:
+        match = pattern.search(data)
+        if not match:
+            break
+        start, end = match.start(), match.end()
+        if start:
+            parts.append((False, data[:start]))
+        parts.append((True, data[start:end]))
+        data = data[end:]
+    if data:
+        parts.append((False, data))
+    return parts
+
+
+def _segments(data: bytes) -> List[Tuple[int, bytes]]:
+    """按qrcode的optimal_data_chunks规则把数据分为数字、字母数字和字节段"""
+    if len(data) <= OPTIMIZE_MINIMUM:
+        num_pattern, alpha_pattern = _NUM_FULL_RE, _ALPHA_FULL_RE
+    else:
+        num_pattern, alpha_pattern = _NUM_RE, _ALPHA_RE
+    segments = []
+    for is_num, chunk in _split(data, num_pattern):
+        if is_num:
+            segments.append((MODE_NUMBER, chunk))
+        else:
+            for is_alpha, sub_chunk in _split(chunk, alpha_pattern):
+                segments.append((MODE_ALPHA_NUM if is_alpha else MODE_8BIT_BYTE, sub_chunk))
+    return segments
+
+
+def _runs(data: bytes) -> List[Tuple[int, int, int]]:
+    """
+    把数据切分为(最小可用模式的下标, 起始位置, 结束位置)的连续片段
+
+    全部为数字的字母数字片段和其中至少4位的数字串可以使用数字模式，其余字母数字字符可以使用字母数字模式，
+    其他字节只能使用字节模式。
+    """
+    runs = []
+    for match in _ALPHA_RUN_RE.finditer(data):
+        start, end = match.span()
+        if data[start] not in ALPHA_NUM:
+            runs.append((2, start, end))
+        elif match.group().isdigit():
+            runs.append((0, start, end))
+        else:
+            pos = start
+            for number in _LONG_NUMBER_RE.finditer(data, start, end):
+                if number.start() > pos:
+                    runs.append((1, pos, number.start()))
+                runs.append((0, number.start(), number.end()))
+                pos = number.end()
+            if pos < end:
+                runs.append((1, pos, end))
+    return runs
+
+
+def _optimal_plan(data: bytes, mode_sizes: Dict[int, int]) -> Tuple[List[Tuple[int, int, int]], int]:
+    """
+    以片段为单位做动态规划，返回代价最小的分段[(模式, 起始位置, 结束位置)]和代价（以1/6位为单位）
+
+    每个片段选择一种可用的模式，模式变化时计入新段的模式和字符计数指示符。同类字符的片段内改变模式
+    不会更省，因此结果也是逐字符分段中代价最小的，片段数通常只有字符数的几分之一。
+    """
+    runs = _runs(data)
+    header = tuple((4 + mode_sizes[mode]) * 6 + rounding for mode, rounding in zip(_DP_MODES, _DP_ROUNDING))
+    inf = float('inf')
+    # costs[i]：到当前片段为止、以模式i结束的最小代价；choices中记录每个片段各模式的上一个模式
+    costs = None
+    choices = []
+    for min_mode, start, end in runs:
+        count = end - start
+        step = [inf, inf, inf]
+        previous = [0, 0, 0]
+        for i in range(min_mode, 3):
+            if costs is None:
+                best, best_prev = header[i], i
+            else:
+                best_prev = i
+                best = costs[i]
+                switch = header[i]
+                for j in range(3):
+                    if j != i and costs[j] + switch < best:
+                        best, best_prev = costs[j] + switch, j
+            step[i] = best + count * _DP_CHAR_COST[i]
+            previous[i] = best_prev
+        costs = step
+        choices.append(previous)
+
+    cost = min(costs)
+    index = costs.index(cost)
+    modes = []
+    for previous in reversed(choices):
+        modes.append(index)
+        index = previous[index]
+    modes.reverse()
+
+    segments = []
+    for (_, start, end), index in zip(runs, modes):
+        mode = _DP_MODES[index]
+        if segments and segments[-1][0] == mode:
+            segments[-1] = (mode, segments[-1][1], end)
+        else:
+            segments.append((mode, start, end))
+    return segments, cost
+
+
+def _optimal_segments(data: bytes, mode_sizes: Dict[int, int]) -> List[Tuple[int, bytes]]:
+    """
+    按位数最少的原则把数据分为数字、字母数字和字节段，结果不会比整段按字节模式编码更长
+
+    含非ASCII字符（如中文）时整段按字节模式编码：没有ECI声明的混合分段中，
+    部分扫码器按ISO-8859-1解读字节段，UTF-8内容会解码失败或乱码。
+    """
+    if not data:
+        return []
+    if not data.isascii():
+        return [(MODE_8BIT_BYTE, data)]
+    segments, _ = _optimal_plan(data, mode_sizes)
+    bits = sum(4 + mode_sizes[mode] + _segment_length(mode, end - start) for mode, start, end in segments)
+    if len(segments) > 1 and bits > 4 + mode_sizes[MODE_8BIT_BYTE] + 8 * len(data):
+        return [(MODE_8BIT_BYTE, data)]
+    return [(mode, data[start:end]) for mode, start, end in segments]
+
+
+def _segment_bits(mode: int, chunk: bytes) -> Tuple[int, int]:
+    """把一段数据编码为(整数形式的位串, 位数)，不含模式和字符计数指示符"""
+    value = 0
+    length = 0
+    if mode == MODE_NUMBER:
+        for i in range(0, len(chunk), 3):
+            chars = chunk[i:i + 3]
+            bits = _NUMBER_LENGTH[len(chars)]
+            value = (value << bits) | int(chars)
+            length += bits
+    elif mode == MODE_ALPHA_NUM:
+        for i in range(0, len(chunk), 2):
+            chars = chunk[i:i + 2]
+            if len(chars) > 1:
+                value = (value << 11) | (ALPHA_NUM.find(chars[0]) * 45 + ALPHA_NUM.find(chars[1]))
+                length += 11
+            else:
+                value = (value << 6) | ALPHA_NUM.find(chars)
+                length += 6
+    else:
+        value = int.from_bytes(chunk, 'big')
+        length = 8 * len(chunk)
+    return value, length
+
+
+def _segment_length(mode: int, count: int) -> int:
+    """一段数据编码后的位数，不含模式和字符计数指示符"""
+    if mode == MODE_NUMBER:
+        return 10 * (count // 3) + _NUMBER_LENGTH.get(count % 3, 0)
+    if mode == MODE_ALPHA_NUM:
+        return 11 * (count // 2) + 6 * (count % 2)
+    return 8 * count
+
+
+def _best_fit(segments, ecc: int, start: int) -> int:
+    """按qrcode.QRCode.best_fit的规则选择能容纳数据的最小版本"""
+    limits = _bit_limits(ecc)
+    while True:
+        mode_sizes = _mode_sizes(start)
+        needed_bits = sum(4 + mode_sizes[mode] + bits for mode, count, _, bits in segments)
+        version = start
+        while version < 41 and limits[version] < needed_bits:
+            version += 1
+        if version == 41:
+            raise DataOverflowError(f"数据长度超出二维码容量: {needed_bits}位")
+        if _mode_sizes(version) is mode_sizes:
+            return version
+        start = version
+
+
+def _data_codewords(segments, version: int, ecc: int) -> bytes:
+    """组装数据位流，添加终止符和填充码字，返回全部数据码字"""
+    mode_sizes = _mode_sizes(version)
+    value = 0
+    length = 0
+    for mode, count, seg_value, seg_bits in segments:
+        value = (value << 4) | mode
+        value = (value << mode_sizes[mode]) | count
+        value = (value << seg_bits) | seg_value
+        length += 4 + mode_sizes[mode] + seg_bits
+
+    bit_limit = _bit_limits(ecc)[version]
+    # 终止符最多4个0，再补齐到整字节
+    pad = min(bit_limit - length, 4)
+    pad += (-(length + pad)) % 8
+    value <<= pad
+    length += pad
+
+    codewords = value.to_bytes(length // 8, 'big')
+    fill = (bit_limit - length) // 8
+    return codewords + (bytes((_PAD0, _PAD1)) * ((fill + 1) // 2))[:fill]
+
+
+def _fit_segments(raw: bytes, ecc: int, version: int, segmentation: str) -> Tuple[int, List[Tuple[int, bytes]]]:
+    """
+    分段并选择版本，返回(版本, [(模式, 数据)])
+
+    按位数最少分段时，分段结果与字符计数指示符的位数有关：逐个档位（1~9、10~26、27~40）
+    按该档位的位数分段，在档位内选择能容纳数据的最小版本，放不下时从下一档位的第一个版本重新分段。
+    数据在较小档位的分段下可能超出版本40的容量，而按27~40档位分段时恰好放得下，
+    因此只有最后一个档位也放不下时才报告超出容量。
+    """
+    if segmentation == "qrcode":
+        chunks = _segments(raw)
+        segments = [(mode, len(chunk)) + _segment_bits(mode, chunk) for mode, chunk in chunks]
+        return _best_fit(segments, ecc, version), chunks
+    limits = _bit_limits(ecc)
+    while True:
+        mode_sizes = _mode_sizes(version)
+        last = 9 if version < 10 else 26 if version < 27 else 40
+        # 每个字符至少占10/3位（数字模式），按此计算都超出档位内最大版本的容量时不必分段
+        if last < 40 and 4 + min(mode_sizes.values()) + -(-len(raw) * 10 // 3) > limits[last]:
+            version = last + 1
+            continue
+        chunks = _optimal_segments(raw, mode_sizes)
+        needed_bits = sum(4 + mode_sizes[mode] + _segment_length(mode, len(chunk)) for mode, chunk in chunks)
+        for fitted in range(version, last + 1):
+            if limits[fitted] >= needed_bits:
+                return fitted, chunks
+        if last == 40:
+            raise DataOverflowError(f"数据长度超出二维码容量: {needed_bits}位")
+        version = last + 1
+
+
+def segment(data: str, ecc: int = QR_ERROR_CORRECTION, version: int = QR_VERSION,
+            segmentation: str = QR_SEGMENTATION) -> Tuple[int, List[Tuple[int, bytes]]]:
+    """
+    按分段方式把数据分段并选择能容纳它的最小版本
+
+    Args:
+        data (str): 二维码中包含的数据
+        ecc (int): 纠错级别
+        version (int): 最小版本
+        segmentation (str): "optimal"按位数最少分段，"qrcode"沿用qrcode库的规则
+
+    Returns:
+        Tuple[int, List[Tuple[int, bytes]]]: (版本, [(模式, UTF-8编码的数据)])
+    """
+    if segmentation not in QR_SEGMENTATIONS:
+        raise ValueError(f"无效的分段方式: {segmentation}")
+    raw = data if isinstance(data, bytes) else str(data).encode('utf-8')
+    return _fit_segments(raw, ecc, version, segmentation)
+
+
+def _prepare(data: str, ecc: int, version: int, segmentation: str = QR_SEGMENTATION) -> Tuple[int, bytes]:
+    """对单个字符串完成分段和版本选择，返回(版本, 数据码字)"""
+    raw = data if isinstance(data, bytes) else str(data).encode('utf-8')
+    fitted, chunks = _fit_segments(raw, ecc, version, segmentation)
+    segments = [(mode, len(chunk)) + _segment_bits(mode, chunk) for mode, chunk in chunks]
+    return fitted, _data_codewords(segments, fitted, ecc)
+
+
+def payload_bits(data: str, version: int, segmentation: str = QR_SEGMENTATION) -> int:
+    """
+    按编码器的分段规则计算数据在指定版本下需要的位数，包含各段的模式和字符计数指示符，
+    只统计位数，不生成位流
+
+    Args:
+        data (str): 二维码中包含的数据
+        version (int): 版本，决定字符计数指示符的位数
+        segmentation (str): 分段方式
+
+    Returns:
+        int: 需要的数据位数
+    """
+    raw = data if isinstance(data, bytes) else str(data).encode('utf-8')
+    mode_sizes = _mode_sizes(version)
+    chunks = _segments(raw) if segmentation == "qrcode" else _optimal_segments(raw, mode_sizes)
+    return sum(4 + mode_sizes[mode] + _segment_length(mode, len(chunk)) for mode, chunk in chunks)
+
+
+def payload_bound(data: str, version: int) -> int:
+    """
+    按位数最少分段时数据需要的位数的上界，可以相加
+
+    上界是分段代价的估算值（每个数字段和字母数字段多计不足1位）。任意分段方式的估算值都不小于
+    代价最小的分段，因此两段ASCII数据的上界之和不小于二者连接后实际需要的位数，
+    装入二维码时可以据此跳过大部分精确计算。含非ASCII字符的数据整段按字节模式计算，上界不能相加。
+
+    Args:
+        data (str): 二维码中包含的数据
+        version (int): 版本，决定字符计数指示符的位数
+
+    Returns:
+        int: 位数上界
+    """
+    raw = data if isinstance(data, bytes) else str(data).encode('utf-8')
+    mode_sizes = _mode_sizes(version)
+    if not raw:
+        return 0
+    if not raw.isascii():
+        return byte_segment_bits(len(raw), version)
+    return -(-_optimal_plan(raw, mode_sizes)[1] // 6)
+
+
+def segment_bound(data: str, version: int) -> int:
+    """
+    把ASCII数据整体作为一段、使用可用的最省模式时的位数上界，可以与payload_bound的结果相加，
+    不做动态规划，计算量很小
+
+    Args:
+        data (str): 二维码中包含的数据
+        version (int): 版本，决定字符计数指示符的位数
+
+    Returns:
+        int: 位数上界
+    """
+    raw = data if isinstance(data, bytes) else str(data).encode('utf-8')
+    if not raw:
+        return 0
+    if raw.isdigit():
+        index = 0
+    elif raw[0] in ALPHA_NUM and _ALPHA_RUN_RE.fullmatch(raw):
+        index = 1
+    else:
+        index = 2
+    cost = (4 + _mode_sizes(version)[_DP_MODES[index]]) * 6 + _DP_ROUNDING[index] + len(raw) * _DP_CHAR_COST[index]
+    return -(-cost // 6)
+
+
+def byte_segment_bits(size: int, version: int) -> int:
+    """size个字节整体作为一个字节模式段时的位数，是任何分段方式下实际位数的上界"""
+    return 4 + _mode_sizes(version)[MODE_8BIT_BYTE] + 8 * size
+
+
+def capacity_bits(version: int, ecc: int = QR_ERROR_CORRECTION) -> int:
+    """指定版本和纠错级别可容纳的数据位数"""
+    return _bit_limits(ecc)[version]
+
+
+# ---- 掩码罚分 ----
+
+_FINDER_LIKE = (
+    np.array([1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0], dtype=bool),
+    np.array([0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1], dtype=bool),
+)
+
+
+def _penalty(stack: np.ndarray) -> np.ndarray:
+    """
+    批量计算掩码罚分，规则与qrcode.util.lost_point一致
+
+    Args:
+        stack (np.ndarray): (数量, 边长, 边长)的布尔矩阵
+
+    Returns:
+        np.ndarray: 每个矩阵的罚分
+    """
+    count = stack.shape[-1]
+    # 行和列放在一起处理
+    lines = np.concatenate((stack, stack.transpose(0, 2, 1)), axis=1)
+    same = lines[..., 1:] == lines[..., :-1]
+
+    # 规则1：连续5个及以上同色模块，长度为L的连续段罚L-2分。
+    # 长度L的段包含L-4个全同色的5格窗口，再给每段的第一个窗口额外加2分
+    run5 = same[..., :count - 4] & same[..., 1:count - 3] & same[..., 2:count - 2] & same[..., 3:count - 1]
+    run_start = run5.copy()
+    run_start[..., 1:] &= ~same[..., :count - 5]
+    points = run5.sum(axis=(1, 2)) + 2 * run_start.sum(axis=(1, 2))
+
+    # 规则2：2×2同色块每个罚3分
+    top_left = stack[:, :-1, :-1]
+    block = (top_left == stack[:, :-1, 1:]) & (top_left == stack[:, 1:, :-1]) & (top_left == stack[:, 1:, 1:])
+    points += 3 * block.sum(axis=(1, 2))
+
+    # 规则3：行列中出现1:1:3:1:1并带4格浅色的图形，每处罚40分
+    width = count - 10
+    for pattern in _FINDER_LIKE:
+        match = np.ones(lines.shape[:2] + (width,), dtype=bool)
+        for k, dark in enumerate(pattern):
+            window = lines[..., k:k + width]
+            match &= window if dark else ~window
+        points += 40 * match.sum(axis=(1, 2))
+
+    # 规则4：深色模块比例每偏离50%达5%罚10分
+    percent = stack.sum(axis=(1, 2)) / float(count * count)
+    points += 10 * np.floor(np.abs(percent * 100 - 50) / 5).astype(points.dtype)
+    return points
+
+
+# ---- 对外接口 ----
+
+def _encode_version_group(codewords: List[bytes], version: int, ecc: int) -> List[np.ndarray]:
+    """对同一版本的一批二维码计算纠错码、排布数据并选择掩码"""
+    data_total, ec_count, block_groups, order = _codeword_layout(version, ecc)
+    base, rows, cols, masks, type_info, type_number = _version_template(version)
+    batch = len(codewords)
+    count = base.shape[0]
+
+    data = np.frombuffer(b''.join(codewords), dtype=np.uint8).reshape(batch, data_total)
+    ec_blocks = []
+    for data_count, offsets, generator in block_groups:
+        blocks = np.stack([data[:, o:o + data_count] for o in offsets], axis=1)
+        ec = _rs_remainder(blocks.reshape(-1, data_count), generator)
+        ec_blocks.append((offsets, ec.reshape(batch, len(offsets), ec_count)))
+    # 纠错码字按块在原数据中的顺序排列
+    ec_by_offset = sorted(
+        (offset, ec[:, i]) for offsets, ec in ec_blocks for i, offset in enumerate(offsets)
+    )
+    full = np.concatenate([data] + [ec for _, ec in ec_by_offset], axis=1)[:, order]
+
+    bits = np.zeros((batch, len(rows)), dtype=bool)
+    bits[:, :full.shape[1] * 8] = np.unpackbits(full, axis=1).astype(bool)
+
+    # 全部8种掩码一起排布和评估，格式信息为浅色（与qrcode的测试模式一致）
+    masked = bits[:, None, :] ^ masks[None, :, :]
+    candidates = np.repeat(base[None, None], batch, axis=0).repeat(8, axis=1)
+    candidates[:, :, rows, cols] = masked
+    scores = _penalty(candidates.reshape(batch * 8, count, count)).reshape(batch, 8)
+    best = scores.argmin(axis=1)
+
+    results = []
+    for i, mask in enumerate(best):
+        matrix = candidates[i, mask].copy()
+        bch = _bch_type_info((ecc << 3) | int(mask))
+        for k, (r, c) in enumerate(type_info):
+            matrix[r, c] = (bch >> (k % 15)) & 1
+        matrix[count - 8, 8] = True
+        if type_number:
+            bch = _bch_type_number(version)
+            for k, (r, c) in enumerate(type_number):
+                matrix[r, c] = (bch >> (k % 18)) & 1
+        results.append(matrix)
+    return results
+
+
+def encode_batch(strings: Sequence[str], ecc: int = QR_ERROR_CORRECTION, version: int = QR_VERSION,
+                 segmentation: str = QR_SEGMENTATION) -> List[np.ndarray]:
+    """
+    批量编码二维码
+
+    Args:
+        strings (Sequence[str]): 要编码的字符串列表
+        ecc (int): 纠错级别，取值与qrcode库的ERROR_CORRECT_*常量一致
+        version (int): 最小版本，数据放不下时自动增大版本
+        segmentation (str): "optimal"按位数最少分段，"qrcode"沿用qrcode库的规则
+
+    Returns:
+        List[np.ndarray]: 与输入一一对应的布尔模块矩阵（不含边框），True表示黑色模块
+
+    Raises:
+        DataOverflowError: 某个字符串超出最大版本的容量
+    """
+    if not 1 <= version <= 40:
+        raise ValueError(f"无效的二维码版本: {version}")
+    if ecc not in _RS_BLOCK_OFFSET:
+        raise ValueError(f"无效的纠错级别: {ecc}")
+    if segmentation not in QR_SEGMENTATIONS:
+        raise ValueError(f"无效的分段方式: {segmentation}")
+
+    groups: Dict[int, List[Tuple[int, bytes]]] = {}
+    for index, data in enumerate(strings):
+        fitted, codewords = _prepare(data, ecc, version, segmentation)
+        groups.setdefault(fitted, []).append((index, codewords))
+
+    results: List[np.ndarray] = [None] * len(strings)
+    for fitted, items in groups.items():
+        count = fitted * 4 + 17
+        step = max(1, _MAX_BATCH_MODULES // (8 * count * count))
+        for i in range(0, len(items), step):
+            part = items[i:i + step]
+            matrices = _encode_version_group([codewords for _, codewords in part], fitted, ecc)
+            for (index, _), matrix in zip(part, matrices):
+                results[index] = matrix
+    return results
+
+
+def encode(data: str, ecc: int = QR_ERROR_CORRECTION, version: int = QR_VERSION,
+           segmentation: str = QR_SEGMENTATION) -> np.ndarray:
+    """
+    编码单个二维码
+
+    Args:
+        data (str): 二维码中包含的数据
+        ecc (int): 纠错级别
+        version (int): 最小版本
+        segmentation (str): 分段方式
+
+    Returns:
+        np.ndarray: 布尔模块矩阵（不含边框），True表示黑色模块
+    """
+    return encode_batch([data], ecc, version, segmentation)[0]
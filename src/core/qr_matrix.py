@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+二维码模块矩阵的编码与渲染
+
+二维码在生成阶段只保留按位压缩的模块矩阵（不含边框），
+在排版阶段再按最终尺寸渲染，避免先渲染大图再缩放带来的开销和模糊。
+压缩后的矩阵体积很小，在进程间传递的开销也可以忽略。
+渲染使用NumPy整体放大和填充边框，不再逐个模块绘制矩形。
+编码默认使用内置的批量编码器（qr_encoder），也可以通过QR_ENCODER切换回qrcode库。
+"""
+
+from collections import namedtuple
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from core.config import (
+    QR_VERSION, QR_ERROR_CORRECTION, QR_BOX_SIZE, QR_BORDER, IMAGE_DPI,
+    QR_FILL_COLOR, QR_BACK_COLOR, QR_ENCODER, QR_SEGMENTATION
+)
+from core import qr_encoder
+
+if TYPE_CHECKING:
+    import qrcode
+
+# 按位压缩的模块矩阵：size为边长（模块数），data为逐行存储的位数据，
+# 每行按高位在前补齐到整字节，1表示黑色模块
+PackedMatrix = namedtuple('PackedMatrix', ['size', 'data'])
+
+
+def make_qr(data: str) -> "qrcode.QRCode":
+    """
+    按配置参数用qrcode库编码二维码，qrcode库只在选用它作为编码器时才导入
+
+    Args:
+        data (str): 二维码中包含的数据
+
+    Returns:
+        qrcode.QRCode: 已完成编码的二维码对象
+    """
+    import qrcode
+
+    if QR_SEGMENTATION == "qrcode":
+        qr = qrcode.QRCode(
+            version=QR_VERSION,
+            error_correction=QR_ERROR_CORRECTION,
+            box_size=QR_BOX_SIZE,
+            border=QR_BORDER,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+        return qr
+
+    # 按位数最少分段时由内置编码器确定分段和版本，逐段写入，与内置编码器的结果一致
+    from qrcode.util import QRData
+
+    version, segments = qr_encoder.segment(data, QR_ERROR_CORRECTION, QR_VERSION, QR_SEGMENTATION)
+    qr = qrcode.QRCode(
+        version=version,
+        error_correction=QR_ERROR_CORRECTION,
+        box_size=QR_BOX_SIZE,
+        border=QR_BORDER,
+    )
+    for mode, chunk in segments:
+        qr.add_data(QRData(chunk, mode=mode, check_data=False))
+    qr.make(fit=False)
+    return qr
+
+
+def encode_qr_modules(data: str) -> np.ndarray:
+    """
+    按配置的编码器编码二维码
+
+    Args:
+        data (str): 二维码中包含的数据
+
+    Returns:
+        np.ndarray: 布尔模块数组（不含边框），True表示黑色模块
+    """
+    if QR_ENCODER == "qrcode":
+        return np.asarray(make_qr(data).modules, dtype=bool)
+    return qr_encoder.encode(data, QR_ERROR_CORRECTION, QR_VERSION)
+
+
+def encode_qr_modules_batch(strings: Sequence[str]) -> List[np.ndarray]:
+    """
+    批量编码二维码，内置编码器会把同一版本的二维码放在一起向量化计算
+
+    Args:
+        strings (Sequence[str]): 要编码的字符串列表
+
+    Returns:
+        List[np.ndarray]: 与输入一一对应的布尔模块数组
+    """
+    if QR_ENCODER == "qrcode":
+        return [encode_qr_modules(data) for data in strings]
+    return qr_encoder.encode_batch(strings, QR_ERROR_CORRECTION, QR_VERSION)
+
+
+def save_qr_png(modules: np.ndarray, output_path: Optional[str] = None) -> Image.Image:
+    """
+    按QR_BOX_SIZE渲染已编码的二维码，并在指定路径时保存为PNG
+
+    Args:
+        modules (np.ndarray): 布尔模块数组（不含边框），True表示黑色模块
+        output_path (str, optional): 输出文件路径，为None时不写文件
+
+    Returns:
+        Image.Image: 渲染得到的二维码图片
+    """
+    img = rasterize_modules(modules, QR_BOX_SIZE, QR_BORDER)
+    if (QR_FILL_COLOR, QR_BACK_COLOR) != ("black", "white"):
+        # 非黑白配色时把黑白图片映射为指定颜色
+        img = ImageOps.colorize(img.convert('L'), black=QR_FILL_COLOR, white=QR_BACK_COLOR)
+    if output_path:
+        # 保存高清二维码，提高DPI值
+        img.save(output_path, dpi=(IMAGE_DPI, IMAGE_DPI))
+    return img
+
+
+def pack_matrix(modules: List[List[bool]]) -> PackedMatrix:
+    """
+    把布尔模块矩阵按位压缩
+
+    Args:
+        modules (List[List[bool]]): 模块矩阵（不含边框），True表示黑色模块
+
+    Returns:
+        PackedMatrix: 压缩后的模块矩阵
+    """
+    modules = np.asarray(modules, dtype=bool)
+    return PackedMatrix(len(modules), np.packbits(modules, axis=1).tobytes())
+
+
+def unpack_matrix(packed: PackedMatrix) -> np.ndarray:
+    """把压缩的模块矩阵还原为size×size的布尔数组，True表示黑色模块"""
+    size = packed.size
+    row_bytes = (size + 7) // 8
+    rows = np.frombuffer(packed.data, dtype=np.uint8).reshape(size, row_bytes)
+    return np.unpackbits(rows, axis=1, count=size).astype(bool)
+
+
+def module_runs(modules: np.ndarray):
+    """
+    按行查找连续的黑色模块
+
+    Args:
+        modules (np.ndarray): 布尔模块数组，True表示黑色模块
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: 每个连续段所在的行、起始列和长度
+    """
+    # 每行前后补浅色模块，相邻元素不同的位置即为黑色连续段的起止列
+    padded = np.zeros((modules.shape[0], modules.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = modules
+    rows, cols = np.nonzero(np.diff(padded, axis=1))
+    return rows[0::2], cols[0::2], cols[1::2] - cols[0::2]
+
+
+def encode_qr_matrix(data: str) -> PackedMatrix:
+    """
+    编码二维码并返回压缩的模块矩阵（不含边框）
+
+    Args:
+        data (str): 二维码中包含的数据
+
+    Returns:
+        PackedMatrix: 压缩后的模块矩阵
+    """
+    return pack_matrix(encode_qr_modules(data))
+
+
+def matrix_version(matrix: PackedMatrix) -> int:
+    """根据模块矩阵的边长计算二维码版本（边长 = 17 + 4 × 版本）"""
+    return (matrix.size - 17) // 4
+
+
+def calculate_box_size(qr_length_cm: float, version: int, border: int = QR_BORDER) -> int:
+    """
+    根据二维码边长、DPI和版本计算每个模块的整数像素大小
+
+    Args:
+        qr_length_cm (float): 二维码边长（含边框），单位厘米
+        version (int): 二维码版本
+        border (int): 边框宽度，单位为模块
+
+    Returns:
+        int: 每个模块的像素大小，至少为1
+    """
+    qr_length_px = int(qr_length_cm / 2.54 * IMAGE_DPI)
+    modules = 17 + 4 * version + 2 * border
+    return max(1, qr_length_px // modules)
+
+
+def render_qr_matrix(matrix: PackedMatrix, box_size: int, border: int = QR_BORDER) -> Image.Image:
+    """
+    把模块矩阵渲染为黑白图片，每个模块为box_size×box_size的整像素方块
+
+    Args:
+        matrix (PackedMatrix): 压缩的模块矩阵（不含边框）
+        box_size (int): 每个模块的像素大小
+        border (int): 边框宽度，单位为模块
+
+    Returns:
+        Image.Image: "1"模式的二维码图片
+    """
+    return rasterize_modules(unpack_matrix(matrix), box_size, border)
+
+
+def rasterize_modules(modules: np.ndarray, box_size: int, border: int = QR_BORDER) -> Image.Image:
+    """
+    用NumPy把布尔模块数组放大为位图
+
+    先填充边框，再把每个模块整体复制为box_size×box_size的像素块，
+    最后按位压缩后直接构造"1"模式图片，整个过程没有逐模块的Python循环。
+
+    Args:
+        modules (np.ndarray): 布尔模块数组（不含边框），True表示黑色模块
+        box_size (int): 每个模块的像素大小
+        border (int): 边框宽度，单位为模块
+
+    Returns:
+        Image.Image: "1"模式的二维码图片
+    """
+    if border:
+        modules = np.pad(modules, border, constant_values=False)
+    pixels = modules.repeat(box_size, axis=0).repeat(box_size, axis=1)
+    pixel_size = pixels.shape[0]
+    # "1"模式中位1为白色，因此对黑色模块取反后按位压缩
+    data = np.packbits(~pixels, axis=1).tobytes()
+    return Image.frombytes('1', (pixel_size, pixel_size), data)
+
+
+def render_qr_cell(matrix: PackedMatrix, qr_length_cm: float, cell_width: int, cell_height: int) -> Image.Image:
+    """
+    按页面单元格的最终尺寸渲染二维码
+
+    先按整数模块大小渲染，剩余不足一个模块的尺寸差再用最近邻缩放补齐到单元格大小。
+
+    Args:
+        matrix (PackedMatrix): 压缩的模块矩阵（不含边框）
+        qr_length_cm (float): 二维码边长，单位厘米
+        cell_width (int): 单元格宽度（像素）
+        cell_height (int): 单元格高度（像素）
+
+    Returns:
+        Image.Image: 与单元格尺寸相同的"1"模式二维码图片
+    """
+    modules = matrix.size + 2 * QR_BORDER
+    box_size = calculate_box_size(qr_length_cm, matrix_version(matrix))
+    # 单元格可能比标称边长略小，模块大小不能超出单元格
+    box_size = max(1, min(box_size, cell_width // modules, cell_height // modules))
+    img = render_qr_matrix(matrix, box_size)
+    if img.size != (cell_width, cell_height):
+        img = img.resize((cell_width, cell_height), Image.Resampling.NEAREST)
+    return img
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+二维码内容的分组
+
+把按顺序读取的字符串分组，每组以分隔符连接成一个二维码的内容：
+
+- fixed：每QR_PER_IMAGE个字符串一组，二维码版本随内容长度变化
+- capacity：按目标版本和纠错级别的容量装入尽可能多的字符串，所有二维码的版本不超过目标版本，
+  扫码时的模块密度和解码耗时稳定，二维码和页面数量通常也更少
+
+容量按编码器实际的分段规则计算：全部为数字或字母数字字符的内容、以及其中足够长的数字段和字母数字段
+分别按数字模式和字母数字模式计位，其余按字节模式计位，与编码结果完全一致。
+
+分隔符决定内容能否整体按字母数字模式编码：默认的";"只能按字节模式编码，
+按位数最少分段时每个序列号单独成为字母数字段，只有分隔符占用字节段；
+序列号只含大写字母和数字时，改用空格、$%*+-./:之一作分隔符，整组内容就是一个字母数字段，
+每个字符5.5位而不是8位，同样的内容可以使用更小的版本，打印尺寸不变时模块更大。
+"""
+
+from typing import Iterable, Iterator, Tuple
+
+from core.config import (
+    QR_PER_IMAGE, QR_GROUPING, QR_GROUPINGS, QR_TARGET_VERSION, QR_VERSION, QR_ERROR_CORRECTION, QR_SEPARATOR,
+    QR_SEGMENTATION, ERROR_MESSAGES
+)
+from core import qr_encoder
+
+
+def check_grouping(grouping: str, target_version: int, separator: str = QR_SEPARATOR):
+    """检查分组方式、目标版本和分隔符是否有效"""
+    if grouping not in QR_GROUPINGS:
+        raise ValueError(ERROR_MESSAGES["INVALID_QR_GROUPING"].format(grouping))
+    if not 1 <= target_version <= 40:
+        raise ValueError(ERROR_MESSAGES["INVALID_QR_VERSION"].format(target_version))
+    if not separator:
+        raise ValueError(ERROR_MESSAGES["INVALID_QR_SEPARATOR"])
+
+
+def iter_qr_groups(strings: Iterable[str], grouping: str = QR_GROUPING, target_version: int = QR_TARGET_VERSION,
+                   ecc: int = QR_ERROR_CORRECTION, separator: str = QR_SEPARATOR) -> Iterator[Tuple[str, int, int]]:
+    """
+    把字符串流分组为二维码内容
+
+    Args:
+        strings (Iterable[str]): 按顺序排列的字符串
+        grouping (str): "fixed"或"capacity"
+        target_version (int): capacity分组时每个二维码的目标版本
+        ecc (int): 纠错级别
+        separator (str): 同一个二维码中各字符串之间的分隔符
+
+    Yields:
+        Tuple[str, int, int]: (二维码内容, 第一个字符串的编号, 最后一个字符串的编号)，编号从1开始
+    """
+    if grouping == "capacity":
+        yield from _iter_capacity_groups(strings, target_version, ecc, separator)
+        return
+    group = []
+    next_idx = 1  # 当前组第一个字符串的编号
+    for value in strings:
+        group.append(value)
+        if len(group) == QR_PER_IMAGE:
+            yield (separator.join(group), next_idx, next_idx + len(group) - 1)
+            next_idx += len(group)
+            group = []
+    if group:
+        yield (separator.join(group), next_idx, next_idx + len(group) - 1)
+
+
+def _iter_capacity_groups(strings: Iterable[str], target_version: int, ecc: int,
+                          separator: str) -> Iterator[Tuple[str, int, int]]:
+    """
+    按目标版本的容量贪心地装入字符串
+
+    先用容易计算的位数上界判断：按位数最少分段时，组内容的上界加上"分隔符+字符串"整体作为一段的上界
+    仍放得下就直接加入；按qrcode库的规则分段或内容含非ASCII字符时，以整组按一个字节模式段计位为上界。
+    上界放不下时才由编码器按与编码时相同的规则（从QR_VERSION开始逐个档位分段）选择整组内容的版本，
+    不超过目标版本即可加入，并以整组的上界继续累加，每组通常只精确计算一两次。
+    单个字符串超出目标版本的容量时单独成组，由编码器选择能容纳它的更大版本。
+    """
+    # 编码器的最小版本为QR_VERSION，目标版本更小时按QR_VERSION的容量装入
+    target_version = max(target_version, QR_VERSION)
+    limit = qr_encoder.capacity_bits(target_version, ecc)
+    additive = QR_SEGMENTATION == "optimal"
+    separator_size = len(separator.encode('utf-8'))
+    separator_bound = qr_encoder.segment_bound(separator, target_version)
+
+    def fits(data):
+        try:
+            return qr_encoder.segment(data, ecc, QR_VERSION, QR_SEGMENTATION)[0] <= target_version
+        except qr_encoder.DataOverflowError:
+            return False
+
+    def start_group(value):
+        bound = qr_encoder.payload_bound(value, target_version) if additive and value.isascii() else None
+        return [value], len(value.encode('utf-8')), bound
+
+    group = []
+    group_size = 0  # 组内容按UTF-8编码的字节数
+    group_bound = None  # 组内容按位数最少分段时的位数上界，组内容含非ASCII字符时为None
+    next_idx = 1
+    for value in strings:
+        if not group:
+            group, group_size, group_bound = start_group(value)
+            continue
+        piece = separator + value
+        joined_size = group_size + separator_size + len(value.encode('utf-8'))
+        if group_bound is not None and piece.isascii():
+            # 分隔符和字符串分别作为一段，或连在一起作为一段，取较小的上界
+            piece_bound = min(qr_encoder.segment_bound(piece, target_version),
+                              separator_bound + qr_encoder.segment_bound(value, target_version))
+            new_bound = group_bound + piece_bound
+            fit = new_bound <= limit
+            if not fit:
+                candidate = separator.join(group) + piece
+                fit = fits(candidate)
+                if fit:
+                    new_bound = qr_encoder.payload_bound(candidate, target_version)
+        else:
+            new_bound = None
+            fit = qr_encoder.byte_segment_bits(joined_size, target_version) <= limit
+            if not fit:
+                fit = fits(separator.join(group) + piece)
+        if fit:
+            group.append(value)
+            group_size = joined_size
+            group_bound = new_bound
+        else:
+            yield (separator.join(group), next_idx, next_idx + len(group) - 1)
+            next_idx += len(group)
+            group, group_size, group_bound = start_group(value)
+    if group:
+        yield (separator.join(group), next_idx, next_idx + len(group) - 1)
@@ -4,25 +4,17 @@
 二维码处理核心模块
 """
 
-import pandas as pd
-import qrcode
 from PIL import Image, ImageDraw, ImageFont
 import os
 import sys
-import math
+import io
+import collections
+import functools
 import concurrent.futures
+import itertools
+import threading
 import time
-from typing import List, Tuple, Dict
-
-# 尝试导入python-docx库
-try:
-    from docx import Document
-    from docx.shared import Inches, Cm, Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    from docx.oxml.ns import qn
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
+from typing import List, Tuple, Dict, Iterable, Iterator, Optional
 
 # 添加src目录到Python路径
 src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -31,18 +23,581 @@ sys.path.append(src_dir)
 # 从core模块导入config
 from core.config import *
 from core.config import calculate_a4_layout
+from core.docx_writer import DocxWriter
+from core.pdf_writer import (
+    PdfWriter, TITLE_FONT_ASCENT, title_width, title_operators, qr_operators, qr_image_operators
+)
+from core.qr_matrix import (
+    PackedMatrix, encode_qr_modules, encode_qr_modules_batch, save_qr_png, pack_matrix, matrix_version,
+    calculate_box_size, render_qr_matrix, render_qr_cell, unpack_matrix
+)
+from core.qr_cache import QRCache
+from core.qr_payload import check_grouping, iter_qr_groups
+from core.input_sources import InputSelection, detect_format, iter_batches as iter_input_batches
+from core.job_manifest import JobManifest, content_digest, file_sha256
+from core.batch_jobs import BatchJob, write_batch_report
+from core.progress import ProgressTracker
+from core.metrics import Metrics, run_timed, stage_timer
+from core.svg_writer import qr_element as svg_qr_element, write_svg_page
+
+# 以下工作函数定义在模块级别，可以被pickle后提交到进程池中执行
+
+def generate_qr_code_task(data_group: Tuple[str, Optional[str], int, int]) -> Tuple[PackedMatrix, int, int, int]:
+    """
+    生成单个二维码，返回压缩的模块矩阵
+    
+    Args:
+        data_group (Tuple): 包含数据、输出目录和索引范围的元组，输出目录为None时不保存单个二维码文件
+    
+    Returns:
+        Tuple: 包含压缩的二维码模块矩阵、索引范围和线程ID的元组
+    """
+    data, output_dir, start_idx, end_idx = data_group
+    return _finish_qr_task(encode_qr_modules(data), output_dir, start_idx, end_idx)
+
+
+def _finish_qr_task(modules, output_dir: Optional[str], start_idx: int, end_idx: int) -> Tuple[PackedMatrix, int, int, int]:
+    """按需保存单个二维码文件，并压缩模块矩阵作为任务结果"""
+    if output_dir:
+        # 将生成的单张二维码命名加上Excel的行编号
+        qr_file = os.path.join(output_dir, f"qr_row_{start_idx}_{end_idx}.png")
+        with stage_timer("save"):
+            save_qr_png(modules, qr_file)
+    # 返回线程ID
+    thread_id = threading.get_ident()
+    return (pack_matrix(modules), start_idx, end_idx, thread_id)
+
+
+def generate_qr_code_chunk(data_groups: List[Tuple[object, Optional[str], int, int]]) -> List:
+    """
+    批量生成一组二维码，执行池按块提交任务以减少调度和进程间通信次数，
+    同一块内的二维码一起编码
+    
+    Args:
+        data_groups (List[Tuple]): generate_qr_code_task的参数列表，
+            命中缓存的任务中数据已替换为压缩的模块矩阵，无需再编码
+    
+    Returns:
+        List: 与参数一一对应的结果，失败的任务对应其异常对象
+    """
+    payloads = [data_group[0] for data_group in data_groups if not isinstance(data_group[0], PackedMatrix)]
+    try:
+        encoded = iter(encode_qr_modules_batch(payloads))
+    except Exception:
+        # 块内有无法编码的数据时逐个编码，只让出错的任务失败
+        encoded = None
+    results = []
+    for data_group in data_groups:
+        try:
+            if isinstance(data_group[0], PackedMatrix):
+                results.append(_finish_cached_task(*data_group))
+            elif encoded is None:
+                results.append(generate_qr_code_task(data_group))
+            else:
+                results.append(_finish_qr_task(next(encoded), *data_group[1:]))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _finish_cached_task(matrix: PackedMatrix, output_dir: Optional[str], start_idx: int, end_idx: int) -> Tuple[PackedMatrix, int, int, int]:
+    """命中缓存的二维码直接作为任务结果，需要保存单个二维码文件时从模块矩阵渲染"""
+    if output_dir:
+        qr_file = os.path.join(output_dir, f"qr_row_{start_idx}_{end_idx}.png")
+        save_qr_png(unpack_matrix(matrix), qr_file)
+    return (matrix, start_idx, end_idx, threading.get_ident())
+
+
+def render_qr_source(qr_source, qr_length_cm: float, cell_width: int, cell_height: int) -> Image.Image:
+    """
+    把二维码渲染为单元格大小的图片
+    
+    Args:
+        qr_source: 压缩的二维码模块矩阵、内存中的图片或PNG文件路径
+        qr_length_cm (float): 二维码边长，单位厘米
+        cell_width (int): 单元格宽度（像素）
+        cell_height (int): 单元格高度（像素）
+    
+    Returns:
+        Image.Image: 单元格大小的二维码图片
+    """
+    if isinstance(qr_source, PackedMatrix):
+        # 模块矩阵直接按最终尺寸渲染，无需高质量缩放
+        return render_qr_cell(qr_source, qr_length_cm, cell_width, cell_height)
+    qr_img = qr_source if isinstance(qr_source, Image.Image) else Image.open(qr_source)
+    # 调整二维码大小，使用LANCZOS算法保持高质量
+    return qr_img.resize((cell_width, cell_height), Image.Resampling.LANCZOS)
+
+
+def render_qr_png(qr_source, qr_length_cm: float) -> bytes:
+    """
+    把二维码编码为按二维码边长渲染的PNG数据，供Word文档嵌入
+    
+    Args:
+        qr_source: 压缩的二维码模块矩阵、内存中的图片或PNG文件路径
+        qr_length_cm (float): 二维码边长，单位厘米
+    
+    Returns:
+        bytes: PNG图片数据
+    """
+    if isinstance(qr_source, str):
+        with open(qr_source, 'rb') as f:
+            return f.read()
+    if isinstance(qr_source, PackedMatrix):
+        box_size = calculate_box_size(qr_length_cm, matrix_version(qr_source))
+        qr_source = render_qr_matrix(qr_source, box_size)
+    stream = io.BytesIO()
+    qr_source.save(stream, format='PNG', dpi=(IMAGE_DPI, IMAGE_DPI))
+    return stream.getvalue()
+
+
+def render_docx_page(page_data: Tuple[List[Tuple], float]) -> Tuple[List[Optional[bytes]], List[str]]:
+    """
+    把一页Word文档中的二维码全部编码为PNG数据
+    
+    Args:
+        page_data (Tuple): 本页的二维码生成结果和二维码边长
+    
+    Returns:
+        Tuple[List[Optional[bytes]], List[str]]: 与二维码一一对应的PNG数据（编码失败的位置为None）
+                                                 和错误信息，错误信息由调用方记录（进程池中无法使用日志回调）
+    """
+    qr_files_group, qr_length_cm = page_data
+    pictures = []
+    errors = []
+    for qr_source, start_num, end_num, *_ in qr_files_group:
+        try:
+            pictures.append(render_qr_png(qr_source, qr_length_cm))
+        except Exception as e:
+            errors.append(f"添加二维码 {start_num}-{end_num} 到Word文档时出错: {e}")
+            pictures.append(None)
+    return pictures, errors
+
+
+# 页面模板：预先绘制好标题的页眉区域（无标题时为None）、单元格坐标和单元格大小
+PageTemplate = collections.namedtuple('PageTemplate', ['header', 'cells', 'cell_width', 'cell_height'])
+
+# 根据600 DPI设置字体大小，使打印时字体高度为0.92cm
+# 计算公式：像素值 = 厘米值 / 2.54厘米/英寸 * DPI值
+# 0.92 cm / 2.54 cm/inch * 600 DPI ≈ 217 像素
+TITLE_FONT_SIZE = 217  # 标题字体大小，确保打印时高度为0.92cm
+
+
+@functools.lru_cache(maxsize=1)
+def _load_title_font() -> ImageFont.ImageFont:
+    """加载标题字体，结果缓存，避免每页都重新查找字体文件"""
+    try:
+        # 尝试多种中文字体，确保在不同系统上都能正常显示中文
+        for font_name in ['simhei.ttf', 'simkai.ttf', 'msyh.ttc', 'microsoftyahei.ttf', 'simsun.ttc']:
+            try:
+                return ImageFont.truetype(font_name, TITLE_FONT_SIZE)
+            except:
+                continue
+        # 如果所有中文字体都尝试失败，回退到默认字体
+        return ImageFont.load_default()
+    except:
+        # 如果出现其他异常，使用默认字体
+        return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=PAGE_TEMPLATE_CACHE_SIZE)
+def get_page_template(title: str, qr_length_cm: float, rows: int, cols: int, page_mode: str = PAGE_IMAGE_MODE) -> PageTemplate:
+    """
+    获取页面模板，同一次运行中所有页面的标题和布局相同，只需绘制一次
+    
+    Args:
+        title (str): 页面标题，为空时不绘制标题
+        qr_length_cm (float): 二维码边长，单位厘米
+        rows (int): 每页行数
+        cols (int): 每页列数
+        page_mode (str): 页面图片模式
+    
+    Returns:
+        PageTemplate: 页面模板，页眉图片在多个页面间共享，不能直接修改
+    """
+    header = None
+    
+    # 添加标题（如果有）
+    if title:
+        # 页眉只覆盖标题所在的区域，合成页面时粘贴到新画布上，比复制整页画布省内存带宽
+        header = Image.new(page_mode, (A4_WIDTH, A4_HEIGHT), color=BACKGROUND_COLOR)
+        draw = ImageDraw.Draw(header)
+        font = _load_title_font()
+        
+        # 计算标题位置（居中）
+        title_width, title_height = draw.textbbox((0, 0), title, font=font)[2:4]
+        title_x = (A4_WIDTH - title_width) // 2
+        title_y = MARGIN_PIXELS + 100  # 标题上方留出100像素的额外空白
+        
+        # 绘制标题
+        draw.text((title_x, title_y), title, fill=TEXT_COLOR, font=font)
+        
+        # 为标题增加额外的上边距
+        title_margin = title_height + 250  # 标题下方留出150像素的额外空白，增加与二维码之间的间隙
+        header = header.crop((0, 0, A4_WIDTH, MARGIN_PIXELS + title_margin))
+    else:
+        title_margin = 0  # 没有标题时不需要额外边距
+    
+    cells, qr_width, qr_height = _page_cells(title_margin, rows, cols)
+    return PageTemplate(header, cells, qr_width, qr_height)
+
+
+def _page_cells(title_margin: int, rows: int, cols: int) -> Tuple[Tuple[Tuple[int, int], ...], int, int]:
+    """
+    计算A4页面上每个二维码单元格的位置和大小
+    
+    Args:
+        title_margin (int): 标题占用的高度（像素），没有标题时为0
+        rows (int): 每页行数
+        cols (int): 每页列数
+    
+    Returns:
+        Tuple: 按行优先顺序排列的单元格左上角坐标、单元格宽度和高度（像素）
+    """
+    # 计算二维码的位置，考虑标题占用的空间和底部间距
+    available_width = A4_WIDTH - 2 * MARGIN_PIXELS
+    available_height = A4_HEIGHT - 2 * MARGIN_PIXELS - title_margin - MARGIN_PIXELS  # 额外减去底部间距
+    
+    qr_width = available_width // cols
+    qr_height = available_height // rows
+    
+    cells = tuple(
+        (MARGIN_PIXELS + col * qr_width, MARGIN_PIXELS + title_margin + row * qr_height)
+        for row in range(rows)
+        for col in range(cols)
+    )
+    return cells, qr_width, qr_height
+
+
+def _page_save_options(page_mode: str, page_format: str) -> Tuple[str, Dict]:
+    """
+    获取A4页面的文件扩展名和保存参数
+    
+    Args:
+        page_mode (str): 页面图片模式
+        page_format (str): 页面文件格式
+    
+    Returns:
+        Tuple[str, Dict]: 文件扩展名和传给Image.save的参数
+    """
+    options = {'dpi': (IMAGE_DPI, IMAGE_DPI)}
+    if page_format == "tiff":
+        # 黑白页面使用传真标准的CCITT G4压缩，其他模式使用无损deflate压缩
+        options['compression'] = "group4" if page_mode == "1" else "tiff_adobe_deflate"
+        return "tif", options
+    options['quality'] = IMAGE_QUALITY
+    return "png", options
+
+
+def compose_a4_page(page_data: Tuple[List[Tuple], str, int, int, int, int, str, float, str, str], log_error=print) -> str:
+    """
+    合成并保存一页A4图片
+    
+    Args:
+        page_data (Tuple): 包含二维码组、输出目录、索引、行列数、标题、二维码边长、页面模式和文件格式的元组
+        log_error (callable): 错误日志回调函数，进程池中默认打印到控制台
+    
+    Returns:
+        str: 生成的A4图片文件路径
+    """
+    qr_files_group, output_dir, start_i, end_i, rows, cols, title, qr_length_cm, page_mode, page_format = page_data
+    if page_format == "svg":
+        return compose_svg_page(qr_files_group, output_dir, rows, cols, title, log_error)
+    
+    # 标题和单元格坐标从缓存的页面模板获取，只在第一次使用时计算
+    template = get_page_template(title, qr_length_cm, rows, cols, page_mode)
+    
+    # 创建A4大小的白色背景图片，粘贴预先绘制好的页眉。
+    # 黑白模式下二维码图片无需转换即可直接粘贴
+    a4_image = Image.new(page_mode, (A4_WIDTH, A4_HEIGHT), color=BACKGROUND_COLOR)
+    if template.header is not None:
+        a4_image.paste(template.header, (0, 0))
+    
+    # 放置二维码 - 调整元组解构以适应包含线程ID的4元素元组
+    for (qr_source, start_num, end_num, _), position in zip(qr_files_group, template.cells):
+        if qr_source is None:
+            continue  # 编码失败的二维码组留出空白单元格，后面的二维码不前移
+        try:
+            # 按单元格的最终尺寸渲染二维码
+            with stage_timer("rasterize"):
+                qr_img = render_qr_source(qr_source, qr_length_cm, template.cell_width, template.cell_height)
+            
+            # 粘贴二维码到A4图片
+            a4_image.paste(qr_img, position)
+        except Exception as e:
+            log_error(f"处理二维码 {start_num}-{end_num} 时出错: {e}")
+    
+    # 保存A4图片
+    if qr_files_group:
+        start_num = qr_files_group[0][1]
+        end_num = qr_files_group[-1][2]
+        extension, save_options = _page_save_options(page_mode, page_format)
+        output_file = os.path.join(output_dir, f"{start_num}-{end_num}.{extension}")
+        with stage_timer("save"):
+            a4_image.save(output_file, **save_options)
+        return output_file
+    
+    return ""
+
+
+def compose_svg_page(qr_files_group: List[Tuple], output_dir: str, rows: int, cols: int, title: str,
+                     log_error=print) -> str:
+    """
+    生成并保存一页SVG，版面与A4图片相同，坐标使用600 DPI的像素
+    
+    Args:
+        qr_files_group (List[Tuple]): 本页的二维码生成结果（压缩的模块矩阵和索引范围）
+        output_dir (str): 输出目录路径
+        rows (int): 每页行数
+        cols (int): 每页列数
+        title (str): 页面标题
+        log_error (callable): 错误日志回调函数
+    
+    Returns:
+        str: 生成的SVG文件路径，没有二维码时为空字符串
+    """
+    if not qr_files_group:
+        return ""
+    # 标题使用浏览器中的中文字体，标题高度固定为字体大小，与PDF版面相同
+    title_margin = TITLE_FONT_SIZE + 250 if title else 0
+    cells, cell_width, cell_height = _page_cells(title_margin, rows, cols)
+    
+    elements = []
+    for (qr_source, start_num, end_num, _), (x, y) in zip(qr_files_group, cells):
+        if qr_source is None:
+            continue
+        try:
+            with stage_timer("rasterize"):
+                elements.append(svg_qr_element(qr_source, x, y, cell_width, cell_height, QR_BORDER))
+        except Exception as e:
+            log_error(f"处理二维码 {start_num}-{end_num} 时出错: {e}")
+    
+    start_num = qr_files_group[0][1]
+    end_num = qr_files_group[-1][2]
+    output_file = os.path.join(output_dir, f"{start_num}-{end_num}.svg")
+    with stage_timer("save"):
+        write_svg_page(
+            output_file, A4_WIDTH, A4_HEIGHT, A4_WIDTH / IMAGE_DPI * 25.4, A4_HEIGHT / IMAGE_DPI * 25.4, elements,
+            title=title, title_x=A4_WIDTH / 2,
+            title_y=MARGIN_PIXELS + 100 + TITLE_FONT_SIZE * TITLE_FONT_ASCENT,  # 标题上方留出100像素的额外空白
+            font_size=TITLE_FONT_SIZE, fill_color=QR_FILL_COLOR, text_color=TEXT_COLOR,
+            background_color=BACKGROUND_COLOR,
+        )
+    return output_file
+
+
+def _iter_chunks(items: Iterable, size: int) -> Iterator[list]:
+    """把可迭代对象按size个元素一块切分，最后一块可能不足size个"""
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class QRCodeProcessor:
     """
     二维码处理核心类，提供二维码生成和A4图片合成的核心功能
     """
     
-    def __init__(self):
+    def __init__(self, backend: str = EXECUTOR_BACKEND, page_mode: str = PAGE_IMAGE_MODE,
+                 page_format: str = PAGE_IMAGE_FORMAT):
         self.logger = self._get_logger()
         self.stop_event = None  # 用于取消操作的事件标志
-        # 创建可重用的线程池，避免每次调用方法时重复创建
-        self.qr_thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
-        self.image_thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_IMAGE_WORKERS)
+        # 各阶段的耗时、计数、队列深度和执行池利用率
+        self.metrics = Metrics()
+        self._check_page_output(page_mode, page_format)
+        self.page_mode = page_mode
+        self.page_format = page_format
+        # 二维码内容的分组方式、按容量分组时的目标版本和组内字符串的分隔符
+        check_grouping(QR_GROUPING, QR_TARGET_VERSION, QR_SEPARATOR)
+        self.qr_grouping = QR_GROUPING
+        self.qr_target_version = QR_TARGET_VERSION
+        self.qr_separator = QR_SEPARATOR
+        # 跨运行的二维码编码缓存，数据库在第一次使用时才打开
+        self.qr_cache = QRCache() if QR_CACHE_ENABLED else None
+        # 可重用的执行池在第一次使用时才创建，只查看帮助或调整设置时不启动线程和进程
+        self._qr_pool = None
+        self._image_pool = None
+        self._select_backend(backend)
+    
+    def _select_backend(self, backend: str):
+        """
+        设置执行后端，执行池在第一次使用时按后端创建
+        
+        Args:
+            backend (str): "thread"使用线程池；"process"使用进程池，可绕过GIL充分利用多核
+        """
+        if backend not in EXECUTOR_BACKENDS:
+            raise ValueError(ERROR_MESSAGES["INVALID_BACKEND"].format(backend))
+        self.backend = backend
+        # 页面模式决定单页内存占用和可用的并发数
+        self.image_workers = PAGE_IMAGE_WORKERS[self.page_mode]
+        self.metrics.workers.update(qr=MAX_WORKERS, image=self.image_workers)
+    
+    def _create_pool(self, max_workers: int):
+        """按执行后端创建执行池"""
+        if self.backend == "process":
+            return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+        return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    
+    @property
+    def qr_pool(self):
+        """二维码编码执行池，第一次使用时创建"""
+        if self._qr_pool is None:
+            self._qr_pool = self._create_pool(MAX_WORKERS)
+        return self._qr_pool
+    
+    @property
+    def image_pool(self):
+        """图像处理执行池，第一次使用时按页面模式的并发数创建"""
+        if self._image_pool is None:
+            self._image_pool = self._create_pool(self.image_workers)
+        return self._image_pool
+    
+    def _shutdown_image_pool(self):
+        if self._image_pool is not None:
+            self._image_pool.shutdown(wait=True)
+            self._image_pool = None
+    
+    def _shutdown_qr_pool(self):
+        if self._qr_pool is not None:
+            self._qr_pool.shutdown(wait=True)
+            self._qr_pool = None
+    
+    def _check_page_output(self, page_mode: str, page_format: str):
+        """检查页面模式和文件格式是否有效"""
+        if page_mode not in PAGE_IMAGE_MODES:
+            raise ValueError(ERROR_MESSAGES["INVALID_PAGE_MODE"].format(page_mode))
+        if page_format not in PAGE_IMAGE_FORMATS:
+            raise ValueError(ERROR_MESSAGES["INVALID_PAGE_FORMAT"].format(page_format))
+    
+    def set_page_output(self, page_mode: str, page_format: str):
+        """
+        设置A4页面的图片模式和文件格式，并发数变化时关闭图像处理执行池，下次使用时重新创建
+        
+        Args:
+            page_mode (str): "RGB"、"L"或"1"
+            page_format (str): "png"或"tiff"
+        """
+        self._check_page_output(page_mode, page_format)
+        self.page_mode = page_mode
+        self.page_format = page_format
+        if PAGE_IMAGE_WORKERS[page_mode] != self.image_workers:
+            self._shutdown_image_pool()
+            self.image_workers = PAGE_IMAGE_WORKERS[page_mode]
+            self.metrics.workers["image"] = self.image_workers
+    
+    def set_backend(self, backend: str):
+        """
+        切换执行后端，后端变化时关闭原有执行池，下次使用时按新后端创建
+        
+        Args:
+            backend (str): "thread"或"process"
+        """
+        if backend == self.backend:
+            return
+        if backend not in EXECUTOR_BACKENDS:
+            raise ValueError(ERROR_MESSAGES["INVALID_BACKEND"].format(backend))
+        self._shutdown_qr_pool()
+        self._shutdown_image_pool()
+        self._select_backend(backend)
+    
+    def set_qr_grouping(self, grouping: str, target_version: int = QR_TARGET_VERSION, separator: str = QR_SEPARATOR):
+        """
+        设置二维码内容的分组方式
+        
+        Args:
+            grouping (str): "fixed"每QR_PER_IMAGE个字符串一组；"capacity"按目标版本的容量装入尽可能多的字符串
+            target_version (int): capacity分组时每个二维码的目标版本（1~40）
+            separator (str): 同一个二维码中各字符串之间的分隔符，字母数字分隔符可使序列号内容按字母数字模式编码
+        """
+        check_grouping(grouping, target_version, separator)
+        self.qr_grouping = grouping
+        self.qr_target_version = target_version
+        self.qr_separator = separator
+    
+    def _iter_qr_groups(self, strings: Iterable[str]) -> Iterator[Tuple[str, int, int]]:
+        """按当前的分组方式把字符串分组为(二维码内容, 第一个编号, 最后一个编号)"""
+        return iter_qr_groups(strings, self.qr_grouping, self.qr_target_version, separator=self.qr_separator)
+    
+    def group_qr_strings(self, strings: List[str]) -> List[Tuple[str, int, int]]:
+        """
+        按当前的分组方式把字符串列表分组，结果的长度即二维码数量
+        
+        需要先知道二维码数量的调用方（如显示进度）分组一次后把结果传给generate_qr_codes，不必重复分组。
+        """
+        return list(self._iter_qr_groups(strings))
+    
+    def set_qr_cache(self, enabled: bool):
+        """
+        启用或停用跨运行的二维码编码缓存
+        
+        Args:
+            enabled (bool): 是否使用缓存
+        """
+        if enabled and self.qr_cache is None:
+            self.qr_cache = QRCache()
+        elif not enabled and self.qr_cache is not None:
+            self.qr_cache.close()
+            self.qr_cache = None
+    
+    def _lookup_qr_cache(self, chunk: List[Tuple], cache_stats: List[int]) -> List[Tuple]:
+        """
+        把一块任务中命中缓存的任务数据替换为已编码的模块矩阵
+        
+        cache_stats为本次运行的[命中数, 未命中数]，批量任务同时运行时各任务分别统计
+        """
+        if self.qr_cache is None:
+            return chunk
+        try:
+            matrices = self.qr_cache.get_many([task[0] for task in chunk])
+        except Exception as e:
+            self._disable_qr_cache(e)
+            return chunk
+        hits = sum(matrix is not None for matrix in matrices)
+        cache_stats[0] += hits
+        cache_stats[1] += len(matrices) - hits
+        self.metrics.count("qr_cache_hits", hits)
+        return [task if matrix is None else (matrix,) + task[1:] for task, matrix in zip(chunk, matrices)]
+    
+    def _store_qr_cache(self, chunk: List[Tuple], results: List):
+        """保存一块任务中新编码的二维码"""
+        if self.qr_cache is None:
+            return
+        try:
+            for task, result in zip(chunk, results):
+                if isinstance(task[0], str) and not isinstance(result, Exception):
+                    self.qr_cache.put(task[0], result[0])
+        except Exception as e:
+            self._disable_qr_cache(e)
+    
+    def _finish_qr_cache(self, cache_stats: List[int]):
+        """写入本次运行积累的缓存结果并记录本次运行的命中情况"""
+        if self.qr_cache is None:
+            return
+        try:
+            self.qr_cache.flush()
+        except Exception as e:
+            self._disable_qr_cache(e)
+            return
+        self.logger['info'](INFO_MESSAGES["QR_CACHE_STATS"].format(*cache_stats))
+    
+    def _disable_qr_cache(self, error: Exception):
+        """缓存数据库不可用时记录错误并停用缓存，不影响二维码生成"""
+        self.logger['error'](ERROR_MESSAGES["QR_CACHE_ERROR"].format(str(error)))
+        self.qr_cache = None
+    
+    def _qr_chunk_size(self) -> int:
+        """每次提交给执行池的二维码任务数，按块提交以分摊调度和进程间通信开销"""
+        return PROCESS_CHUNK_SIZE if self.backend == "process" else THREAD_CHUNK_SIZE
+    
+    def _page_worker(self):
+        """获取A4页面工作函数，进程池中使用可被pickle的模块级函数"""
+        if self.backend == "process":
+            return compose_a4_page
+        return self.process_a4_page_worker
     
     def _get_logger(self):
         """获取日志记录器"""
@@ -61,186 +616,164 @@ class QRCodeProcessor:
             'debug': logger_callback
         }
     
-    def read_excel_in_batches(self, file_path: str, start_row: int, batch_size: int = BATCH_SIZE_EXCEL) -> List[str]:
+    def iter_excel_batches(self, file_path: str, start_row: int, batch_size: int = BATCH_SIZE_EXCEL,
+                           input_format: Optional[str] = None, encoding: str = INPUT_TEXT_ENCODING,
+                           selection: Optional[InputSelection] = None) -> Iterator[List[str]]:
         """
-        分批读取Excel文件，避免内存溢出
+        流式分批读取输入文件，每次产出一批字符串
+
+        读取器按文件扩展名或指定的输入格式选择（见core.input_sources），
+        xlsx、CSV、TSV和纯文本文件逐行解析，内存占用与文件大小无关。
+        默认读取第一个工作表的第一列，selection可以指定工作表、列、筛选条件和内容模板。
         
         Args:
-            file_path (str): Excel文件路径
-            start_row (int): 开始读取的行数
-            batch_size (int): 每批读取的行数
+            file_path (str): 输入文件路径（Excel、CSV、TSV或纯文本文件）
+            start_row (int): 开始读取的行数（不含表头，从1开始）
+            batch_size (int): 每批产出的字符串数量
+            input_format (str, optional): 输入格式，为None时按文件扩展名判断
+            encoding (str): CSV、TSV和纯文本文件的编码
+            selection (InputSelection, optional): 工作表、列、筛选条件和内容模板
         
-        Returns:
-            List[str]: 读取到的字符串列表
+        Yields:
+            List[str]: 一批读取到的字符串
         """
-        all_strings = []
-        # 计算需要跳过的行数（pandas从0开始计数）
+        # 计算需要跳过的行数（表头之后从0开始计数）
         skip_rows = start_row - 1 if start_row > 1 else 0
         
         try:
-            # 使用ExcelFile对象打开文件，并明确指定引擎为openpyxl
-            xl = pd.ExcelFile(file_path, engine='openpyxl')
-            sheet_name = xl.sheet_names[0]  # 使用第一个工作表
-            
-            # 获取工作表对象
-            sheet = xl.parse(sheet_name)
-            
-            # 计算数据总行数
-            total_rows = len(sheet)
-            
-            # 逐批读取数据
-            for i in range(skip_rows, total_rows, batch_size):
-                end_row = min(i + batch_size, total_rows)
-                # 读取当前批次的数据
-                chunk = sheet.iloc[i:end_row]
-                
-                # 处理数据
-                for _, row in chunk.iterrows():
-                    # 检查第一个单元格是否有值
-                    if pd.notna(row.iloc[0]):
-                        all_strings.append(str(row.iloc[0]))
-            
+            batches = iter_input_batches(file_path, skip_rows, batch_size, input_format, encoding, selection)
+            while True:
+                with self.metrics.timer("read"):
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                self.metrics.count("rows_read", len(batch))
+                yield batch
         except Exception as e:
             error_msg = ERROR_MESSAGES["EXCEL_ERROR"].format(str(e))
             self.logger['error'](error_msg)
             raise Exception(error_msg)
+    
+    def read_excel_in_batches(self, file_path: str, start_row: int, batch_size: int = BATCH_SIZE_EXCEL,
+                              input_format: Optional[str] = None, encoding: str = INPUT_TEXT_ENCODING,
+                              selection: Optional[InputSelection] = None) -> List[str]:
+        """
+        分批读取输入文件，避免内存溢出
+        
+        Args:
+            file_path (str): 输入文件路径（Excel、CSV、TSV或纯文本文件）
+            start_row (int): 开始读取的行数
+            batch_size (int): 每批读取的行数
+            input_format (str, optional): 输入格式，为None时按文件扩展名判断
+            encoding (str): CSV、TSV和纯文本文件的编码
+            selection (InputSelection, optional): 工作表、列、筛选条件和内容模板
         
+        Returns:
+            List[str]: 读取到的字符串列表
+        """
+        all_strings = []
+        for batch in self.iter_excel_batches(file_path, start_row, batch_size, input_format, encoding, selection):
+            all_strings.extend(batch)
         return all_strings
     
-    def create_qr_code(self, data: str, output_path: str) -> None:
+    def create_qr_code(self, data: str, output_path: Optional[str] = None) -> Image.Image:
         """
         创建高清二维码
         
         Args:
             data (str): 二维码中包含的数据
-            output_path (str): 输出文件路径
-        """
-        qr = qrcode.QRCode(
-            version=QR_VERSION,
-            error_correction=QR_ERROR_CORRECTION,
-            box_size=QR_BOX_SIZE,
-            border=QR_BORDER,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
+            output_path (str, optional): 输出文件路径，为None时只在内存中生成不写文件
         
-        img = qr.make_image(fill_color=QR_FILL_COLOR, back_color=QR_BACK_COLOR)
-        # 保存高清二维码，提高DPI值
-        img.save(output_path, dpi=(IMAGE_DPI, IMAGE_DPI))
+        Returns:
+            Image.Image: 生成的二维码图片
+        """
+        return save_qr_png(encode_qr_modules(data), output_path)
     
-    def generate_qr_code_worker(self, data_group: Tuple[str, str, int, int]) -> Tuple[str, int, int, int]:
+    def generate_qr_code_worker(self, data_group: Tuple[str, Optional[str], int, int]) -> Tuple[PackedMatrix, int, int, int]:
         """
         线程工作函数，用于并行生成二维码
         
         Args:
-            data_group (Tuple): 包含数据、输出目录和索引范围的元组
+            data_group (Tuple): 包含数据、输出目录和索引范围的元组，输出目录为None时不保存单个二维码文件
         
         Returns:
-            Tuple: 包含二维码文件路径、索引范围和线程ID的元组
+            Tuple: 包含压缩的二维码模块矩阵、索引范围和线程ID的元组
         """
-        import threading
-        data, output_dir, start_idx, end_idx = data_group
-        # 将生成的单张二维码命名加上Excel的行编号
-        qr_file = os.path.join(output_dir, f"qr_row_{start_idx}_{end_idx}.png")
-        self.create_qr_code(data, qr_file)
-        # 返回线程ID
-        thread_id = threading.get_ident()
-        return (qr_file, start_idx, end_idx, thread_id)
+        return generate_qr_code_task(data_group)
     
-    def generate_qr_codes(self, strings: List[str], output_dir: str, progress_callback=None) -> List[Tuple]:
+    def generate_qr_codes(self, strings: List[str], output_dir: str, progress_callback=None, save_files: bool = SAVE_QR_FILES,
+                          qr_groups: Optional[List[Tuple[str, int, int]]] = None) -> List[Tuple]:
         """
         批量生成二维码
         
         Args:
             strings (List[str]): 要编码的字符串列表
-            output_dir (str): 输出目录路径
-            progress_callback (callable, optional): 进度更新回调函数，接收已完成批次数量作为参数
+            output_dir (str): 单个二维码文件的输出目录路径，仅在save_files为True时使用
+            progress_callback (callable, optional): 进度更新回调函数，接收已完成批次数量作为参数，按PROGRESS_CALLBACK_INTERVAL节流
+            save_files (bool): 是否把每个二维码另存为PNG文件，默认只在内存中传递给后续排版
+            qr_groups (List[Tuple], optional): group_qr_strings对strings分组的结果，为None时在此分组
         
         Returns:
-            List[Tuple]: 包含二维码文件路径和索引范围的元组列表
+            List[Tuple]: 包含二维码图片和索引范围的元组列表
         """
         qr_files = []
         
-        # 确保输出目录存在
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # 准备工作任务
-        tasks = []
-        for i in range(0, len(strings), QR_PER_IMAGE):
-            end_i = min(i + QR_PER_IMAGE, len(strings))
-            group = strings[i:end_i]
-            data = ";".join(group)
-            tasks.append((data, output_dir, i+1, end_i))
+        if save_files:
+            # 确保输出目录存在
+            os.makedirs(output_dir, exist_ok=True)
+        else:
+            output_dir = None
         
-        # 记录总批次数
-        total_batches = len(tasks)
+        # 只分组一次，分组结果的长度即总批次数
+        if qr_groups is None:
+            qr_groups = self.group_qr_strings(strings)
+        total_batches = len(qr_groups)
         self.logger['info'](INFO_MESSAGES["START_QR_GENERATION"].format(total_batches))
         
-        # 分批提交任务到线程池，避免一次性创建过多任务
+        # 任务按需生成，通过有界窗口提交到执行池，避免一次性创建过多任务和Future
         start_time = time.time()
+        tasks = ((payload, output_dir, start_idx, end_idx) for payload, start_idx, end_idx in qr_groups)
         
-        # 使用有序字典来保存结果，确保顺序正确
-        result_dict = {}
-        
-        # 提交所有任务到可重用的线程池
-        future_to_idx = {
-            self.qr_thread_pool.submit(self.generate_qr_code_worker, task): i 
-            for i, task in enumerate(tasks)
-        }
+        # 按块提交任务到可重用的执行池：线程池每块一个任务，进程池每块多个任务以减少进程间通信
+        # 命中缓存的任务随块一起提交，在执行池中直接作为结果，不再编码
+        cache_stats = [0, 0]
+        chunks = (self._lookup_qr_cache(chunk, cache_stats) for chunk in _iter_chunks(tasks, self._qr_chunk_size()))
         
-        # 收集结果
-        batch_start_time = {}
+        # 进度按计数器累计，回调和批次日志按时间间隔节流
+        progress = ProgressTracker(total_batches, progress_callback, self.logger['info'])
         
-        for future in concurrent.futures.as_completed(future_to_idx):
-            idx = future_to_idx[future]
-            
-            # 记录批次开始时间
-            if idx not in batch_start_time:
-                batch_start_time[idx] = time.time()
-            
-            # 检查是否需要取消
-            if self.stop_event and self.stop_event.is_set():
-                # 取消所有未完成的任务
-                for f in future_to_idx:
-                    if not f.done():
-                        f.cancel()
-                break
-                
+        # 结果按提交顺序产出，直接追加即可保持原始顺序
+        for chunk, future in self._iter_bounded(self.qr_pool, generate_qr_code_chunk, chunks, MAX_IN_FLIGHT_TASKS,
+                                                  "encode"):
+            first_idx = chunk[0][2]
             try:
-                result = future.result()
-                result_dict[idx] = result
-                
-                # 记录批次完成时间和信息
-                batch_end_time = time.time()
-                batch_time = batch_end_time - batch_start_time[idx]
-                
-                # 提取线程ID（如果结果包含）
-                thread_id = "N/A"
-                if len(result) > 3:
-                    thread_id = result[3]
-                
-                # 格式化批次信息，不包含线程ID以避免误解
-                batch_info = INFO_MESSAGES["BATCH_COMPLETED"].format(
-                    idx + 1, 
-                    len(strings[idx*QR_PER_IMAGE:min((idx+1)*QR_PER_IMAGE, len(strings))]), 
-                    batch_time
-                )
-                self.logger['info'](batch_info)
-                
-                # 调用进度回调函数（如果提供）
-                if progress_callback:
-                    # 计算已完成的批次数
-                    completed_batches = len([r for r in result_dict.values() if r is not None])
-                    progress_callback(completed_batches)
-                
+                chunk_results = future.result()
             except concurrent.futures.CancelledError:
-                self.logger['info'](f"任务 {idx} 已取消")
+                self.logger['info'](f"任务 {first_idx} 已取消")
+                continue
             except Exception as e:
-                error_msg = ERROR_MESSAGES["QR_GENERATION_ERROR"].format(idx, str(e))
+                error_msg = ERROR_MESSAGES["QR_GENERATION_ERROR"].format(first_idx, str(e))
                 self.logger['error'](error_msg)
+                continue
+            
+            self._store_qr_cache(chunk, chunk_results)
+            completed = qr_count = 0
+            for task, result in zip(chunk, chunk_results):
+                if isinstance(result, Exception):
+                    error_msg = ERROR_MESSAGES["QR_GENERATION_ERROR"].format(task[2], str(result))
+                    self.logger['error'](error_msg)
+                    continue
+                
+                qr_files.append(result)
+                # 结果中带有本批的起止编号，二维码数量直接由编号算出
+                completed += 1
+                qr_count += result[2] - result[1] + 1
+            progress.advance(completed, qr_count)
+            self.metrics.count("qr_codes", completed)
+        
+        progress.finish()
         
-        # 按原始顺序重建结果列表
-        qr_files = [result_dict[i] for i in sorted(result_dict.keys())]
+        self._finish_qr_cache(cache_stats)
         
         end_time = time.time()
         info_msg = INFO_MESSAGES["QR_GENERATION_COMPLETE"].format(len(qr_files), end_time - start_time)
@@ -248,108 +781,29 @@ class QRCodeProcessor:
         
         return qr_files
     
-    def process_a4_page_worker(self, page_data: Tuple[List[Tuple[str, int, int]], str, int, int, int, int, str]) -> str:
+    def process_a4_page_worker(self, page_data: Tuple[List[Tuple], str, int, int, int, int, str, float, str, str]) -> str:
         """
         线程工作函数，用于并行处理A4页面
         
         Args:
-            page_data (Tuple): 包含二维码文件组、输出目录、索引和行列数的元组
+            page_data (Tuple): 包含二维码组、输出目录、索引、行列数、标题、二维码边长、页面模式和文件格式的元组
         
         Returns:
             str: 生成的A4图片文件路径
         """
-        qr_files_group, output_dir, start_i, end_i, rows, cols, title = page_data
-        
-        # 创建A4大小的白色背景图片
-        a4_image = Image.new('RGB', (A4_WIDTH, A4_HEIGHT), color=BACKGROUND_COLOR)
-        draw = ImageDraw.Draw(a4_image)
-        
-        # 添加标题（如果有）
-        if title:
-            try:
-                # 根据600 DPI设置字体大小，使打印时字体高度为0.92cm
-                # 计算公式：像素值 = 厘米值 / 2.54厘米/英寸 * DPI值
-                # 0.92 cm / 2.54 cm/inch * 600 DPI ≈ 217 像素
-                font_size = 217  # 标题字体大小，确保打印时高度为0.92cm
-                # 尝试多种中文字体，确保在不同系统上都能正常显示中文
-                for font_name in ['simhei.ttf', 'simkai.ttf', 'msyh.ttc', 'microsoftyahei.ttf', 'simsun.ttc']:
-                    try:
-                        font = ImageFont.truetype(font_name, font_size)
-                        break
-                    except:
-                        continue
-                else:
-                    # 如果所有中文字体都尝试失败，回退到默认字体
-                    font = ImageFont.load_default()
-            except:
-                # 如果出现其他异常，使用默认字体
-                font = ImageFont.load_default()
-            
-            # 计算标题位置（居中）
-            title_width, title_height = draw.textbbox((0, 0), title, font=font)[2:4]
-            title_x = (A4_WIDTH - title_width) // 2
-            title_y = MARGIN_PIXELS + 100  # 标题上方留出100像素的额外空白
-            
-            # 绘制标题
-            draw.text((title_x, title_y), title, fill=TEXT_COLOR, font=font)
-            
-            # 为标题增加额外的上边距
-            title_margin = title_height + 250  # 标题下方留出150像素的额外空白，增加与二维码之间的间隙
-        else:
-            title_margin = 0  # 没有标题时不需要额外边距
-        
-        # 计算二维码的位置，考虑标题占用的空间和底部间距
-        available_width = A4_WIDTH - 2 * MARGIN_PIXELS
-        available_height = A4_HEIGHT - 2 * MARGIN_PIXELS - title_margin - MARGIN_PIXELS  # 额外减去底部间距
-        
-        qr_width = available_width // cols
-        qr_height = available_height // rows
-        
-        # 放置二维码 - 调整元组解构以适应包含线程ID的4元素元组
-        for idx, (qr_file, start_num, end_num, _) in enumerate(qr_files_group):
-            try:
-                # 打开二维码图片
-                qr_img = Image.open(qr_file)
-                # 调整二维码大小，使用LANCZOS算法保持高质量
-                qr_img = qr_img.resize((qr_width, qr_height), Image.Resampling.LANCZOS)
-                
-                # 计算位置，考虑标题占用的空间
-                col = idx % cols
-                row = idx // cols
-                x = MARGIN_PIXELS + col * qr_width
-                y = MARGIN_PIXELS + title_margin + row * qr_height
-                
-                # 粘贴二维码到A4图片
-                a4_image.paste(qr_img, (x, y))
-                
-                # 去掉A4纸上底部的编号范围，保留二维码图片
-                pass
-                
-            except Exception as e:
-                self.logger['error'](f"处理二维码 {qr_file} 时出错: {e}")
-        
-        # 保存A4图片
-        if qr_files_group:
-            start_num = qr_files_group[0][1]
-            end_num = qr_files_group[-1][2]
-            output_file = os.path.join(output_dir, f"{start_num}-{end_num}.png")
-            a4_image.save(output_file, dpi=(IMAGE_DPI, IMAGE_DPI), quality=IMAGE_QUALITY)
-            return output_file
-        
-        return ""
+        return compose_a4_page(page_data, self.logger['error'])
     
-    def create_a4_image(self, qr_files: List[Tuple[str, int, int]], output_dir: str, qr_length_cm: float = DEFAULT_QR_LENGTH, title: str = "物料S/N清单") -> None:
+    def _calculate_page_layout(self, qr_length_cm: float, title: str) -> Tuple[int, int]:
         """
-        使用多线程并行生成A4大小的图片
+        计算A4页面的行列数，有标题时扣除标题占用的高度
         
         Args:
-            qr_files (List[Tuple]): 二维码文件路径和索引范围的元组列表
-            output_dir (str): 输出目录路径
-            qr_length_cm (float): 二维码边长，单位厘米，默认为配置文件中的DEFAULT_QR_LENGTH
-        """
-        # 确保输出目录存在
-        os.makedirs(output_dir, exist_ok=True)
+            qr_length_cm (float): 二维码边长，单位厘米
+            title (str): 页面标题
         
+        Returns:
+            Tuple[int, int]: (rows, cols) - 行数和列数
+        """
         # 计算基础行列数
         base_rows, cols = calculate_a4_layout(qr_length_cm)
         
@@ -366,174 +820,753 @@ class QRCodeProcessor:
             rows = max(1, rows)  # 确保至少有1行
         else:
             rows = base_rows
+        
+        return rows, cols
+    
+    def create_a4_image(self, qr_files: List[Tuple[str, int, int]], output_dir: str, qr_length_cm: float = DEFAULT_QR_LENGTH, title: str = "物料S/N清单") -> None:
+        """
+        使用多线程并行生成A4大小的图片
+        
+        Args:
+            qr_files (List[Tuple]): 二维码文件路径和索引范围的元组列表
+            output_dir (str): 输出目录路径
+            qr_length_cm (float): 二维码边长，单位厘米，默认为配置文件中的DEFAULT_QR_LENGTH
+        """
+        # 确保输出目录存在
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # 计算考虑标题后的行列数
+        rows, cols = self._calculate_page_layout(qr_length_cm, title)
             
         # 计算每页二维码数量
         qr_per_page = rows * cols
         
-        # 准备工作任务
-        tasks = []
-        for i in range(0, len(qr_files), qr_per_page):
-            end_i = min(i + qr_per_page, len(qr_files))
-            group = qr_files[i:end_i]
-            tasks.append((group, output_dir, i, end_i, rows, cols))
+        # 页面任务按需生成，通过有界窗口提交到执行池
+        tasks = (
+            (qr_files[i:i + qr_per_page], output_dir, i, min(i + qr_per_page, len(qr_files)), rows, cols,
+             title, qr_length_cm, self.page_mode, self.page_format)
+            for i in range(0, len(qr_files), qr_per_page)
+        )
         
         # 使用多线程并行处理A4页面
         start_time = time.time()
         
-        # 提交所有任务到可重用的线程池
-        future_to_idx = {
-            self.image_thread_pool.submit(self.process_a4_page_worker, task + (title,)): i 
-            for i, task in enumerate(tasks)
-        }
-        
-        # 收集结果 - 使用列表存储结果，确保按照提交顺序处理
-        results = [None] * len(future_to_idx)
-        for future in concurrent.futures.as_completed(future_to_idx):
-            # 检查是否需要取消
-            if self.stop_event and self.stop_event.is_set():
-                # 取消所有未完成的任务
-                for f in future_to_idx:
-                    if not f.done():
-                        f.cancel()
-                break
-                
-            idx = future_to_idx[future]
+        # 结果按提交顺序产出，确保二维码排列顺序与单线程一致
+        for idx, (task, future) in enumerate(self._iter_bounded(self.image_pool, self._page_worker(), tasks,
+                                                                self._page_queue_depth(MAX_IN_FLIGHT_PAGES),
+                                                                "compose")):
             try:
-                results[idx] = future.result()
+                result = future.result()
             except concurrent.futures.CancelledError:
                 self.logger['info'](f"A4图片任务 {idx} 已取消")
+                continue
             except Exception as e:
                 error_msg = ERROR_MESSAGES["IMAGE_GENERATION_ERROR"].format(idx, str(e))
                 self.logger['error'](error_msg)
-        
-        # 按照提交顺序处理结果，确保二维码排列顺序与单线程一致
-        for result in results:
+                continue
             if result:
+                self.metrics.add_file(result)
+                self.metrics.count("pages_written")
                 success_msg = SUCCESS_MESSAGES["FILE_GENERATED"].format(result)
                 self.logger['info'](success_msg)
+    
+    def _page_queue_depth(self, depth: int) -> int:
+        """A4页面任务的在途窗口，黑白页面可同时合成的页面更多，窗口随图像处理并发数放大"""
+        return max(depth, self.image_workers * 2)
                 
-    def create_docx_document(self, qr_files: List[Tuple[str, int, int]], output_dir: str, qr_length_cm: float = DEFAULT_QR_LENGTH, title: str = "物料S/N清单") -> str:
+    def _iter_bounded(self, pool, worker, tasks: Iterable, max_pending: int, stage: str) -> Iterator[Tuple[object, concurrent.futures.Future]]:
         """
-        创建Word文档，将二维码以表格形式排列，方便用户自行排版
+        以有界窗口向执行池提交任务，并按提交顺序产出已完成的Future
+        
+        同一时刻最多只有max_pending个任务在排队或执行，
+        任务只在窗口有空位时才从tasks中拉取，因此内存占用只取决于窗口大小。
+        排在前面的任务较慢时，后面已完成的任务让出窗口继续提交新任务，执行池不会空闲，
+        已完成但尚未按顺序产出的结果最多为窗口大小的IN_FLIGHT_REORDER_FACTOR倍。
+        每个任务的耗时和在途任务数计入运行指标。
         
         Args:
-            qr_files (List[Tuple]): 二维码文件路径和索引范围的元组列表
-            output_dir (str): 输出目录路径
-            qr_length_cm (float): 二维码边长，单位厘米
-            title (str): 文档标题
-            
-        Returns:
-            str: 生成的Word文档路径
+            pool: 执行任务的线程池或进程池
+            worker (callable): 工作函数
+            tasks (Iterable): 任务参数的可迭代对象（可以是生成器）
+            max_pending (int): 窗口大小，即最多同时在途的任务数
+            stage (str): 任务所属的阶段，用于运行指标
+        
+        Yields:
+            Tuple: (任务参数, 对应的Future)
         """
-        if not DOCX_AVAILABLE:
-            self.logger['error']("python-docx库未安装，无法生成Word文档")
-            return ""
+        pending = collections.deque()
+        max_buffered = max_pending * IN_FLIGHT_REORDER_FACTOR
+        pool_name = "qr" if pool is self._qr_pool else "image"
+        tasks = iter(tasks)
+        exhausted = False
         
-        try:
-            # 确保输出目录存在
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # 创建新的Word文档
-            doc = Document()
-            
-            # 设置页面边距为1厘米
-            sections = doc.sections
-            for section in sections:
-                section.top_margin = Cm(1)
-                section.bottom_margin = Cm(1)
-                section.left_margin = Cm(1)
-                section.right_margin = Cm(1)
+        while True:
+            # 检查是否需要取消
+            if self.stop_event and self.stop_event.is_set():
+                for _, future in pending:
+                    future.cancel()
+                return
             
-            # 添加标题
-            if title:
-                title_para = doc.add_heading(title, level=0)
-                title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            # 补满窗口：只有未完成的任务占用窗口
+            running = [future for _, future in pending if not future.done()]
+            in_flight = len(running)
+            while not exhausted and in_flight < max_pending and len(pending) < max_buffered:
+                try:
+                    task = next(tasks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = pool.submit(run_timed, worker, task)
+                pending.append((task, future))
+                running.append(future)
+                in_flight += 1
             
-            # 计算每页二维码数量（以A4纸为基准）
-            # 假设页面宽度约为21厘米，左右边距各1厘米，实际可用宽度约为19厘米
-            page_width_cm = 19
-            # 假设页面高度约为29.7厘米，上下边距各1厘米，实际可用高度约为27.7厘米
-            page_height_cm = 27.7
+            if not pending:
+                return
             
-            # 计算每行可以放置的二维码数量
-            cols = int(page_width_cm // (qr_length_cm + 0.5))  # 0.5厘米间隔
-            cols = max(1, cols)
+            # 最早提交的任务完成后按顺序产出，否则等待任意一个任务完成后再补充窗口
+            if pending[0][1].done():
+                self.metrics.queue_depth(stage, len(pending))
+                task, future = pending.popleft()
+                yield task, self._unwrap_timed(future, pool_name, stage)
+            else:
+                concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+    
+    def _unwrap_timed(self, future: concurrent.futures.Future, pool_name: str, stage: str) -> concurrent.futures.Future:
+        """把run_timed包装的任务结果计入运行指标，返回只包含任务结果的Future"""
+        unwrapped = concurrent.futures.Future()
+        if future.cancelled():
+            unwrapped.cancel()
+            return unwrapped
+        error = future.exception()
+        if error is not None:
+            unwrapped.set_exception(error)
+            return unwrapped
+        result, elapsed, inner_times = future.result()
+        self.metrics.add_task(pool_name, stage, elapsed, inner_times)
+        unwrapped.set_result(result)
+        return unwrapped
+    
+    def _iter_qr_tasks(self, string_batches: Iterable[List[str]], output_dir: Optional[str]) -> Iterator[Tuple[str, Optional[str], int, int]]:
+        """
+        把流式读取的字符串批次按当前的分组方式切分为二维码任务，每组字符串生成一个任务
+        
+        Args:
+            string_batches (Iterable[List[str]]): 字符串批次的可迭代对象
+            output_dir (str): 单个二维码文件的输出目录，为None时不保存文件
+        
+        Yields:
+            Tuple: 与generate_qr_codes中相同格式的任务元组
+        """
+        strings = (value for batch in string_batches for value in batch)
+        for payload, start_idx, end_idx in self._iter_qr_groups(strings):
+            yield (payload, output_dir, start_idx, end_idx)
+    
+    def _iter_qr_results(self, qr_tasks: Iterable[Tuple[str, str, int, int]], keep_failed: bool = False) -> Iterator[Tuple]:
+        """
+        按顺序产出二维码生成结果，失败的任务记录日志
+        
+        Args:
+            qr_tasks (Iterable[Tuple]): 按顺序排列的二维码任务
+            keep_failed (bool): 为True时失败的任务产出二维码为None的占位结果，否则跳过，
+                占位结果使后面的二维码组仍然落在按组序号计算的页面和单元格中
+        
+        Yields:
+            Tuple: (压缩的模块矩阵, 开始编号, 结束编号, 线程ID)
+        """
+        cache_stats = [0, 0]
+        chunks = (self._lookup_qr_cache(chunk, cache_stats)
+                  for chunk in _iter_chunks(qr_tasks, self._qr_chunk_size()))
+        for chunk, future in self._iter_bounded(self.qr_pool, generate_qr_code_chunk, chunks, PIPELINE_QR_QUEUE_DEPTH,
+                                                  "encode"):
+            try:
+                chunk_results = future.result()
+            except concurrent.futures.CancelledError:
+                self.logger['info'](f"任务 {chunk[0][2]}-{chunk[-1][3]} 已取消")
+                continue
+            except Exception as e:
+                error_msg = ERROR_MESSAGES["QR_GENERATION_ERROR"].format(f"{chunk[0][2]}-{chunk[-1][3]}", str(e))
+                self.logger['error'](error_msg)
+                if keep_failed:
+                    yield from ((None, task[2], task[3], None) for task in chunk)
+                continue
+            self._store_qr_cache(chunk, chunk_results)
+            for task, result in zip(chunk, chunk_results):
+                if isinstance(result, Exception):
+                    error_msg = ERROR_MESSAGES["QR_GENERATION_ERROR"].format(f"{task[2]}-{task[3]}", str(result))
+                    self.logger['error'](error_msg)
+                    if keep_failed:
+                        yield (None, task[2], task[3], None)
+                    continue
+                self.metrics.count("qr_codes")
+                yield result
+        self._finish_qr_cache(cache_stats)
+    
+    def _iter_page_tasks(self, qr_results: Iterable[Tuple], output_dir: str, rows: int, cols: int, title: str,
+                         qr_length_cm: float, group_ordinals: Dict[int, int]) -> Iterator[Tuple]:
+        """
+        把按顺序产出的二维码结果按组序号归入页面，生成A4页面任务
+        
+        页面归属只取决于二维码组的序号：跳过的未变化页面和编码失败的占位结果都不会使后面的二维码组前移，
+        页面序号、文件名与任务清单中的记录保持一致。
+        
+        Args:
+            qr_results (Iterable[Tuple]): 按顺序产出的二维码结果，包含失败任务的占位结果
+            output_dir (str): 输出目录路径
+            rows (int): 每页行数
+            cols (int): 每页列数
+            title (str): 页面标题
+            qr_length_cm (float): 二维码边长，单位厘米
+            group_ordinals (Dict[int, int]): 二维码组的第一个编号对应的组序号，取出后删除
+        
+        Yields:
+            Tuple: A4页面任务，其中的索引为页面中第一个组序号和最后一个组序号加1
+        """
+        qr_per_page = rows * cols
+        group = []
+        first_ordinal = last_ordinal = 0
+        for result in qr_results:
+            ordinal = group_ordinals.pop(result[1])
+            if group and ordinal // qr_per_page != first_ordinal // qr_per_page:
+                yield (group, output_dir, first_ordinal, last_ordinal + 1, rows, cols, title, qr_length_cm,
+                       self.page_mode, self.page_format)
+                group = []
+            if not group:
+                first_ordinal = ordinal
+            group.append(result)
+            last_ordinal = ordinal
+        if group:
+            yield (group, output_dir, first_ordinal, last_ordinal + 1, rows, cols, title, qr_length_cm,
+                   self.page_mode, self.page_format)
+    
+    def _skip_unchanged_pages(self, qr_tasks: Iterable[Tuple], qr_per_page: int, manifest: JobManifest,
+                              page_digests: Dict[int, List[str]], group_ordinals: Dict[int, int],
+                              stats: Dict[str, int]) -> Iterator[Tuple]:
+        """
+        跳过内容与任务清单一致的页面包含的二维码任务，这些二维码不再编码，页面文件原样保留
+        
+        Args:
+            qr_tasks (Iterable[Tuple]): 按顺序排列的二维码任务
+            qr_per_page (int): 每页二维码数量
+            manifest (JobManifest): 任务清单
+            page_digests (Dict[int, List[str]]): 输出参数，记录需要重新生成的页面中各二维码组的内容摘要
+            group_ordinals (Dict[int, int]): 输出参数，记录需要重新生成的二维码组的第一个编号对应的组序号
+            stats (Dict[str, int]): 输出参数，统计保留的页面数、重新生成的页面数和变化的二维码组数
+        
+        Yields:
+            Tuple: 需要重新生成的页面中的二维码任务
+        """
+        for page_index, page_tasks in enumerate(_iter_chunks(qr_tasks, qr_per_page)):
+            digests = [content_digest(task[0]) for task in page_tasks]
+            if manifest.page_unchanged(page_index, digests):
+                stats['kept_pages'] += 1
+                continue
+            stats['changed_pages'] += 1
+            stats['changed_groups'] += manifest.changed_groups(page_index, digests)
+            page_digests[page_index] = digests
+            for offset, task in enumerate(page_tasks):
+                group_ordinals[task[2]] = page_index * qr_per_page + offset
+            yield from page_tasks
+    
+    def run_pipeline(self, file_path: str, start_row: int, output_dir: str, batch_size: int = BATCH_SIZE_EXCEL,
+                     qr_length_cm: float = DEFAULT_QR_LENGTH, title: str = "物料S/N清单", progress_callback=None,
+                     save_qr_files: bool = SAVE_QR_FILES, output_format: str = "image",
+                     docx_pages_per_file: int = DOCX_PAGES_PER_FILE, resume: bool = False,
+                     incremental: bool = False, input_format: Optional[str] = None,
+                     encoding: str = INPUT_TEXT_ENCODING, selection: Optional[InputSelection] = None) -> List[str]:
+        """
+        流水线模式：读取Excel、生成二维码和合成A4图片三个阶段同时进行
+        
+        各阶段之间通过有界窗口衔接，读取到的数据立即进入二维码编码，
+        凑满一页的二维码立即进入A4排版，第一页无需等待全部数据处理完即可写出，
+        峰值内存只取决于窗口大小而与输入数据量无关。
+        
+        运行过程记录在输出目录的任务清单中。续传时沿用参数相同的清单，
+        A4图片只生成缺失的页面；增量更新时逐页比较各二维码组的内容，只重新生成内容变化的页面，
+        内容变化的页面中未变化的二维码组由二维码缓存直接取出。PDF和Word文档是单个文件，
+        在任务未完成或内容变化时整体重新生成。
+        
+        Args:
+            file_path (str): 输入文件路径（Excel、CSV、TSV或纯文本文件）
+            start_row (int): 开始读取的行数
+            output_dir (str): 输出目录路径
+            batch_size (int): 每批读取的行数
+            qr_length_cm (float): 二维码边长，单位厘米
+            title (str): A4页面标题
+            progress_callback (callable, optional): 进度更新回调函数，接收已完成的二维码数量和A4页面数量作为参数
+            save_qr_files (bool): 是否把每个二维码另存为PNG文件
+            output_format (str): "image"输出A4图片，"pdf"把所有页面写入一个PDF文档，"docx"输出Word文档
+            docx_pages_per_file (int): Word文档每个文件的页数，0表示所有页面写入同一个文件
+            resume (bool): 是否续传输出目录中未完成的同一任务
+            incremental (bool): 是否在输入文件变化后只重新生成内容变化的页面
+            input_format (str, optional): 输入格式，为None时按文件扩展名判断
+            encoding (str): CSV、TSV和纯文本文件的编码
+            selection (InputSelection, optional): 工作表、列、筛选条件和内容模板
+        
+        Returns:
+            List[str]: 按顺序排列的A4图片文件路径列表，PDF和Word格式时为文档路径列表
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        temp_qr_dir = None
+        if save_qr_files:
+            temp_qr_dir = get_temp_qr_dir(output_dir)
+            os.makedirs(temp_qr_dir, exist_ok=True)
+        
+        self.logger['info'](INFO_MESSAGES["START_PIPELINE"])
+        start_time = time.time()
+        
+        rows, cols = self._calculate_page_layout(qr_length_cm, title)
+        qr_per_page = rows * cols
+        
+        # 任务参数与清单中记录的完全一致时才能续传或增量更新
+        # 同一个文件按不同的格式、编码或选择条件读取会得到不同的数据，一并记入任务参数
+        selection = selection or InputSelection()
+        job = {
+            "input_format": input_format or detect_format(file_path), "encoding": encoding,
+            "selection": selection.describe(),
+            "start_row": start_row, "output_format": output_format,
+            "qr_length_cm": qr_length_cm, "title": title, "rows": rows, "cols": cols,
+            "qr_per_image": QR_PER_IMAGE, "qr_grouping": self.qr_grouping,
+            "qr_target_version": self.qr_target_version, "qr_separator": self.qr_separator,
+            "qr_segmentation": QR_SEGMENTATION, "page_mode": self.page_mode, "page_format": self.page_format,
+            "docx_pages_per_file": docx_pages_per_file, "qr_version": QR_VERSION,
+            "qr_error_correction": QR_ERROR_CORRECTION, "qr_border": QR_BORDER,
+        }
+        # 只有续传和增量更新时才读取整个输入文件计算摘要
+        input_sha256 = file_sha256(file_path) if resume or incremental else None
+        manifest = JobManifest(output_dir, job, input_sha256, resume, incremental)
+        if resume or incremental:
+            if manifest.complete and manifest.output_files():
+                self.logger['info'](INFO_MESSAGES["JOB_ALREADY_COMPLETE"])
+                return manifest.output_files()
+            if manifest.reused:
+                self.logger['info'](INFO_MESSAGES["RESUME_JOB"].format(len(manifest.pages)))
+            else:
+                self.logger['info'](INFO_MESSAGES["RESUME_NOT_FOUND"])
+        manifest.complete = False
+        manifest.save()
+        
+        # 统计流经各阶段的数据量，供进度回调和完成日志使用
+        counts = {'strings': 0, 'qr_codes': 0, 'failed': 0}
+        
+        def counted_batches():
+            for batch in self.iter_excel_batches(file_path, start_row, batch_size, input_format, encoding,
+                                                 selection):
+                counts['strings'] += len(batch)
+                yield batch
+        
+        page_digests = {}
+        group_ordinals = {}
+        stats = {'kept_pages': 0, 'changed_pages': 0, 'changed_groups': 0}
+        
+        def counted_qr_results(skip_unchanged=False):
+            qr_tasks = self._iter_qr_tasks(counted_batches(), temp_qr_dir)
+            if skip_unchanged:
+                qr_tasks = self._skip_unchanged_pages(qr_tasks, qr_per_page, manifest, page_digests, group_ordinals,
+                                                      stats)
+            for result in self._iter_qr_results(qr_tasks, keep_failed=skip_unchanged):
+                if result[0] is not None:
+                    counts['qr_codes'] += 1
+                else:
+                    counts['failed'] += 1
+                yield result
+        
+        if output_format in ("pdf", "docx"):
+            # 文档格式按顺序逐页写入同一个文件：PDF页面只包含矢量图形，在当前线程中写入即可，
+            # Word文档的图片在图像执行池中编码
+            def update_document_progress(page_count):
+                counts['pages'] = page_count
+                if progress_callback:
+                    progress_callback(counts['qr_codes'], page_count)
             
-            # 计算每列可以放置的二维码数量
-            rows = int(page_height_cm // (qr_length_cm + 0.5))  # 0.5厘米间隔
-            rows = max(1, rows)
+            if output_format == "pdf":
+                pdf_file = self.create_pdf_document(counted_qr_results(), output_dir, qr_length_cm, title,
+                                                    progress_callback=update_document_progress)
+                document_files = [pdf_file] if pdf_file else []
+            else:
+                document_files = self.create_docx_document(counted_qr_results(), output_dir, qr_length_cm, title,
+                                                           progress_callback=update_document_progress,
+                                                           pages_per_file=docx_pages_per_file)
+            if document_files and not (self.stop_event and self.stop_event.is_set()):
+                manifest.mark_complete(document_files)
+            info_msg = INFO_MESSAGES["PIPELINE_COMPLETE"].format(
+                counts['strings'], counts['qr_codes'], counts.get('pages', 0), time.time() - start_time
+            )
+            self.logger['info'](info_msg)
+            return document_files
+        
+        page_tasks = self._iter_page_tasks(counted_qr_results(skip_unchanged=True), output_dir, rows, cols, title,
+                                           qr_length_cm, group_ordinals)
+        
+        page_files = []
+        for task, future in self._iter_bounded(self.image_pool, self._page_worker(), page_tasks,
+                                               self._page_queue_depth(PIPELINE_PAGE_QUEUE_DEPTH), "compose"):
+            try:
+                result = future.result()
+            except concurrent.futures.CancelledError:
+                self.logger['info'](f"A4图片任务 {len(page_files)} 已取消")
+                continue
+            except Exception as e:
+                error_msg = ERROR_MESSAGES["IMAGE_GENERATION_ERROR"].format(len(page_files), str(e))
+                self.logger['error'](error_msg)
+                continue
+            if result:
+                page_files.append(result)
+                self.metrics.add_file(result)
+                self.metrics.count("pages_written")
+                self.logger['info'](SUCCESS_MESSAGES["FILE_GENERATED"].format(result))
+                # 页面任务中的索引是组序号，编码失败的组记为空摘要，续传或增量更新时重新生成该页面
+                first_group, last_group = task[2], task[3] - 1
+                page_index = first_group // qr_per_page
+                digests = [digest if qr[0] is not None else ""
+                           for digest, qr in zip(page_digests.pop(page_index, []), task[0])]
+                manifest.mark_page_done(page_index, result, first_group, last_group, digests)
+            if progress_callback:
+                progress_callback(counts['qr_codes'], len(page_files))
+        
+        if self.stop_event and self.stop_event.is_set():
+            manifest.save()
+        else:
+            # 数据变少时删除多余的旧页面
+            removed_pages = manifest.remove_stale_pages()
+            if counts['failed']:
+                # 有二维码编码失败时任务不算完成，续传时重新生成包含失败二维码组的页面
+                manifest.save()
+            else:
+                manifest.mark_complete(manifest.page_files())
+            if manifest.reused:
+                self.logger['info'](INFO_MESSAGES["INCREMENTAL_SUMMARY"].format(
+                    stats['kept_pages'], stats['changed_pages'], stats['changed_groups'], removed_pages
+                ))
+        
+        info_msg = INFO_MESSAGES["PIPELINE_COMPLETE"].format(
+            counts['strings'], counts['qr_codes'], len(page_files), time.time() - start_time
+        )
+        self.logger['info'](info_msg)
+        
+        # 续传时返回的列表也包含之前已完成的页面
+        return manifest.page_files()
+    
+    def run_batch_jobs(self, jobs: List[BatchJob], output_dir: str, start_row: int,
+                       batch_size: int = BATCH_SIZE_EXCEL, concurrency: int = BATCH_JOB_CONCURRENCY,
+                       selection: Optional[InputSelection] = None, progress_callback=None,
+                       **pipeline_options) -> List[BatchJob]:
+        """
+        在同一个进程中批量运行多个任务（见core.batch_jobs.expand_batch_jobs）
+        
+        每个任务按流水线模式生成到自己的输出子目录，最多concurrency个任务同时运行。
+        全部任务共用同一组执行池和二维码缓存：一个任务收尾、执行池逐渐空闲时，
+        下一个任务已经在读取和编码，执行池始终有活可干。某个任务失败不影响其他任务，
+        结束后输出每个任务的状态和耗时，并在输出目录中保存汇总报告。
+        
+        Args:
+            jobs (List[BatchJob]): 要运行的任务
+            output_dir (str): 批量任务的输出目录，汇总报告保存在这里
+            start_row (int): 每个任务开始读取的行数
+            batch_size (int): 每批读取的行数
+            concurrency (int): 同时运行的任务数
+            selection (InputSelection, optional): 列、筛选条件和内容模板，任务指定了工作表时替换其中的工作表
+            progress_callback (callable, optional): 进度回调函数，参数为已结束的任务数、任务总数、
+                                                    已生成的二维码数量和页数
+            **pipeline_options: 传给run_pipeline的其他参数，如output_format、resume、incremental
+        
+        Returns:
+            List[BatchJob]: 记录了运行结果的任务列表
+        """
+        selection = selection or InputSelection()
+        total = len(jobs)
+        concurrency = max(1, min(concurrency, total))
+        self.logger['info'](INFO_MESSAGES["START_BATCH_JOBS"].format(total, concurrency))
+        start_time = time.time()
+        
+        # 执行池在任务线程启动之前创建，避免多个任务同时按需创建
+        self.qr_pool
+        self.image_pool
+        
+        lock = threading.Lock()
+        state = {'finished': 0, 'qr_codes': 0, 'pages': 0, 'last_log': time.monotonic(), 'last_callback': 0.0}
+        
+        def report(finished_job=False):
+            # 进度回调和进度日志按时间间隔节流，任务结束时总会报告
+            now = time.monotonic()
+            with lock:
+                snapshot = (state['finished'], total, state['qr_codes'], state['pages'])
+                log = finished_job or now - state['last_log'] >= PROGRESS_LOG_INTERVAL
+                notify = finished_job or now - state['last_callback'] >= PROGRESS_CALLBACK_INTERVAL
+                if log:
+                    state['last_log'] = now
+                if notify:
+                    state['last_callback'] = now
+            if log:
+                self.logger['info'](INFO_MESSAGES["BATCH_JOB_PROGRESS"].format(*snapshot, time.time() - start_time))
+            if notify and progress_callback:
+                progress_callback(*snapshot)
+        
+        def run_job(job: BatchJob):
+            if self.stop_event and self.stop_event.is_set():
+                job.status = "cancelled"
+                return
+            job.status = "running"
+            job_start = time.time()
             
-            # 根据行列数计算每页二维码数量
-            qr_per_page = cols * rows
+            def update(qr_codes, pages):
+                with lock:
+                    state['qr_codes'] += qr_codes - job.qr_codes
+                    state['pages'] += pages - job.pages
+                    job.qr_codes, job.pages = qr_codes, pages
+                report()
             
-            # 将二维码按页分组
-            for page_idx in range(0, len(qr_files), qr_per_page):
-                page_qr_files = qr_files[page_idx:page_idx + qr_per_page]
+            try:
+                job_selection = selection if job.sheet is None else selection.with_sheet(job.sheet)
+                job.output_files = self.run_pipeline(job.file_path, start_row, job.output_dir, batch_size,
+                                                     progress_callback=update, selection=job_selection,
+                                                     **pipeline_options)
+                job.status = "cancelled" if self.stop_event and self.stop_event.is_set() else "done"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                self.logger['error'](ERROR_MESSAGES["BATCH_JOB_FAILED"].format(job.name, str(e)))
+            job.seconds = time.time() - job_start
+            with lock:
+                state['finished'] += 1
+            report(finished_job=True)
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run_job, jobs))
+        
+        elapsed = time.time() - start_time
+        status_text = {"done": "完成", "failed": "失败", "cancelled": "已取消", "pending": "未运行"}
+        for job in jobs:
+            self.logger['info'](INFO_MESSAGES["BATCH_JOB_SUMMARY"].format(
+                job.name, status_text.get(job.status, job.status), job.qr_codes, len(job.output_files), job.seconds
+            ))
+        report_path = os.path.join(output_dir, BATCH_REPORT_NAME)
+        write_batch_report(report_path, jobs, elapsed, self.metrics.snapshot())
+        self.logger['info'](INFO_MESSAGES["BATCH_JOBS_COMPLETE"].format(
+            sum(job.status == "done" for job in jobs), sum(job.status == "failed" for job in jobs),
+            sum(job.status == "cancelled" for job in jobs), state['qr_codes'], state['pages'], elapsed,
+            state['qr_codes'] / elapsed if elapsed > 0 else 0.0, report_path
+        ))
+        return jobs
+    
+    def create_pdf_document(self, qr_results: Iterable[Tuple], output_dir: str, qr_length_cm: float = DEFAULT_QR_LENGTH,
+                            title: str = "物料S/N清单", progress_callback=None) -> str:
+        """
+        创建多页PDF文档，二维码以矢量图形写入，版面与A4图片相同
+        
+        二维码结果按顺序逐个读取，凑满一页即写入文件，可以直接接在流水线的二维码生成阶段之后。
+        
+        Args:
+            qr_results (Iterable[Tuple]): 按顺序排列的二维码生成结果（压缩的模块矩阵和索引范围）
+            output_dir (str): 输出目录路径
+            qr_length_cm (float): 二维码边长，单位厘米
+            title (str): 页面标题
+            progress_callback (callable, optional): 每写完一页调用一次，参数为已写入的页数
+        
+        Returns:
+            str: 生成的PDF文档路径，没有可写入的二维码时返回空字符串
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        
+        rows, cols = self._calculate_page_layout(qr_length_cm, title)
+        
+        # PDF阅读器内置标题字体，标题高度固定为字体大小，版面与使用中文字体的A4图片相同
+        title_margin = TITLE_FONT_SIZE + 250 if title else 0
+        cells, cell_width, cell_height = _page_cells(title_margin, rows, cols)
+        
+        # 版面按600 DPI的像素计算，换算为PDF的点（1/72英寸），纵坐标原点在页面左下角
+        scale = 72 / IMAGE_DPI
+        page_width = A4_WIDTH * scale
+        page_height = A4_HEIGHT * scale
+        cell_width *= scale
+        cell_height *= scale
+        
+        header = b""
+        if title:
+            font_size = TITLE_FONT_SIZE * scale
+            title_x = (page_width - title_width(title, font_size)) / 2
+            title_y = MARGIN_PIXELS + 100  # 标题上方留出100像素的额外空白
+            baseline = page_height - title_y * scale - font_size * TITLE_FONT_ASCENT
+            header = title_operators(title, title_x, baseline, font_size, TEXT_COLOR)
+        
+        self.logger['info'](INFO_MESSAGES["START_PDF_GENERATION"])
+        start_time = time.time()
+        
+        output_file = os.path.join(output_dir, "二维码清单.pdf")
+        with PdfWriter(output_file, page_width, page_height, title_font=bool(title)) as writer:
+            for group in _iter_chunks(qr_results, rows * cols):
+                # 检查是否需要取消
+                if self.stop_event and self.stop_event.is_set():
+                    break
                 
-                # 添加分页符（除了第一页）
-                if page_idx > 0:
-                    doc.add_page_break()
+                content = [header]
+                image_masks = {}
+                # 二维码转换为矢量路径或图像掩模，计入光栅化阶段
+                with self.metrics.timer("rasterize"):
+                    for idx, ((qr_source, start_num, end_num, _), (x, y)) in enumerate(zip(group, cells)):
+                        try:
+                            if PDF_QR_RENDERING == "image":
+                                name = f"Q{idx}"
+                                content.append(qr_image_operators(name, qr_source, x * scale, page_height - y * scale,
+                                                                  cell_width, cell_height, QR_BORDER, QR_FILL_COLOR))
+                                image_masks[name] = qr_source
+                            else:
+                                content.append(qr_operators(qr_source, x * scale, page_height - y * scale,
+                                                            cell_width, cell_height, QR_BORDER, QR_FILL_COLOR))
+                        except Exception as e:
+                            self.logger['error'](f"添加二维码 {start_num}-{end_num} 到PDF文档时出错: {e}")
+                with self.metrics.timer("save"):
+                    writer.add_page(b"".join(content), image_masks)
+                self.metrics.count("pages_written")
                 
-                # 创建表格来放置二维码
-                rows = math.ceil(len(page_qr_files) / cols)
-                table = doc.add_table(rows=rows, cols=cols)
-                table.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                if progress_callback:
+                    progress_callback(writer.page_count)
+            page_count = writer.page_count
+        
+        if not page_count:
+            os.remove(output_file)
+            return ""
+        
+        self.metrics.add_file(output_file)
+        info_msg = INFO_MESSAGES["PDF_GENERATION_COMPLETE"].format(page_count, time.time() - start_time)
+        self.logger['info'](info_msg)
+        return output_file
+    
+    def create_docx_document(self, qr_results: Iterable[Tuple], output_dir: str, qr_length_cm: float = DEFAULT_QR_LENGTH,
+                             title: str = "物料S/N清单", progress_callback=None,
+                             pages_per_file: int = DOCX_PAGES_PER_FILE) -> List[str]:
+        """
+        创建Word文档，将二维码以表格形式排列，方便用户自行排版
+        
+        二维码结果按顺序逐个读取，凑满一页即在图像执行池中编码为PNG并写入文件，
+        可以直接接在流水线的二维码生成阶段之后。
+        
+        Args:
+            qr_results (Iterable[Tuple]): 按顺序排列的二维码生成结果（压缩的模块矩阵和索引范围）
+            output_dir (str): 输出目录路径
+            qr_length_cm (float): 二维码边长，单位厘米
+            title (str): 文档标题，每个文件的开头各有一个
+            progress_callback (callable, optional): 每写完一页调用一次，参数为已写入的页数
+            pages_per_file (int): 每个文件的页数，0表示所有页面写入同一个文件
+            
+        Returns:
+            List[str]: 按顺序排列的Word文档路径列表
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # 计算每页二维码数量（以A4纸为基准）
+        # 假设页面宽度约为21厘米，左右边距各1厘米，实际可用宽度约为19厘米
+        page_width_cm = 19
+        # 假设页面高度约为29.7厘米，上下边距各1厘米，实际可用高度约为27.7厘米
+        page_height_cm = 27.7
+        
+        # 每行、每列可以放置的二维码数量，二维码之间留0.5厘米间隔
+        cols = max(1, int(page_width_cm // (qr_length_cm + 0.5)))
+        rows = max(1, int(page_height_cm // (qr_length_cm + 0.5)))
+        
+        self.logger['info'](INFO_MESSAGES["START_DOCX_GENERATION"])
+        start_time = time.time()
+        
+        output_files = []
+        writer = None
+        part_path = os.path.join(output_dir, "二维码清单.docx.part")
+        first_num = last_num = None
+        page_count = 0
+        
+        def finish_file():
+            with self.metrics.timer("save"):
+                writer.close()
+            if pages_per_file:
+                name = f"二维码清单_{first_num}-{last_num}.docx"
+            else:
+                name = "二维码清单.docx"
+            output_file = os.path.join(output_dir, name)
+            os.replace(part_path, output_file)
+            output_files.append(output_file)
+            self.metrics.add_file(output_file)
+            self.logger['info'](INFO_MESSAGES["DOCX_FILE_GENERATED"].format(output_file))
+        
+        page_tasks = ((group, qr_length_cm) for group in _iter_chunks(qr_results, rows * cols))
+        try:
+            for (group, _), future in self._iter_bounded(self.image_pool, render_docx_page, page_tasks,
+                                                         PIPELINE_PAGE_QUEUE_DEPTH, "rasterize"):
+                try:
+                    pictures, errors = future.result()
+                except concurrent.futures.CancelledError:
+                    continue
+                except Exception as e:
+                    self.logger['error'](f"生成Word文档第{page_count + 1}页时出错: {e}")
+                    continue
+                for error in errors:
+                    self.logger['error'](error)
                 
-                # 调整表格列宽
-                for col in table.columns:
-                    col.width = Cm(qr_length_cm + 0.5)
+                if writer is None:
+                    writer = DocxWriter(part_path)
+                    first_num = group[0][1]
+                    if title:
+                        writer.add_title(title)
+                with self.metrics.timer("save"):
+                    writer.add_page(pictures, cols, qr_length_cm + 0.5, qr_length_cm)
+                last_num = group[-1][2]
+                page_count += 1
+                self.metrics.count("pages_written")
                 
-                # 填充表格
-                for idx, qr_tuple in enumerate(page_qr_files):
-                    # 解包元组，只获取前3个元素（忽略线程ID）
-                    qr_file, start_idx, end_idx = qr_tuple[:3]
-                    row_idx = idx // cols
-                    col_idx = idx % cols
-                    
-                    # 获取单元格
-                    cell = table.cell(row_idx, col_idx)
-                    
-                    # 在单元格中添加二维码图片
-                    try:
-                        # 计算图片在Word中的大小（厘米）
-                        qr_length_inches = qr_length_cm / 2.54
-                        cell.paragraphs[0].add_run().add_picture(qr_file, width=Inches(qr_length_inches))
-                        
-                        # 在图片下方添加编号（可选）
-                        # run = cell.paragraphs[0].add_run(f"{start_idx}-{end_idx}")
-                        # run.font.size = Pt(8)
-                        
-                        # 居中对齐
-                        cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    except Exception as e:
-                        self.logger['error'](f"添加二维码 {qr_file} 到Word文档时出错: {e}")
-                        continue
-            
-            # 保存Word文档
-            output_file = os.path.join(output_dir, "二维码清单.docx")
-            doc.save(output_file)
+                if pages_per_file and writer.page_count >= pages_per_file:
+                    finish_file()
+                    writer = None
+                
+                if progress_callback:
+                    progress_callback(page_count)
             
-            self.logger['info'](f"Word文档已生成: {output_file}")
-            return output_file
+            if writer is not None:
+                finish_file()
         except Exception as e:
-            error_msg = f"生成Word文档时出错: {str(e)}"
-            self.logger['error'](error_msg)
-            return ""
+            if writer is not None:
+                writer.close()
+                os.remove(part_path)
+            self.logger['error'](f"生成Word文档时出错: {str(e)}")
+            return output_files
+        
+        info_msg = INFO_MESSAGES["DOCX_GENERATION_TIME"].format(page_count, len(output_files), time.time() - start_time)
+        self.logger['info'](info_msg)
+        return output_files
+    
+    def export_metrics(self, jsonl_path: Optional[str] = METRICS_JSONL_PATH,
+                       prometheus_path: Optional[str] = METRICS_PROMETHEUS_PATH,
+                       labels: Optional[Dict[str, str]] = None):
+        """
+        导出本次运行的指标
+        
+        Args:
+            jsonl_path (str, optional): 追加一行JSON的文件路径，为None时不导出
+            prometheus_path (str, optional): Prometheus文本格式文件路径，为None时不导出
+            labels (Dict[str, str], optional): 附加到指标上的标签，如执行后端和输出格式
+        """
+        labels = {"backend": self.backend, **(labels or {})}
+        for path, write in ((jsonl_path, self.metrics.write_jsonl), (prometheus_path, self.metrics.write_prometheus)):
+            if not path:
+                continue
+            try:
+                write(path, labels)
+                self.logger['info'](INFO_MESSAGES["METRICS_EXPORTED"].format(path))
+            except Exception as e:
+                self.logger['error'](ERROR_MESSAGES["METRICS_EXPORT_ERROR"].format(str(e)))
     
     def shutdown(self):
         """
-        关闭线程池，释放资源
+        关闭执行池，释放资源
         
-        在线程池不再需要时调用此方法，确保资源被正确释放
+        在执行池不再需要时调用此方法，确保资源被正确释放
         """
-        # 关闭二维码生成线程池
-        if hasattr(self, 'qr_thread_pool'):
-            self.qr_thread_pool.shutdown(wait=True)
+        # 关闭二维码生成执行池
+        self._shutdown_qr_pool()
+        
+        # 关闭图像处理执行池
+        self._shutdown_image_pool()
         
-        # 关闭图像处理线程池
-        if hasattr(self, 'image_thread_pool'):
-            self.image_thread_pool.shutdown(wait=True)
-            # 移除了错误的error_msg日志调用，因为error_msg只在异常情况下定义
+        # 写入并关闭二维码缓存
+        if self.qr_cache is not None:
+            self.qr_cache.close()
         
         # 不记录完成时间，因为start_time变量在shutdown方法中未定义
         info_msg = INFO_MESSAGES["SHUTDOWN_COMPLETE"]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SVG页面输出
+
+每页A4生成一个SVG文件。每个二维码绘制为一条合并后的<path>：
+每行连续的黑色模块编码为一个子路径。三个位置探测图形在所有二维码中完全相同，
+只在<defs>中定义一次<symbol>，各二维码通过<use>引用。
+页面坐标沿用600 DPI的像素，浏览器可直接显示，打印时按任意分辨率缩放。
+"""
+
+from typing import Iterable, List, Tuple
+from xml.sax.saxutils import escape
+
+from core.qr_matrix import PackedMatrix, module_runs, unpack_matrix
+
+# 位置探测图形：7×7外框、3×3中心，奇偶填充规则挖出中间的白色环
+FINDER_SYMBOL = (
+    '<symbol id="finder" viewBox="0 0 7 7">'
+    '<path d="M0 0h7v7h-7zM1 1v5h5v-5zM2 2h3v3h-3z" fill-rule="evenodd"/>'
+    '</symbol>'
+)
+FINDER_SIZE = 7
+
+
+def _finder_origins(size: int) -> Tuple[Tuple[int, int], ...]:
+    """三个位置探测图形左上角的模块坐标（列, 行）"""
+    return (0, 0), (size - FINDER_SIZE, 0), (0, size - FINDER_SIZE)
+
+
+def qr_path_data(matrix: PackedMatrix) -> str:
+    """
+    把模块矩阵中位置探测图形以外的黑色模块编码为SVG路径数据
+
+    Args:
+        matrix (PackedMatrix): 压缩的模块矩阵（不含边框）
+
+    Returns:
+        str: 以模块为单位的路径数据，每行连续的黑色模块为一个矩形子路径
+    """
+    modules = unpack_matrix(matrix)
+    for col, row in _finder_origins(matrix.size):
+        modules[row:row + FINDER_SIZE, col:col + FINDER_SIZE] = False
+    rows, starts, lengths = module_runs(modules)
+    return "".join(
+        f"M{x} {y}h{n}v1h-{n}z" for x, y, n in zip(starts.tolist(), rows.tolist(), lengths.tolist())
+    )
+
+
+def qr_element(matrix: PackedMatrix, x: float, y: float, width: float, height: float, border: int) -> str:
+    """
+    生成绘制一个二维码的SVG元素
+
+    Args:
+        matrix (PackedMatrix): 压缩的模块矩阵（不含边框）
+        x (float): 二维码（含边框）左边缘横坐标
+        y (float): 二维码（含边框）上边缘纵坐标
+        width (float): 二维码（含边框）宽度
+        height (float): 二维码（含边框）高度
+        border (int): 边框宽度，单位为模块
+
+    Returns:
+        str: 以模块为单位坐标的<g>元素
+    """
+    total = matrix.size + 2 * border
+    # href是SVG 2的写法，SVG 1.1的阅读器和转换工具只识别xlink:href，两者都写出
+    finders = "".join(
+        f'<use href="#finder" xlink:href="#finder" x="{col}" y="{row}" '
+        f'width="{FINDER_SIZE}" height="{FINDER_SIZE}"/>'
+        for col, row in _finder_origins(matrix.size)
+    )
+    return (
+        f'<g transform="translate({x + width * border / total:g} {y + height * border / total:g}) '
+        f'scale({width / total:g} {height / total:g})">'
+        f'{finders}<path d="{qr_path_data(matrix)}"/></g>\n'
+    )
+
+
+def write_svg_page(path: str, page_width: int, page_height: int, width_mm: float, height_mm: float,
+                   qr_elements: Iterable[str], title: str = "", title_x: float = 0, title_y: float = 0,
+                   font_size: float = 0, fill_color: str = "black", text_color: str = "black",
+                   background_color: str = "white") -> None:
+    """
+    写出一页SVG
+
+    Args:
+        path (str): 输出文件路径
+        page_width (int): 页面宽度（用户坐标单位）
+        page_height (int): 页面高度（用户坐标单位）
+        width_mm (float): 页面实际宽度，单位毫米
+        height_mm (float): 页面实际高度，单位毫米
+        qr_elements (Iterable[str]): qr_element生成的二维码元素
+        title (str): 页面标题，为空时不绘制
+        title_x (float): 标题中心横坐标
+        title_y (float): 标题基线纵坐标
+        font_size (float): 标题字号
+        fill_color (str): 二维码颜色
+        text_color (str): 标题颜色
+        background_color (str): 背景颜色
+    """
+    parts: List[str] = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{width_mm:g}mm" height="{height_mm:g}mm" viewBox="0 0 {page_width} {page_height}">\n',
+        f'<defs>{FINDER_SYMBOL}</defs>\n',
+        f'<rect width="100%" height="100%" fill="{escape(background_color)}"/>\n',
+    ]
+    if title:
+        parts.append(
+            f'<text x="{title_x:g}" y="{title_y:g}" font-size="{font_size:g}" text-anchor="middle" '
+            f'font-family="SimHei, Microsoft YaHei, STSong, sans-serif" fill="{escape(text_color)}">'
+            f'{escape(title)}</text>\n'
+        )
+    parts.append(f'<g fill="{escape(fill_color)}" shape-rendering="crispEdges">\n')
+    parts.extend(qr_elements)
+    parts.append('</g>\n</svg>\n')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("".join(parts))
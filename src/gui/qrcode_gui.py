@@ -7,6 +7,7 @@
 import os
 import sys
 import threading
+import multiprocessing
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from datetime import datetime
@@ -21,15 +22,15 @@ if src_path not in sys.path:
     sys.path.append(src_path)
 
 # 从core模块导入
-from core.qrcode_processor import qr_processor, set_cancel_event, clear_cancel_event
+from core.qrcode_processor import qr_processor, set_cancel_event, clear_cancel_event, InputSelection
 from core.config import (
     APP_NAME, APP_GEOMETRY, RESIZABLE_WIDTH, RESIZABLE_HEIGHT,
     UI_FONT, DEFAULT_START_ROW, DEFAULT_OUTPUT_DIR, BATCH_SIZE_EXCEL,
-    DEFAULT_QR_LENGTH, QR_PER_IMAGE, get_temp_qr_dir,
+    DEFAULT_QR_LENGTH, SAVE_QR_FILES, EXECUTOR_BACKEND, QR_CACHE_ENABLED,
+    PAGE_IMAGE_MODE, PAGE_IMAGE_FORMAT, INPUT_FORMATS, get_temp_qr_dir,
     ERROR_TITLES, ERROR_MESSAGES, WARNING_TITLES, WARNING_MESSAGES,
-    INFO_MESSAGES, SUCCESS_TITLES, SUCCESS_MESSAGES
+    INFO_MESSAGES, SUCCESS_TITLES, SUCCESS_MESSAGES, STARTUP_BENCHMARK_ENV
 )
-from core.qrcode_processor import DOCX_AVAILABLE
 
 class QRCodeGeneratorGUI:
     def __init__(self, root):
@@ -44,12 +45,24 @@ class QRCodeGeneratorGUI:
         
         # 变量
         self.excel_file_path = tk.StringVar()
+        self.input_format_var = tk.StringVar(value="auto")  # 输入格式，auto为按文件扩展名判断
+        self.sheet_var = tk.StringVar()  # 工作表名称或序号，为空时读取第一个工作表
+        self.columns_var = tk.StringVar()  # 组成二维码内容的列，多列以逗号分隔，为空时读取第1列
+        self.template_var = tk.StringVar()  # 二维码内容模板，如"{型号}-{SN}"
         self.start_row_var = tk.StringVar(value=str(DEFAULT_START_ROW))
         self.output_dir_var = tk.StringVar(value=DEFAULT_OUTPUT_DIR)
         self.batch_size_var = tk.StringVar(value=str(BATCH_SIZE_EXCEL))
         self.qr_length_var = tk.StringVar(value=str(DEFAULT_QR_LENGTH))  # 二维码边长，单位厘米
         self.title_var = tk.StringVar(value="物料S/N清单")  # A4页面标题，默认为"物料S/N清单"
         self.output_format_var = tk.StringVar(value="image")  # 输出格式，默认为图片
+        self.pipeline_var = tk.BooleanVar(value=False)  # 流水线模式，读取、生成和排版同时进行
+        self.resume_var = tk.BooleanVar(value=False)  # 续传输出目录中中断的同一任务
+        self.incremental_var = tk.BooleanVar(value=False)  # Excel内容变化后只重新生成变化的页面
+        self.save_qr_files_var = tk.BooleanVar(value=SAVE_QR_FILES)  # 是否保存单个二维码图片
+        self.qr_cache_var = tk.BooleanVar(value=QR_CACHE_ENABLED)  # 是否使用跨运行的二维码编码缓存
+        self.backend_var = tk.StringVar(value=EXECUTOR_BACKEND)  # 执行后端：多线程或多进程
+        self.page_mode_var = tk.StringVar(value=PAGE_IMAGE_MODE)  # A4页面图片模式：彩色、灰度或黑白
+        self.page_format_var = tk.StringVar(value=PAGE_IMAGE_FORMAT)  # A4页面文件格式：PNG、TIFF或SVG
         
         # 标志变量
         self.is_generating = False
@@ -78,11 +91,11 @@ class QRCodeGeneratorGUI:
         main_frame.pack(fill=tk.BOTH, expand=True)
         main_frame.pack_propagate(False)
         
-        # 第一行：Excel文件选择
+        # 第一行：输入文件选择（Excel、CSV、TSV或纯文本）
         file_frame = ttk.Frame(main_frame)
         file_frame.pack(fill=tk.X, pady=(0, 10))
         
-        ttk.Label(file_frame, text="Excel文件：", font=self.font).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Label(file_frame, text="输入文件：", font=self.font).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Entry(file_frame, textvariable=self.excel_file_path, width=50, font=self.font).pack(side=tk.LEFT, fill=tk.X, expand=True)
         ttk.Button(file_frame, text="浏览...", command=self._browse_excel_file).pack(side=tk.RIGHT, padx=(5, 0))
         
@@ -105,24 +118,72 @@ class QRCodeGeneratorGUI:
         ttk.Entry(settings_frame, textvariable=self.qr_length_var, width=10, font=self.font).grid(row=1, column=1, padx=5, pady=5)
         
         # 输出格式设置
-        if DOCX_AVAILABLE:
-            ttk.Label(settings_frame, text="输出格式：", font=self.font).grid(row=1, column=2, padx=(20, 5), pady=5, sticky=tk.W)
-            output_format_frame = ttk.Frame(settings_frame)
-            output_format_frame.grid(row=1, column=3, padx=5, pady=5, sticky=tk.W)
-            
-            # 添加单选按钮组
-            ttk.Radiobutton(output_format_frame, text="图片", variable=self.output_format_var, value="image", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
-            ttk.Radiobutton(output_format_frame, text="Word文档", variable=self.output_format_var, value="docx", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
-        else:
-            # 如果python-docx库不可用，隐藏Word文档选项
-            ttk.Label(settings_frame, text="输出格式：图片 (Word文档功能需要python-docx库)", font=self.font).grid(row=1, column=2, columnspan=2, padx=(20, 5), pady=5, sticky=tk.W)
-            # 确保输出格式为图片
-            self.output_format_var.set("image")
+        ttk.Label(settings_frame, text="输出格式：", font=self.font).grid(row=1, column=2, padx=(20, 5), pady=5, sticky=tk.W)
+        output_format_frame = ttk.Frame(settings_frame)
+        output_format_frame.grid(row=1, column=3, padx=5, pady=5, sticky=tk.W)
+        
+        # 添加单选按钮组
+        ttk.Radiobutton(output_format_frame, text="图片", variable=self.output_format_var, value="image", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(output_format_frame, text="PDF", variable=self.output_format_var, value="pdf", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(output_format_frame, text="Word文档", variable=self.output_format_var, value="docx", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
         
         # A4页面标题设置
         ttk.Label(settings_frame, text="A4页面标题：", font=self.font).grid(row=2, column=0, padx=(0, 5), pady=5, sticky=tk.W)
         ttk.Entry(settings_frame, textvariable=self.title_var, width=40, font=self.font).grid(row=2, column=1, columnspan=3, padx=5, pady=5)
         
+        # 流水线模式设置（对所有输出格式生效）
+        ttk.Checkbutton(settings_frame, text="流水线模式", variable=self.pipeline_var).grid(row=2, column=4, padx=(20, 5), pady=5, sticky=tk.W)
+        
+        # 断点续传设置：只生成上次中断时缺失的页面，按流水线模式运行
+        ttk.Checkbutton(settings_frame, text="断点续传", variable=self.resume_var).grid(row=2, column=5, padx=5, pady=5, sticky=tk.W)
+        
+        # 增量更新设置：Excel内容变化后只重新生成变化的页面
+        ttk.Checkbutton(settings_frame, text="增量更新", variable=self.incremental_var).grid(row=2, column=6, padx=5, pady=5, sticky=tk.W)
+        
+        # 是否保存单个二维码图片（默认只在内存中传递）
+        ttk.Checkbutton(settings_frame, text="保存单个二维码图片", variable=self.save_qr_files_var).grid(row=1, column=4, columnspan=3, padx=(20, 5), pady=5, sticky=tk.W)
+        
+        # 执行后端设置
+        ttk.Label(settings_frame, text="执行方式：", font=self.font).grid(row=3, column=0, padx=(0, 5), pady=5, sticky=tk.W)
+        backend_frame = ttk.Frame(settings_frame)
+        backend_frame.grid(row=3, column=1, columnspan=3, padx=5, pady=5, sticky=tk.W)
+        ttk.Radiobutton(backend_frame, text="多线程", variable=self.backend_var, value="thread", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(backend_frame, text="多进程", variable=self.backend_var, value="process", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        
+        # 二维码缓存设置，与命令行共用同一份缓存
+        ttk.Checkbutton(settings_frame, text="使用二维码缓存", variable=self.qr_cache_var).grid(row=3, column=4, columnspan=3, padx=(20, 5), pady=5, sticky=tk.W)
+        
+        # A4页面图片模式和文件格式设置，黑白模式内存占用最小、生成最快
+        ttk.Label(settings_frame, text="页面模式：", font=self.font).grid(row=4, column=0, padx=(0, 5), pady=5, sticky=tk.W)
+        page_mode_frame = ttk.Frame(settings_frame)
+        page_mode_frame.grid(row=4, column=1, columnspan=3, padx=5, pady=5, sticky=tk.W)
+        ttk.Radiobutton(page_mode_frame, text="彩色", variable=self.page_mode_var, value="RGB", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(page_mode_frame, text="灰度", variable=self.page_mode_var, value="L", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(page_mode_frame, text="黑白", variable=self.page_mode_var, value="1", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(settings_frame, text="页面格式：", font=self.font).grid(row=4, column=4, padx=(20, 5), pady=5, sticky=tk.W)
+        page_format_frame = ttk.Frame(settings_frame)
+        page_format_frame.grid(row=4, column=5, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        ttk.Radiobutton(page_format_frame, text="PNG", variable=self.page_format_var, value="png", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(page_format_frame, text="TIFF", variable=self.page_format_var, value="tiff", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(page_format_frame, text="SVG", variable=self.page_format_var, value="svg", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        
+        # 输入文件格式设置，默认按文件扩展名选择读取器
+        ttk.Label(settings_frame, text="输入格式：", font=self.font).grid(row=5, column=0, padx=(0, 5), pady=5, sticky=tk.W)
+        input_format_frame = ttk.Frame(settings_frame)
+        input_format_frame.grid(row=5, column=1, columnspan=6, padx=5, pady=5, sticky=tk.W)
+        ttk.Radiobutton(input_format_frame, text="自动", variable=self.input_format_var, value="auto", style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        for input_format in INPUT_FORMATS:
+            ttk.Radiobutton(input_format_frame, text=input_format.upper(), variable=self.input_format_var, value=input_format, style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+        
+        # 工作表和列的选择、多列组合的内容模板，均为空时读取第一个工作表的第一列
+        ttk.Label(settings_frame, text="工作表：", font=self.font).grid(row=6, column=0, padx=(0, 5), pady=5, sticky=tk.W)
+        ttk.Entry(settings_frame, textvariable=self.sheet_var, width=10, font=self.font).grid(row=6, column=1, padx=5, pady=5)
+        ttk.Label(settings_frame, text="列：", font=self.font).grid(row=6, column=2, padx=(20, 5), pady=5, sticky=tk.W)
+        ttk.Entry(settings_frame, textvariable=self.columns_var, width=30, font=self.font).grid(row=6, column=3, padx=5, pady=5)
+        ttk.Label(settings_frame, text="内容模板：", font=self.font).grid(row=6, column=4, padx=(20, 5), pady=5, sticky=tk.W)
+        ttk.Entry(settings_frame, textvariable=self.template_var, width=20, font=self.font).grid(row=6, column=5, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        
         # 第三行：进度条
         progress_frame = ttk.Frame(main_frame)
         progress_frame.pack(fill=tk.X, pady=(0, 10))
@@ -160,14 +221,29 @@ class QRCodeGeneratorGUI:
         self.exit_button.pack(side=tk.RIGHT, padx=5)
     
     def _browse_excel_file(self):
-        """浏览Excel文件"""
+        """浏览输入文件"""
         file_path = filedialog.askopenfilename(
-            title="选择Excel文件",
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+            title="选择输入文件",
+            filetypes=[("Excel files", "*.xlsx *.xlsm *.xls"), ("CSV/TSV files", "*.csv *.tsv *.tab"),
+                       ("Text files", "*.txt"), ("All files", "*.*")]
         )
         if file_path:
             self.excel_file_path.set(file_path)
     
+    def _input_format(self):
+        """选择的输入格式，自动时返回None，由文件扩展名判断"""
+        input_format = self.input_format_var.get()
+        return None if input_format == "auto" else input_format
+    
+    def _input_selection(self):
+        """按界面中填写的工作表、列和内容模板创建读取条件，均为空时返回None"""
+        sheet = self.sheet_var.get().strip() or None
+        columns = [column for column in self.columns_var.get().split(",") if column.strip()]
+        template = self.template_var.get() or None
+        if sheet is None and not columns and template is None:
+            return None
+        return InputSelection(sheet, columns, template)
+    
     def _browse_output_dir(self):
         """浏览输出目录"""
         dir_path = filedialog.askdirectory(title="选择输出目录")
@@ -249,13 +325,27 @@ class QRCodeGeneratorGUI:
             # 设置日志回调函数 - 将批次日志打印到控制台
             qr_processor.set_logger(self._log_console)
             
+            # 按用户选择切换执行后端
+            qr_processor.set_backend(self.backend_var.get())
+            qr_processor.set_page_output(self.page_mode_var.get(), self.page_format_var.get())
+            qr_processor.set_qr_cache(self.qr_cache_var.get())
+            qr_processor.metrics.reset()
+            
+            # 流水线模式：读取、生成二维码和合成A4图片同时进行
+            if self.pipeline_var.get() or self.resume_var.get() or self.incremental_var.get():
+                self._generate_qrcodes_pipelined(excel_file, start_row, output_dir, batch_size, qr_length, title,
+                                                 self.output_format_var.get(), self.resume_var.get(),
+                                                 self.incremental_var.get())
+                return
+            
             # 1. 分批读取Excel文件
             self._log_gui(INFO_MESSAGES["START_EXCEL_READ"].format(start_row))
             self._log_console(INFO_MESSAGES["START_EXCEL_READ"].format(start_row))
             self._update_progress(10, "正在读取Excel文件...")
             
             start_time = time.time()
-            strings = qr_processor.read_excel_in_batches(excel_file, start_row, batch_size)
+            strings = qr_processor.read_excel_in_batches(excel_file, start_row, batch_size, self._input_format(),
+                                                         selection=self._input_selection())
             end_time = time.time()
             
             self._log_gui(INFO_MESSAGES["EXCEL_READ_TIME"].format(end_time - start_time))
@@ -280,8 +370,9 @@ class QRCodeGeneratorGUI:
             temp_qr_dir = get_temp_qr_dir(output_dir)
             
             # 3. 生成二维码
-            # 计算总批次数
-            total_batches = (len(strings) + QR_PER_IMAGE - 1) // QR_PER_IMAGE
+            # 分组一次得到总批次数，分组结果直接用于生成
+            qr_groups = qr_processor.group_qr_strings(strings)
+            total_batches = len(qr_groups)
             self._log_gui(INFO_MESSAGES["START_QR_GENERATION"].format(total_batches))
             self._log_console(INFO_MESSAGES["START_QR_GENERATION"].format(total_batches))
             self._update_progress(40, "开始生成二维码...")
@@ -293,7 +384,8 @@ class QRCodeGeneratorGUI:
                 self._update_progress(progress, f"正在生成二维码...({completed_batches}/{total_batches}批)")
             
             # 将进度更新回调函数传递给处理器
-            qr_files = qr_processor.generate_qr_codes(strings, temp_qr_dir, progress_callback=update_qr_progress)
+            qr_files = qr_processor.generate_qr_codes(strings, temp_qr_dir, progress_callback=update_qr_progress,
+                                                      save_files=self.save_qr_files_var.get(), qr_groups=qr_groups)
             
             self._update_progress(60, "二维码生成完成")
             
@@ -318,6 +410,23 @@ class QRCodeGeneratorGUI:
                 
                 # 取消A4图片生成进度更新定时器
                 self._cancel_progress_timers()
+            elif output_format == "pdf":
+                # 生成PDF文档
+                self._log_gui(INFO_MESSAGES["START_PDF_GENERATION"])
+                self._log_console(INFO_MESSAGES["START_PDF_GENERATION"])
+                self._update_progress(70, INFO_MESSAGES["START_PDF_GENERATION"])
+                
+                # 添加进度更新定时器
+                self.a4_progress = 70  # 初始进度为70%
+                self._update_a4_progress()
+                
+                pdf_file = qr_processor.create_pdf_document(qr_files, output_dir, qr_length_cm=qr_length, title=title)
+                if pdf_file:
+                    self._log_gui(INFO_MESSAGES["PDF_FILE_GENERATED"].format(pdf_file))
+                    self._log_console(INFO_MESSAGES["PDF_FILE_GENERATED"].format(pdf_file))
+                
+                # 取消进度更新定时器
+                self._cancel_progress_timers()
             else:
                 # 生成Word文档
                 self._log_gui(INFO_MESSAGES["START_DOCX_GENERATION"])
@@ -328,11 +437,11 @@ class QRCodeGeneratorGUI:
                 self.a4_progress = 70  # 初始进度为70%
                 self._update_a4_progress()
                 
-                docx_file = qr_processor.create_docx_document(qr_files, output_dir, qr_length_cm=qr_length, title=title)
+                docx_files = qr_processor.create_docx_document(qr_files, output_dir, qr_length_cm=qr_length, title=title)
                 
-                if docx_file:
-                    self._log_gui(INFO_MESSAGES["DOCX_FILE_GENERATED"].format(docx_file))
-                    self._log_console(INFO_MESSAGES["DOCX_FILE_GENERATED"].format(docx_file))
+                if docx_files:
+                    for docx_file in docx_files:
+                        self._log_gui(INFO_MESSAGES["DOCX_FILE_GENERATED"].format(docx_file))
                 else:
                     self._log_gui(INFO_MESSAGES["DOCX_GENERATION_FAILED"])
                     self._log_console(INFO_MESSAGES["DOCX_GENERATION_FAILED"])
@@ -363,6 +472,9 @@ class QRCodeGeneratorGUI:
             self._cancel_progress_timers()
             clear_cancel_event()  # 清除取消事件
             
+            # 按配置导出本次运行的指标，未配置导出路径时不写文件
+            qr_processor.export_metrics(labels={"output_format": self.output_format_var.get()})
+            
             # 恢复按钮状态
             self.is_generating = False
             self.root.after(0, lambda: self.start_button.config(state=tk.NORMAL))
@@ -376,6 +488,49 @@ class QRCodeGeneratorGUI:
             if hasattr(self, '_operation_completed'):
                 delattr(self, '_operation_completed')
     
+    def _generate_qrcodes_pipelined(self, excel_file, start_row, output_dir, batch_size, qr_length, title, output_format="image",
+                                    resume=False, incremental=False):
+        """流水线模式下生成二维码和A4图片、PDF文档或Word文档"""
+        self._log_gui(INFO_MESSAGES["START_PIPELINE"])
+        self._log_console(INFO_MESSAGES["START_PIPELINE"])
+        self._update_progress(10, "正在流水线生成...")
+        
+        # 流式读取时无法预知总量，进度条匀速推进，状态文本显示实际完成数量
+        self.a4_progress = 10
+        self._update_a4_progress()
+        
+        def update_pipeline_progress(completed_qr_codes, completed_pages):
+            self.root.after(0, lambda: self.progress_label.config(
+                text=f"正在流水线生成...(已生成{completed_qr_codes}个二维码，{completed_pages}页)"
+            ))
+        
+        start_time = time.time()
+        page_files = qr_processor.run_pipeline(
+            excel_file, start_row, output_dir, batch_size,
+            qr_length_cm=qr_length, title=title, progress_callback=update_pipeline_progress,
+            save_qr_files=self.save_qr_files_var.get(), output_format=output_format, resume=resume,
+            incremental=incremental, input_format=self._input_format(), selection=self._input_selection()
+        )
+        self._cancel_progress_timers()
+        
+        if self.stop_event.is_set():
+            return
+        
+        if not page_files:
+            self._log_gui(ERROR_MESSAGES["NO_DATA"])
+            self._log_console(ERROR_MESSAGES["NO_DATA"])
+            self._update_progress(0, "没有找到数据")
+            messagebox.showwarning(WARNING_TITLES["NO_DATA"], WARNING_MESSAGES["NO_DATA"])
+            return
+        
+        self._update_progress(100, "完成")
+        
+        self._log_gui(INFO_MESSAGES["COMPLETE"])
+        self._log_console(INFO_MESSAGES["COMPLETE"])
+        self._log_gui(INFO_MESSAGES["TOTAL_TIME"].format(time.time() - start_time))
+        self._log_console(INFO_MESSAGES["TOTAL_TIME"].format(time.time() - start_time))
+        messagebox.showinfo(SUCCESS_TITLES["COMPLETE"], SUCCESS_MESSAGES["COMPLETE"])
+    
     def _cancel_progress_timers(self):
         """取消所有进度条更新定时器"""
         for timer_id in self._progress_timers:
@@ -505,7 +660,13 @@ def main():
     # 绑定窗口关闭事件
     root.protocol("WM_DELETE_WINDOW", on_closing)
     
+    # 测试启动耗时时，窗口绘制完成后立即退出
+    if os.environ.get(STARTUP_BENCHMARK_ENV):
+        root.after_idle(on_closing)
+    
     root.mainloop()
 
 if __name__ == "__main__":
+    # 多进程后端在打包后的程序中需要此调用
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
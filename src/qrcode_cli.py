@@ -5,33 +5,114 @@
 """
 
 import argparse
+import multiprocessing
 import sys
 import os
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import time
-from src.core.qrcode_processor import qr_processor
 from src.core.config import *
 
 
 def main():
     # 解析命令行参数
-    parser = argparse.ArgumentParser(description='从Excel文件生成二维码图片')
-    parser.add_argument('excel_file', help='Excel文件路径')
+    parser = argparse.ArgumentParser(description='从Excel、CSV、TSV或纯文本文件生成二维码图片')
+    parser.add_argument('excel_file', help='输入文件路径（xlsx、xls、csv、tsv或txt）；为目录或通配符时批量生成其中的每个文件')
     parser.add_argument('n', type=int, nargs='?', default=DEFAULT_START_ROW, help=f'从第几行开始读取数据（默认：{DEFAULT_START_ROW}）')
     parser.add_argument('--output_dir', default=DEFAULT_OUTPUT_DIR, help=f'输出目录（默认：{DEFAULT_OUTPUT_DIR}）')
     parser.add_argument('--batch_size', type=int, default=BATCH_SIZE_EXCEL, help=f'分批读取的批次大小（默认：{BATCH_SIZE_EXCEL}）')
+    parser.add_argument('--format', dest='input_format', choices=INPUT_FORMATS, help='输入文件格式（默认按文件扩展名判断）')
+    parser.add_argument('--encoding', default=INPUT_TEXT_ENCODING, help=f'CSV、TSV和纯文本文件的编码（默认：{INPUT_TEXT_ENCODING}）')
+    parser.add_argument('--sheet', help='读取的工作表名称或从1开始的序号（默认：第一个工作表）')
+    parser.add_argument('--sheets', help='批量生成工作簿中的多个工作表，名称或序号以逗号分隔，*表示全部工作表，每个工作表一个任务')
+    parser.add_argument('--jobs', type=int, default=BATCH_JOB_CONCURRENCY, help=f'批量生成时同时运行的任务数，各任务共用同一组执行池（默认：{BATCH_JOB_CONCURRENCY}）')
+    parser.add_argument('--columns', help='组成二维码内容的列，表头名称或从1开始的序号，多列以逗号分隔（默认：第1列）')
+    parser.add_argument('--template', help='二维码内容模板，{0}、{1}依次对应--columns中的列，{列名}引用表头中的列，如"{型号}-{SN}"')
+    parser.add_argument('--where', action='append', default=[], help='筛选条件：列=值、列!=值或列~正则表达式，可指定多次，全部满足的行才生成二维码')
+    parser.add_argument('--output_format', choices=OUTPUT_FORMATS, default="image", help='输出格式：image为A4图片，docx为Word文档，pdf为多页PDF文档（默认：image）')
+    parser.add_argument('--pipeline', action='store_true', help='流水线模式：读取、生成二维码和合成A4图片同时进行，尽快写出第一页')
+    parser.add_argument('--resume', action='store_true', help='续传输出目录中中断的同一任务，只生成缺失的页面（按流水线模式运行）')
+    parser.add_argument('--incremental', action='store_true', help='Excel内容变化后增量更新：只重新生成内容变化的页面，未变化的页面文件保持不变（按流水线模式运行）')
+    parser.add_argument('--backend', choices=EXECUTOR_BACKENDS, default=EXECUTOR_BACKEND, help=f'执行后端：thread为多线程，process为多进程（默认：{EXECUTOR_BACKEND}）')
+    parser.add_argument('--page_mode', choices=PAGE_IMAGE_MODES, default=PAGE_IMAGE_MODE, help=f'A4页面图片模式：RGB为彩色，L为灰度，1为黑白（默认：{PAGE_IMAGE_MODE}）')
+    parser.add_argument('--page_format', choices=PAGE_IMAGE_FORMATS, default=PAGE_IMAGE_FORMAT, help=f'A4页面文件格式，tiff在黑白模式下使用CCITT G4压缩，svg为矢量页面（默认：{PAGE_IMAGE_FORMAT}）')
+    parser.add_argument('--grouping', choices=QR_GROUPINGS, default=QR_GROUPING, help=f'二维码内容分组：fixed为每{QR_PER_IMAGE}个字符串一个二维码，capacity为按目标版本的容量装入尽可能多的字符串，容量按配置中的分段方式QR_SEGMENTATION（当前：{QR_SEGMENTATION}）计算（默认：{QR_GROUPING}）')
+    parser.add_argument('--qr_version', type=int, default=QR_TARGET_VERSION, help=f'capacity分组时每个二维码的目标版本，1~40（默认：{QR_TARGET_VERSION}）')
+    parser.add_argument('--separator', default=QR_SEPARATOR, help=f'同一个二维码中各字符串之间的分隔符；序列号只含大写字母和数字时，用空格或$%%*+-./:之一可使整个内容按字母数字模式编码（默认：{QR_SEPARATOR}）')
+    parser.add_argument('--docx_pages_per_file', type=int, default=DOCX_PAGES_PER_FILE, help=f'Word文档每个文件的页数，超过后另起一个文件，0表示不拆分（默认：{DOCX_PAGES_PER_FILE}）')
+    parser.add_argument('--no_cache', action='store_true', help=f'不使用跨运行的二维码编码缓存（缓存位置：{QR_CACHE_PATH}）')
+    parser.add_argument('--save_qr_files', action='store_true', default=SAVE_QR_FILES, help='把每个二维码另存为PNG文件（保存在输出目录的temp_qr子目录中）')
+    parser.add_argument('--metrics_jsonl', default=METRICS_JSONL_PATH, help='把本次运行的分阶段指标作为一行JSON追加到指定文件')
+    parser.add_argument('--metrics_prom', default=METRICS_PROMETHEUS_PATH, help='把本次运行的指标按Prometheus文本格式写入指定文件（供node exporter的textfile collector采集）')
     args = parser.parse_args()
     
+    # 解析参数之后再导入处理模块，查看帮助或参数有误时不加载图像处理相关的依赖
+    from src.core.qrcode_processor import qr_processor, InputSelection
+    
+    selection = None
+    if args.sheet or args.columns or args.template or args.where:
+        columns = [column for column in (args.columns or "").split(",") if column.strip()]
+        try:
+            selection = InputSelection(args.sheet, columns, args.template, args.where)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    if not 1 <= args.qr_version <= 40:
+        parser.error(ERROR_MESSAGES["INVALID_QR_VERSION"].format(args.qr_version))
+    if not args.separator:
+        parser.error(ERROR_MESSAGES["INVALID_QR_SEPARATOR"])
+    
+    # 输入为目录、通配符或指定了多个工作表时批量生成，每个文件（工作表）输出到单独的子目录
+    batch_mode = bool(args.sheets) or os.path.isdir(args.excel_file) or (
+        not os.path.exists(args.excel_file) and any(char in args.excel_file for char in "*?["))
+    
     try:
         total_start_time = time.time()
         
+        qr_processor.set_backend(args.backend)
+        qr_processor.set_page_output(args.page_mode, args.page_format)
+        qr_processor.set_qr_cache(QR_CACHE_ENABLED and not args.no_cache)
+        qr_processor.set_qr_grouping(args.grouping, args.qr_version, args.separator)
+        qr_processor.metrics.reset()
+        
+        if batch_mode:
+            from src.core.batch_jobs import expand_batch_jobs
+            sheets = [sheet.strip() for sheet in args.sheets.split(",") if sheet.strip()] if args.sheets else None
+            jobs = expand_batch_jobs(args.excel_file, args.output_dir, sheets, args.input_format)
+            jobs = qr_processor.run_batch_jobs(jobs, args.output_dir, args.n, args.batch_size, concurrency=args.jobs,
+                                               selection=selection, save_qr_files=args.save_qr_files,
+                                               output_format=args.output_format,
+                                               docx_pages_per_file=args.docx_pages_per_file, resume=args.resume,
+                                               incremental=args.incremental, input_format=args.input_format,
+                                               encoding=args.encoding)
+            print(INFO_MESSAGES["TOTAL_TIME"].format(time.time() - total_start_time))
+            if any(job.status == "failed" for job in jobs):
+                sys.exit(1)
+            return
+        
+        # 流水线模式支持所有输出格式，续传和增量更新依赖流水线记录的任务清单
+        if args.pipeline or args.resume or args.incremental:
+            page_files = qr_processor.run_pipeline(args.excel_file, args.n, args.output_dir, args.batch_size,
+                                                   save_qr_files=args.save_qr_files, output_format=args.output_format,
+                                                   docx_pages_per_file=args.docx_pages_per_file, resume=args.resume,
+                                                   incremental=args.incremental, input_format=args.input_format,
+                                                   encoding=args.encoding, selection=selection)
+            if not page_files:
+                print(ERROR_MESSAGES["NO_DATA"])
+                return
+            
+            total_end_time = time.time()
+            info_msg = INFO_MESSAGES["TOTAL_TIME"].format(total_end_time - total_start_time)
+            print(info_msg)
+            return
+        
         # 1. 分批读取Excel文件
         info_msg = INFO_MESSAGES["START_EXCEL_READ"].format(args.n)
         print(info_msg)
         
         start_time = time.time()
-        strings = qr_processor.read_excel_in_batches(args.excel_file, args.n, args.batch_size)
+        strings = qr_processor.read_excel_in_batches(args.excel_file, args.n, args.batch_size,
+                                                     args.input_format, args.encoding, selection)
         end_time = time.time()
         
         info_msg = INFO_MESSAGES["EXCEL_READ_TIME"].format(end_time - start_time)
@@ -49,11 +130,21 @@ def main():
         
         # 3. 生成二维码
         print(INFO_MESSAGES["START_QR_GENERATION"])
-        qr_files = qr_processor.generate_qr_codes(strings, temp_qr_dir)
+        qr_files = qr_processor.generate_qr_codes(strings, temp_qr_dir, save_files=args.save_qr_files)
         
-        # 4. 生成A4图片
-        print(INFO_MESSAGES["START_IMAGE_GENERATION"])
-        qr_processor.create_a4_image(qr_files, args.output_dir)
+        # 4. 根据输出格式生成相应的文件
+        if args.output_format == "pdf":
+            pdf_file = qr_processor.create_pdf_document(qr_files, args.output_dir)
+            if pdf_file:
+                print(INFO_MESSAGES["PDF_FILE_GENERATED"].format(pdf_file))
+        elif args.output_format == "docx":
+            docx_files = qr_processor.create_docx_document(qr_files, args.output_dir,
+                                                           pages_per_file=args.docx_pages_per_file)
+            if not docx_files:
+                print(INFO_MESSAGES["DOCX_GENERATION_FAILED"])
+        else:
+            print(INFO_MESSAGES["START_IMAGE_GENERATION"])
+            qr_processor.create_a4_image(qr_files, args.output_dir)
         
         total_end_time = time.time()
         info_msg = INFO_MESSAGES["TOTAL_TIME"].format(total_end_time - total_start_time)
@@ -63,6 +154,10 @@ def main():
         error_msg = ERROR_MESSAGES["GENERAL_ERROR"].format(str(e))
         print(error_msg)
         raise
+    finally:
+        qr_processor.export_metrics(args.metrics_jsonl, args.metrics_prom, {"output_format": args.output_format})
 
 if __name__ == "__main__":
+    # 多进程后端在Windows和打包后的程序中需要此调用
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
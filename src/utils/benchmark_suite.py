@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段性能测试
+
+按固定随机种子生成不同规模的测试数据，分别测量读取Excel、二维码编码、二维码光栅化、
+A4页面合成和各种输出格式的耗时，以及多线程流水线的端到端耗时。
+每个阶段报告吞吐量（行/秒、页/秒）、每个处理单元耗时的百分位数和阶段内的峰值内存（RSS），
+结果以JSON输出，可以保存下来逐个版本对比，发现性能退化。
+
+各阶段（流水线除外）在当前线程中依次执行，不经过执行池，单元耗时不受线程调度影响。
+测试期间不使用二维码缓存。
+
+用法:
+    python src/utils/benchmark_suite.py
+    python src/utils/benchmark_suite.py --sizes 1000,10000,100000 --output bench.json
+    python src/utils/benchmark_suite.py --stages excel_read,qr_encode
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(project_root, 'src'))
+
+import openpyxl
+
+from core.config import (
+    QR_PER_IMAGE, QR_GROUPING, QR_SEPARATOR, QR_SEGMENTATION, DEFAULT_QR_LENGTH, THREAD_CHUNK_SIZE, MAX_WORKERS, QR_ENCODER
+)
+from core.qr_payload import iter_qr_groups
+from core.qr_matrix import encode_qr_modules_batch, pack_matrix, render_qr_cell
+from core.qrcode_processor import QRCodeProcessor, compose_a4_page, get_page_template
+
+DATASET_SEED = 20240501  # 测试数据的随机种子，保证每次生成的数据相同
+DEFAULT_SIZES = (1000, 10000)
+READ_BATCH_SIZE = 1000
+TITLE = "物料S/N清单"
+# A4页面的输出格式：(页面模式, 文件格式)，RGB/png即默认的页面合成
+PAGE_OUTPUTS = (("RGB", "png"), ("L", "png"), ("1", "png"), ("1", "tiff"), ("RGB", "svg"))
+STAGES = ("excel_read", "qr_encode", "rasterize", "compose_page", "page_outputs", "pdf", "docx", "pipeline")
+
+
+def current_rss():
+    """当前进程的常驻内存（字节），无法获取时返回None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                    'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage'
+                )
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+    return None
+
+
+class RssSampler:
+    """在后台线程中定期采样常驻内存，记录阶段内的峰值"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def percentiles(samples):
+    """单元耗时的统计（毫秒），百分位数按最近秩法计算"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": rank(50), "p90_ms": rank(90), "p99_ms": rank(99), "max_ms": ordered[-1] * 1000,
+    }
+
+
+class StageTimer:
+    """测量一个阶段：总耗时、每个处理单元的耗时和峰值内存"""
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.samples = []
+        self._last = None
+
+    def __enter__(self):
+        self._start_rss = current_rss()
+        self._sampler = RssSampler().__enter__()
+        self.start = self._last = time.perf_counter()
+        return self
+
+    def lap(self):
+        """记录一个处理单元完成，耗时为距上一个单元完成（或阶段开始）的时间"""
+        now = time.perf_counter()
+        self.samples.append(now - self._last)
+        self._last = now
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.start
+        self._sampler.__exit__(exc_type, exc, tb)
+        return False
+
+    def result(self, rows, pages=None, **extra):
+        report = {
+            "stage": self.name,
+            "seconds": self.elapsed,
+            "rows": rows,
+            "rows_per_s": rows / self.elapsed if self.elapsed > 0 else None,
+            "latency_unit": self.unit,
+            "latency": percentiles(self.samples),
+            "start_rss_mb": _megabytes(self._start_rss),
+            "peak_rss_mb": _megabytes(self._sampler.peak),
+        }
+        if pages is not None:
+            report["pages"] = pages
+            report["pages_per_s"] = pages / self.elapsed if self.elapsed > 0 else None
+        report.update(extra)
+        return report
+
+
+def _megabytes(size):
+    return size / 1024 / 1024 if size is not None else None
+
+
+def generate_dataset(path, rows, seed=DATASET_SEED):
+    """按固定种子生成与generate_large_test_data.py格式相同的测试数据（18位大写字母和数字）"""
+    rng = random.Random(seed)
+    characters = string.ascii_uppercase + string.digits
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["Data"])
+    for _ in range(rows):
+        sheet.append(["".join(rng.choice(characters) for _ in range(18))])
+    workbook.save(path)
+
+
+def run_size(processor, rows, work_dir, stages):
+    """对一种数据规模执行选中的各个阶段"""
+    excel_file = os.path.join(work_dir, f"bench_{rows}.xlsx")
+    generate_dataset(excel_file, rows)
+    page_rows, page_cols = processor._calculate_page_layout(DEFAULT_QR_LENGTH, TITLE)
+    qr_per_page = page_rows * page_cols
+    results = []
+
+    # 读取Excel：后续阶段都需要数据，未选中时也读取，但不报告
+    strings = []
+    with StageTimer("excel_read", f"batch of {READ_BATCH_SIZE} rows") as timer:
+        for batch in processor.iter_excel_batches(excel_file, 1, READ_BATCH_SIZE):
+            strings.extend(batch)
+            timer.lap()
+    if "excel_read" in stages:
+        results.append(timer.result(len(strings)))
+
+    # 二维码编码：按配置的分组方式分组，按线程池的块大小批量编码
+    groups = list(iter_qr_groups(strings))
+    qr_results = []
+    with StageTimer("qr_encode", f"chunk of {THREAD_CHUNK_SIZE} QR codes") as timer:
+        for i in range(0, len(groups), THREAD_CHUNK_SIZE):
+            chunk = groups[i:i + THREAD_CHUNK_SIZE]
+            for (_, start, end), modules in zip(chunk, encode_qr_modules_batch([group[0] for group in chunk])):
+                qr_results.append((pack_matrix(modules), start, end, 0))
+            timer.lap()
+    if "qr_encode" in stages:
+        results.append(timer.result(len(strings), qr_codes=len(qr_results), encoder=QR_ENCODER))
+
+    pages = [qr_results[i:i + qr_per_page] for i in range(0, len(qr_results), qr_per_page)]
+
+    if "rasterize" in stages:
+        template = get_page_template(TITLE, DEFAULT_QR_LENGTH, page_rows, page_cols)
+        with StageTimer("rasterize", "QR code") as timer:
+            for matrix, *_ in qr_results:
+                render_qr_cell(matrix, DEFAULT_QR_LENGTH, template.cell_width, template.cell_height)
+                timer.lap()
+        results.append(timer.result(len(strings), qr_codes=len(qr_results)))
+
+    # 页面合成和各种页面输出格式，每页包含光栅化（SVG为矢量路径）、合成和保存
+    page_outputs = [output for output in PAGE_OUTPUTS if output == ("RGB", "png")] if "compose_page" in stages else []
+    if "page_outputs" in stages:
+        page_outputs += [output for output in PAGE_OUTPUTS if output != ("RGB", "png")]
+    for page_mode, page_format in page_outputs:
+        output_dir = os.path.join(work_dir, f"pages_{page_mode}_{page_format}")
+        os.makedirs(output_dir, exist_ok=True)
+        if (page_mode, page_format) == ("RGB", "png"):
+            name = "compose_page"
+        else:
+            # SVG页面是矢量图形，与页面模式无关
+            name = f"page_{page_format}" if page_format == "svg" else f"page_{page_mode}_{page_format}"
+        with StageTimer(name, "page") as timer:
+            for index, group in enumerate(pages):
+                page_data = (group, output_dir, index * qr_per_page, index * qr_per_page + len(group),
+                             page_rows, page_cols, TITLE, DEFAULT_QR_LENGTH, page_mode, page_format)
+                compose_a4_page(page_data)
+                timer.lap()
+        results.append(timer.result(len(strings), len(pages), bytes=_dir_size(output_dir)))
+        shutil.rmtree(output_dir)
+
+    # 文档格式按页回调进度，单元耗时为相邻两页的间隔
+    for stage in ("pdf", "docx"):
+        if stage not in stages:
+            continue
+        output_dir = os.path.join(work_dir, stage)
+        with StageTimer(stage, "page") as timer:
+            create = processor.create_pdf_document if stage == "pdf" else processor.create_docx_document
+            create(iter(qr_results), output_dir, DEFAULT_QR_LENGTH, TITLE, progress_callback=lambda _: timer.lap())
+        results.append(timer.result(len(strings), len(timer.samples), bytes=_dir_size(output_dir)))
+        shutil.rmtree(output_dir)
+
+    if "pipeline" in stages:
+        output_dir = os.path.join(work_dir, "pipeline")
+        with StageTimer("pipeline", "page") as timer:
+            page_files = processor.run_pipeline(excel_file, 1, output_dir, title=TITLE,
+                                                progress_callback=lambda qr_codes, page_count: timer.lap())
+        results.append(timer.result(len(strings), len(page_files), backend=processor.backend, workers=MAX_WORKERS))
+        shutil.rmtree(output_dir)
+
+    os.remove(excel_file)
+    return results
+
+
+def _dir_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', '-C', project_root, 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分阶段测试二维码生成各环节的性能，结果以JSON输出')
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help=f'测试数据的行数，用逗号分隔（默认：{",".join(map(str, DEFAULT_SIZES))}）')
+    parser.add_argument('--stages', default=",".join(STAGES), help=f'要测试的阶段，用逗号分隔（可选：{", ".join(STAGES)}）')
+    parser.add_argument('--backend', choices=("thread", "process"), default="thread", help='流水线阶段的执行后端（默认：thread）')
+    parser.add_argument('--output', help='JSON结果的保存路径（默认输出到控制台）')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    stages = set(args.stages.split(","))
+    unknown = stages - set(STAGES)
+    if unknown:
+        parser.error(f"未知的阶段: {', '.join(sorted(unknown))}")
+
+    processor = QRCodeProcessor(backend=args.backend)
+    processor.set_qr_cache(False)
+    processor.set_logger(lambda message: None)
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "qr_per_image": QR_PER_IMAGE,
+        "qr_grouping": QR_GROUPING,
+        "qr_separator": QR_SEPARATOR,
+        "qr_segmentation": QR_SEGMENTATION,
+        "qr_length_cm": DEFAULT_QR_LENGTH,
+        "seed": DATASET_SEED,
+        "results": [],
+    }
+    work_dir = tempfile.mkdtemp(prefix="qrcode_bench_")
+    try:
+        for rows in sizes:
+            print(f"测试 {rows} 行...", file=sys.stderr)
+            report["results"].append({"rows": rows, "stages": run_size(processor, rows, work_dir, stages)})
+    finally:
+        processor.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
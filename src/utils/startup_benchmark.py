@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时测试
+
+在新进程中多次启动命令行（--help）、导入处理模块和创建图形界面窗口，报告耗时的中位数。
+指定--compare时在临时的git工作树中检出另一个版本做同样的测试，对比两者的启动耗时；
+指定--exe时测试PyInstaller打包后的程序（按QRCodeGenerator.spec打包），
+程序在窗口绘制完成后立即退出。
+
+用法:
+    python src/utils/startup_benchmark.py
+    python src/utils/startup_benchmark.py --compare HEAD~1
+    python src/utils/startup_benchmark.py --exe dist/QRCodeGenerator.exe
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import unicodedata
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(project_root, 'src'))
+
+from core.config import STARTUP_BENCHMARK_ENV
+
+# 创建图形界面窗口并处理完首次绘制后退出，不依赖被测版本中的退出钩子
+GUI_SNIPPET = (
+    "import sys, tkinter as tk; sys.path.insert(0, {src!r}); sys.path.insert(0, {gui!r}); "
+    "import qrcode_gui; root = tk.Tk(); qrcode_gui.QRCodeGeneratorGUI(root); root.update(); root.destroy()"
+)
+
+
+def measure(command, repeats, timeout=60, env=None):
+    """
+    多次启动命令并返回耗时的中位数（秒），命令失败或超时时返回None
+    """
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                    timeout=timeout, env=env)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def source_scenarios(root):
+    """源码运行的测试项：名称和启动命令"""
+    src = os.path.join(root, 'src')
+    return [
+        ("命令行 --help", [sys.executable, os.path.join(src, 'qrcode_cli.py'), '--help']),
+        ("导入core.qrcode_processor",
+         [sys.executable, '-c', f"import sys; sys.path.insert(0, {src!r}); import core.qrcode_processor"]),
+        ("图形界面窗口",
+         [sys.executable, '-c', GUI_SNIPPET.format(src=src, gui=os.path.join(src, 'gui'))]),
+    ]
+
+
+def run_source(root, repeats):
+    return {name: measure(command, repeats) for name, command in source_scenarios(root)}
+
+
+def run_revision(revision, repeats):
+    """在临时工作树中检出指定版本并测试"""
+    worktree = tempfile.mkdtemp(prefix="qrcode_startup_")
+    os.rmdir(worktree)
+    subprocess.run(['git', '-C', project_root, 'worktree', 'add', '--detach', worktree, revision],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return run_source(worktree, repeats)
+    finally:
+        subprocess.run(['git', '-C', project_root, 'worktree', 'remove', '--force', worktree],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(worktree, ignore_errors=True)
+
+
+def format_seconds(value):
+    return "不可用" if value is None else f"{value * 1000:.0f}ms"
+
+
+def pad(text, width, right=False):
+    """按显示宽度补齐，中文字符占两列"""
+    display = sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+    fill = " " * max(0, width - display)
+    return fill + text if right else text + fill
+
+
+def print_row(*cells):
+    print(pad(cells[0], 28) + "".join(pad(cell, 12, right=True) for cell in cells[1:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测试命令行和图形界面的启动耗时')
+    parser.add_argument('--repeats', type=int, default=5, help='每项测试的启动次数（默认：5）')
+    parser.add_argument('--compare', metavar='REV', help='与指定的git版本对比启动耗时')
+    parser.add_argument('--exe', action='append', default=[], help='测试打包后的程序，可指定多次以对比不同的打包结果')
+    args = parser.parse_args()
+
+    current = run_source(project_root, args.repeats)
+    if args.compare:
+        baseline = run_revision(args.compare, args.repeats)
+        print_row("测试项", args.compare, "当前", "加速")
+        for name, value in current.items():
+            before = baseline[name]
+            speedup = f"{before / value:.1f}x" if before and value else "-"
+            print_row(name, format_seconds(before), format_seconds(value), speedup)
+    else:
+        for name, value in current.items():
+            print_row(name, format_seconds(value))
+
+    # 打包后的程序在设置了环境变量时绘制完窗口即退出
+    env = dict(os.environ, **{STARTUP_BENCHMARK_ENV: "1"})
+    for exe in args.exe:
+        print_row("打包程序 " + os.path.basename(exe), format_seconds(measure([exe], args.repeats, env=env)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""测试公共配置：把src目录加入Python路径，与程序中的导入方式（from core...）一致"""
+
+import os
+import sys
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""批量任务的展开，以及多个任务同时运行、共用同一组执行池和二维码缓存"""
+
+import json
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("qrcode")
+
+from core.batch_jobs import BatchJob, expand_batch_jobs
+from core.config import BATCH_REPORT_NAME, INFO_MESSAGES
+from core.qr_cache import QRCache
+from core.qrcode_processor import QRCodeProcessor
+
+
+def _write_lines(path, prefix, count):
+    path.write_text("\n".join("%s%05d" % (prefix, index) for index in range(count)), encoding="utf-8")
+    return str(path)
+
+
+def test_expand_batch_jobs(tmp_path):
+    source = tmp_path / "input"
+    source.mkdir()
+    for name in ("b.txt", "a.txt", "a.csv", "~$a.txt", "notes.bin"):
+        (source / name).write_text("SN1", encoding="utf-8")
+    (source / "sub").mkdir()
+
+    jobs = expand_batch_jobs(str(source), str(tmp_path / "out"))
+    assert [job.name for job in jobs] == ["a", "a", "b"]
+    assert [os.path.basename(job.file_path) for job in jobs] == ["a.csv", "a.txt", "b.txt"]
+    # 同名的文件输出到不同的子目录
+    assert [os.path.relpath(job.output_dir, tmp_path / "out") for job in jobs] == ["a", "a_2", "b"]
+    assert all(job.status == "pending" for job in jobs)
+
+    with pytest.raises(ValueError):
+        expand_batch_jobs(str(tmp_path / "empty*"), str(tmp_path / "out"))
+
+
+def test_two_jobs_share_pools(tmp_path):
+    processor = QRCodeProcessor()
+    processor.qr_cache = None
+    processor.set_logger(lambda message: None)
+    qr_pool, image_pool = processor.qr_pool, processor.image_pool
+
+    # 两个任务都进入流水线后才继续，确认它们同时运行
+    started = threading.Barrier(2, timeout=30)
+    run_pipeline = processor.run_pipeline
+    pools = []
+
+    def run_together(*args, **kwargs):
+        if os.path.basename(args[0]) != "missing.txt":
+            started.wait()
+            pools.append((processor.qr_pool, processor.image_pool))
+        return run_pipeline(*args, **kwargs)
+
+    processor.run_pipeline = run_together
+    output_dir = tmp_path / "out"
+    jobs = [
+        BatchJob("a", _write_lines(tmp_path / "a.txt", "A", 130), None, str(output_dir / "a")),
+        BatchJob("b", _write_lines(tmp_path / "b.txt", "B", 70), None, str(output_dir / "b")),
+        BatchJob("missing", str(tmp_path / "missing.txt"), None, str(output_dir / "missing")),
+    ]
+    progress = []
+    processor.run_batch_jobs(jobs, str(output_dir), 1, concurrency=2,
+                             progress_callback=lambda *args: progress.append(args), qr_length_cm=8, title="T")
+
+    assert pools == [(qr_pool, image_pool)] * 2
+    assert (processor.qr_pool, processor.image_pool) == (qr_pool, image_pool)
+    # 每页6个二维码，每个二维码10个字符串
+    assert [(job.status, job.qr_codes, job.pages) for job in jobs] == [
+        ("done", 13, 3), ("done", 7, 2), ("failed", 0, 0)
+    ]
+    assert [os.path.basename(path) for path in jobs[1].output_files] == ["1-60.png", "61-70.png"]
+    assert all(os.path.exists(path) for job in jobs for path in job.output_files)
+    # 任务失败不影响其他任务，最后一次进度报告包含全部任务
+    assert jobs[2].error
+    assert progress[-1] == (3, 3, 20, 5)
+
+    with open(output_dir / BATCH_REPORT_NAME, encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["totals"] == {"jobs": 3, "done": 2, "failed": 1, "cancelled": 0, "qr_codes": 20, "pages": 5}
+    assert [job["name"] for job in report["jobs"]] == ["a", "b", "missing"]
+
+
+def test_hit_counts_are_reported_per_run(tmp_path):
+    """批量任务同时运行时各任务的日志只统计自己的命中数"""
+    processor = QRCodeProcessor()
+    processor.qr_cache = QRCache(str(tmp_path / "cache.sqlite3"))
+    messages = []
+    processor.set_logger(messages.append)
+    inputs = [("a", _write_lines(tmp_path / "a.txt", "A", 130)), ("b", _write_lines(tmp_path / "b.txt", "B", 70))]
+    stats = INFO_MESSAGES["QR_CACHE_STATS"]
+
+    def run_batch():
+        messages.clear()
+        jobs = [BatchJob(name, path, None, str(tmp_path / "out" / name)) for name, path in inputs]
+        processor.run_batch_jobs(jobs, str(tmp_path / "out"), 1, concurrency=2, qr_length_cm=8, title="T")
+        return sorted(message for message in messages if message.startswith(stats.split("{")[0]))
+
+    assert run_batch() == sorted([stats.format(0, 13), stats.format(0, 7)])
+    assert run_batch() == sorted([stats.format(13, 0), stats.format(7, 0)])
+    # 缓存对象上的计数是累计值
+    assert (processor.qr_cache.hits, processor.qr_cache.misses) == (20, 20)
+    processor.qr_cache.close()
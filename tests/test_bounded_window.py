@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""有界窗口：在途任务数不超过窗口，任务按需拉取，结果按提交顺序产出，取消时不再提交"""
+
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from core.config import IN_FLIGHT_REORDER_FACTOR
+from core.qrcode_processor import QRCodeProcessor
+
+WINDOW = 3
+
+
+@pytest.fixture
+def processor():
+    processor = QRCodeProcessor()
+    processor.qr_cache = None
+    processor.set_logger(lambda message: None)
+    return processor
+
+
+@pytest.fixture
+def pool():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+class Source:
+    """记录拉取和完成的任务数，每次拉取时检查尚未完成的任务数不超过窗口"""
+
+    def __init__(self, count):
+        self.count = count
+        self.pulled = 0
+        self.finished = 0
+        self.lock = threading.Lock()
+        self.max_unfinished = 0
+
+    def tasks(self):
+        for task in range(self.count):
+            with self.lock:
+                self.pulled += 1
+                self.max_unfinished = max(self.max_unfinished, self.pulled - self.finished)
+            yield task
+
+    def worker(self, task):
+        # 前面的任务较慢，后面的任务先完成
+        time.sleep(0.02 if task % WINDOW == 0 else 0.001)
+        with self.lock:
+            self.finished += 1
+        return task * 10
+
+
+def test_window_bounds_in_flight_tasks(processor, pool):
+    source = Source(40)
+    yielded = []
+    for task, future in processor._iter_bounded(pool, source.worker, source.tasks(), WINDOW, "encode"):
+        yielded.append((task, future.result()))
+        # 已拉取但尚未产出的任务不超过重排缓冲的大小
+        assert source.pulled - len(yielded) <= WINDOW * IN_FLIGHT_REORDER_FACTOR
+    assert yielded == [(task, task * 10) for task in range(40)]
+    assert source.max_unfinished <= WINDOW
+
+    snapshot = processor.metrics.snapshot()
+    assert snapshot["queues"]["encode"]["max_depth"] <= WINDOW * IN_FLIGHT_REORDER_FACTOR
+    assert snapshot["stages"]["encode"]["count"] == 40
+
+
+def test_worker_errors_are_returned_in_order(processor, pool):
+    def worker(task):
+        if task == 2:
+            raise ValueError("boom")
+        return task
+
+    futures = list(processor._iter_bounded(pool, worker, range(5), WINDOW, "encode"))
+    assert [task for task, _ in futures] == [0, 1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        futures[2][1].result()
+    assert [future.result() for task, future in futures if task != 2] == [0, 1, 3, 4]
+
+
+def test_stop_event_stops_submitting(processor, pool):
+    processor.stop_event = threading.Event()
+    source = Source(1000)
+    yielded = 0
+    for _ in processor._iter_bounded(pool, source.worker, source.tasks(), WINDOW, "encode"):
+        yielded += 1
+        if yielded == 5:
+            processor.stop_event.set()
+    assert yielded == 5
+    assert source.pulled <= 5 + WINDOW * IN_FLIGHT_REORDER_FACTOR
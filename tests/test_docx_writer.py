@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Word文档压缩包的结构：样式、图片关系和内容类型完整，按每个文件的页数拆分"""
+
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from core.qr_matrix import encode_qr_modules, pack_matrix
+from core.qrcode_processor import QRCodeProcessor
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+R_EMBED = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed"
+A_BLIP = "{http://schemas.openxmlformats.org/drawingml/2006/main}blip"
+REL = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+CT = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+QR_LENGTH_CM = 8  # 每页3行2列共6个二维码
+
+
+def _read_package(path):
+    """解析文档正文和关系，检查每个图片引用都指向压缩包中存在的图片部件"""
+    with zipfile.ZipFile(path) as package:
+        names = set(package.namelist())
+        document = ET.fromstring(package.read("word/document.xml"))
+        rels = {rel.get("Id"): rel for rel in ET.fromstring(package.read("word/_rels/document.xml.rels")).iter(REL)}
+        content_types = ET.fromstring(package.read("[Content_Types].xml"))
+        styles = ET.fromstring(package.read("word/styles.xml"))
+        assert "_rels/.rels" in names
+
+    overrides = {node.get("PartName") for node in content_types.iter(CT + "Override")}
+    assert {"/word/document.xml", "/word/styles.xml"} <= overrides
+    assert any(rel.get("Type").endswith("/styles") and rel.get("Target") == "styles.xml" for rel in rels.values())
+    assert {style.get(W + "styleId") for style in styles.iter(W + "style")} >= {"Normal", "Title"}
+
+    embeds = [blip.get(R_EMBED) for blip in document.iter(A_BLIP)]
+    for rel_id in embeds:
+        assert rels[rel_id].get("Type").endswith("/image")
+        assert "word/" + rels[rel_id].get("Target") in names
+    return document, embeds, names
+
+
+def _results(payloads):
+    return [(pack_matrix(encode_qr_modules(payload)), index, index, 0) for index, payload in enumerate(payloads, 1)]
+
+
+@pytest.fixture
+def processor():
+    processor = QRCodeProcessor()
+    processor.qr_cache = None
+    processor.set_logger(lambda message: None)
+    return processor
+
+
+def test_docx_package_structure(tmp_path, processor):
+    # 前两个二维码内容相同，图片只保存一份
+    payloads = ["SN0001", "SN0001", "SN0002", "SN0003"]
+    files = processor.create_docx_document(_results(payloads), str(tmp_path), QR_LENGTH_CM, "标题", pages_per_file=0)
+    assert [os.path.basename(path) for path in files] == ["二维码清单.docx"]
+
+    document, embeds, names = _read_package(files[0])
+    title = document.find(f"{W}body/{W}p")
+    assert title.find(f"{W}pPr/{W}pStyle").get(W + "val") == "Title"
+    assert "".join(node.text for node in title.iter(W + "t")) == "标题"
+    assert len(embeds) == 4 and embeds[0] == embeds[1] and len(set(embeds)) == 3
+    assert len([name for name in names if name.startswith("word/media/")]) == 3
+
+
+def test_docx_pages_per_file(tmp_path, processor):
+    # 14个二维码共3页，每个文件2页时拆为两个文件
+    payloads = ["SN%04d" % index for index in range(14)]
+    pages = []
+    files = processor.create_docx_document(_results(payloads), str(tmp_path), QR_LENGTH_CM, "标题",
+                                           progress_callback=pages.append, pages_per_file=2)
+    assert [os.path.basename(path) for path in files] == ["二维码清单_1-12.docx", "二维码清单_13-14.docx"]
+    assert pages == [1, 2, 3]
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in files)
+
+    for path, page_count, picture_count in zip(files, (2, 1), (12, 2)):
+        document, embeds, _ = _read_package(path)
+        body = document.find(W + "body")
+        assert len(body.findall(W + "tbl")) == page_count
+        assert len(embeds) == picture_count
+        # 每个文件开头各有一个标题，页与页之间有分页符
+        assert body.find(f"{W}p/{W}pPr/{W}pStyle").get(W + "val") == "Title"
+        assert len([br for br in body.iter(W + "br") if br.get(W + "type") == "page"]) == page_count - 1
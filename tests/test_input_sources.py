@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""xlsx读取器的单元格转换与openpyxl（非只读模式）的读取结果一致"""
+
+import datetime
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from core import input_sources
+from core.input_sources import InputSelection, read_xlsx
+
+COLUMNS = ["文本", "整数", "小数", "日期", "时长", "布尔"]
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(COLUMNS)
+    for index in range(1, 6):
+        sheet.append(["SN%04d" % index, index, index / 4, datetime.datetime(2024, 1, index, 8, 30),
+                      datetime.timedelta(hours=index * 7, minutes=15), index % 2 == 0])
+        sheet.cell(row=index + 1, column=4).number_format = "yyyy-mm-dd hh:mm"
+        sheet.cell(row=index + 1, column=5).number_format = "[h]:mm:ss"
+    path = tmp_path / "data.xlsx"
+    workbook.save(path)
+    return str(path)
+
+
+def _expected(path):
+    sheet = openpyxl.load_workbook(path, data_only=True).active
+    return [row for row in sheet.iter_rows(min_row=2, values_only=True)]
+
+
+def _read(path):
+    return list(read_xlsx(path, 0, InputSelection(columns=COLUMNS), "utf-8"))
+
+
+def test_scanner_matches_openpyxl(workbook_path):
+    rows = _read(workbook_path)
+    assert rows == _expected(workbook_path)
+    assert isinstance(rows[0][4], datetime.timedelta)
+
+
+def test_falls_back_to_iter_rows(workbook_path, monkeypatch):
+    """openpyxl的内部接口不可用时改用iter_rows读取，读取的行和列不变"""
+    def unavailable(workbook, sheet):
+        raise AttributeError("_shared_strings")
+
+    monkeypatch.setattr(input_sources, "_XlsxSheetScanner", unavailable)
+    rows = _read(workbook_path)
+    expected = _expected(workbook_path)
+    assert len(rows) == len(expected)
+    # 只读模式的iter_rows不区分时长格式，其余各列与openpyxl一致
+    assert [row[:4] + row[5:] for row in rows] == [row[:4] + row[5:] for row in expected]
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""任务清单的保存与读取、续传和多余页面的清理，页面划分与清单记录保持一致"""
+
+import json
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("qrcode")
+
+from core import qrcode_processor
+from core.config import JOB_MANIFEST_NAME
+from core.job_manifest import JobManifest, content_digest
+from core.qrcode_processor import QRCodeProcessor
+
+JOB = {"start_row": 1, "rows": 3, "cols": 2}
+QR_LENGTH_CM = 8  # 每页3行2列共6个二维码，每个二维码10个字符串
+ROWS = 130  # 两页整页和一页只有1个二维码的末页
+
+
+def _write_input(path, rows=ROWS, edits=None):
+    lines = ["SN%05d" % index for index in range(rows)]
+    for index, value in (edits or {}).items():
+        lines[index] = value
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return str(path)
+
+
+def _processor():
+    processor = QRCodeProcessor()
+    processor.qr_cache = None  # 测试不读写用户目录中的二维码缓存
+    processor.set_logger(lambda message: None)
+    return processor
+
+
+def _run(processor, input_path, output_dir, **options):
+    return processor.run_pipeline(input_path, 1, str(output_dir), qr_length_cm=QR_LENGTH_CM, title="T", **options)
+
+
+def _manifest(output_dir):
+    with open(os.path.join(output_dir, JOB_MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _age_files(paths):
+    """把文件的修改时间改为0，之后仍为0的文件即为原样保留的页面"""
+    for path in paths:
+        os.utime(path, ns=(0, 0))
+
+
+def _kept(paths):
+    return [os.path.basename(path) for path in paths if os.stat(path).st_mtime_ns == 0]
+
+
+def test_manifest_save_and_load(tmp_path):
+    page = tmp_path / "1-60.png"
+    page.write_bytes(b"")
+    manifest = JobManifest(str(tmp_path), JOB, "sha-a")
+    manifest.mark_page_done(0, str(page), 0, 5, ["d0", "d1"])
+    manifest.mark_complete(manifest.page_files())
+
+    resumed = JobManifest(str(tmp_path), JOB, "sha-a", resume=True)
+    assert resumed.reused and resumed.complete
+    assert resumed.pages == {0: {"file": "1-60.png", "groups": [0, 5], "digests": ["d0", "d1"]}}
+    assert resumed.output_files() == [str(page)]
+    assert resumed.page_unchanged(0, ["d0", "d1"])
+    assert not resumed.page_unchanged(0, ["d0", "dx"])
+    assert resumed.changed_groups(0, ["d0", "dx", "d2"]) == 2
+
+    # 续传要求输入文件不变，增量更新沿用页面记录但任务不再算作已完成
+    assert not JobManifest(str(tmp_path), JOB, "sha-b", resume=True).reused
+    incremental = JobManifest(str(tmp_path), JOB, "sha-b", incremental=True)
+    assert incremental.reused and not incremental.complete
+    # 版面参数不同或未要求续传时都不沿用
+    assert not JobManifest(str(tmp_path), dict(JOB, rows=4), "sha-a", resume=True).reused
+    assert not JobManifest(str(tmp_path), JOB, "sha-a").reused
+
+
+def test_load_rejects_damaged_manifest(tmp_path):
+    (tmp_path / JOB_MANIFEST_NAME).write_text("{", encoding="utf-8")
+    assert JobManifest.load(str(tmp_path / JOB_MANIFEST_NAME)) is None
+    assert not JobManifest(str(tmp_path), JOB, "sha-a", resume=True).reused
+
+
+def test_remove_stale_pages(tmp_path):
+    manifest = JobManifest(str(tmp_path), JOB, "sha-a")
+    for index in range(3):
+        page = tmp_path / ("page%d.png" % index)
+        page.write_bytes(b"")
+        manifest.mark_page_done(index, str(page), index * 6, index * 6 + 5, ["d%d" % index])
+    manifest.save()
+
+    rerun = JobManifest(str(tmp_path), JOB, "sha-b", incremental=True)
+    assert rerun.page_unchanged(0, ["d0"])
+    rerun.mark_page_done(1, str(tmp_path / "page1.png"), 6, 11, ["d1x"])
+    assert rerun.remove_stale_pages() == 1
+    assert sorted(rerun.pages) == [0, 1]
+    assert not (tmp_path / "page2.png").exists()
+    assert (tmp_path / "page0.png").exists() and (tmp_path / "page1.png").exists()
+
+
+def test_resume_after_stop(tmp_path):
+    input_path = _write_input(tmp_path / "input.txt")
+    output_dir = tmp_path / "out"
+    processor = _processor()
+    processor.stop_event = threading.Event()
+
+    def stop_after_first_page(qr_codes, pages):
+        if pages:
+            processor.stop_event.set()
+
+    partial = _run(processor, input_path, output_dir, progress_callback=stop_after_first_page)
+    manifest = _manifest(output_dir)
+    assert not manifest["complete"]
+    assert 1 <= len(manifest["pages"]) < 3
+    assert [os.path.basename(path) for path in partial] == [page["file"] for page in manifest["pages"].values()]
+
+    _age_files(partial)
+    processor.stop_event.clear()
+    files = _run(processor, input_path, output_dir, resume=True)
+    assert [os.path.basename(path) for path in files] == ["1-60.png", "61-120.png", "121-130.png"]
+    assert _kept(files) == [os.path.basename(path) for path in partial]
+    assert _manifest(output_dir)["complete"]
+
+
+def test_failed_encode_keeps_page_boundaries(tmp_path, monkeypatch):
+    """编码失败的二维码组保留占位，后面的二维码组不前移到前一页，续传时只重新生成该页"""
+    input_path = _write_input(tmp_path / "input.txt")
+    output_dir = tmp_path / "out"
+    generate = qrcode_processor.generate_qr_code_chunk
+
+    def fail_second_group(data_groups):
+        results = generate(data_groups)
+        return [ValueError("boom") if data_group[2] == 11 else result
+                for data_group, result in zip(data_groups, results)]
+
+    monkeypatch.setattr(qrcode_processor, "generate_qr_code_chunk", fail_second_group)
+    processor = _processor()
+    files = _run(processor, input_path, output_dir)
+    assert [os.path.basename(path) for path in files] == ["1-60.png", "61-120.png", "121-130.png"]
+    pages = _manifest(output_dir)["pages"]
+    assert [page["groups"] for page in pages.values()] == [[0, 5], [6, 11], [12, 12]]
+    assert pages["0"]["digests"][1] == ""
+    assert pages["1"]["digests"][0] == content_digest(";".join("SN%05d" % index for index in range(60, 70)))
+
+    monkeypatch.setattr(qrcode_processor, "generate_qr_code_chunk", generate)
+    _age_files(files)
+    files = _run(processor, input_path, output_dir, resume=True)
+    assert _kept(files) == ["61-120.png", "121-130.png"]
+    assert "" not in _manifest(output_dir)["pages"]["0"]["digests"]
+
+
+def test_plain_run_does_not_hash_input(tmp_path, monkeypatch):
+    def no_hash(path):
+        raise AssertionError("不续传也不增量更新时不应计算输入文件摘要")
+
+    monkeypatch.setattr(qrcode_processor, "file_sha256", no_hash)
+    _run(_processor(), _write_input(tmp_path / "input.txt"), tmp_path / "out")
+    assert _manifest(tmp_path / "out")["input_sha256"] is None
+
+
+@pytest.mark.parametrize("rows, edits, expected_files, expected_kept", [
+    # 修改第二页中的一行只重新生成第二页
+    (ROWS, {70: "SN-EDITED"}, ["1-60.png", "61-120.png", "121-130.png"], ["1-60.png", "121-130.png"]),
+    # 追加的行补满末页并新增一页，前两页保持不变
+    (200, None, ["1-60.png", "61-120.png", "121-180.png", "181-200.png"], ["1-60.png", "61-120.png"]),
+])
+def test_incremental_regenerates_changed_pages(tmp_path, rows, edits, expected_files, expected_kept):
+    input_path = tmp_path / "input.txt"
+    output_dir = tmp_path / "out"
+    processor = _processor()
+    _age_files(_run(processor, _write_input(input_path), output_dir, incremental=True))
+
+    files = _run(processor, _write_input(input_path, rows, edits), output_dir, incremental=True)
+    assert [os.path.basename(path) for path in files] == expected_files
+    assert _kept(files) == expected_kept
+    assert sorted(name for name in os.listdir(output_dir) if name.endswith(".png")) == sorted(expected_files)
+    assert _manifest(output_dir)["complete"]
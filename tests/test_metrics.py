@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""运行指标的阶段耗时汇总、快照和JSON Lines、Prometheus文本格式的导出"""
+
+import json
+import os
+
+import pytest
+
+from core import metrics as metrics_module
+from core.config import METRICS_PREFIX
+from core.metrics import Metrics, run_timed, stage_timer
+
+
+def _inner_stages(task):
+    with stage_timer("rasterize"):
+        pass
+    with stage_timer("rasterize"):
+        pass
+    with stage_timer("save"):
+        pass
+    return task * 2
+
+
+def test_run_timed_collects_inner_stages():
+    result, elapsed, inner_times = run_timed(_inner_stages, 21)
+    assert result == 42
+    assert set(inner_times) == {"rasterize", "save"}
+    assert sum(inner_times.values()) <= elapsed
+    # 任务结束后不再记录，不在run_timed包装的任务中使用stage_timer也不会出错
+    assert metrics_module._local.times is None
+    with stage_timer("rasterize"):
+        pass
+
+
+def test_add_task_splits_elapsed_time():
+    metrics = Metrics()
+    metrics.workers = {"image": 2}
+    metrics.add_task("image", "compose", 1.0, {"rasterize": 0.25, "save": 0.5})
+    metrics.add_task("image", "compose", 0.5, {})
+    metrics.add_time("read", 0.1, count=3)
+    stages = metrics.snapshot()["stages"]
+    assert stages["compose"]["count"] == 2
+    assert stages["compose"]["seconds"] == pytest.approx(0.75)
+    assert stages["compose"]["max_seconds"] == pytest.approx(0.5)
+    assert stages["rasterize"] == {"count": 1, "seconds": 0.25, "max_seconds": 0.25}
+    assert stages["read"]["count"] == 3
+    assert metrics.snapshot()["pools"]["image"]["busy_seconds"] == pytest.approx(1.5)
+
+
+def test_counters_queues_and_reset(tmp_path):
+    metrics = Metrics()
+    metrics.workers = {"qr": 4}
+    metrics.count("qr_codes", 5)
+    metrics.count("qr_codes")
+    (tmp_path / "page.png").write_bytes(b"x" * 10)
+    metrics.add_file(str(tmp_path / "page.png"))
+    metrics.add_file(str(tmp_path / "missing.png"))
+    for depth in (2, 4, 6):
+        metrics.queue_depth("encode", depth)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {"qr_codes": 6, "files_written": 1, "bytes_written": 10}
+    assert snapshot["queues"] == {"encode": {"mean_depth": 4.0, "max_depth": 6}}
+    assert 0.0 <= snapshot["pools"]["qr"]["utilization"] <= 1.0
+
+    # 清空本次运行的指标，工作线程数保留
+    metrics.reset()
+    snapshot = metrics.snapshot()
+    assert (snapshot["stages"], snapshot["counters"], snapshot["queues"]) == ({}, {}, {})
+    assert snapshot["pools"]["qr"]["workers"] == 4
+
+
+def test_write_jsonl_appends(tmp_path):
+    path = str(tmp_path / "logs" / "metrics.jsonl")
+    metrics = Metrics()
+    metrics.count("qr_codes", 3)
+    metrics.write_jsonl(path, {"input": "a.xlsx"})
+    metrics.write_jsonl(path)
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["labels"] for record in records] == [{"input": "a.xlsx"}, {}]
+    assert records[0]["counters"] == {"qr_codes": 3}
+
+
+def test_write_prometheus(tmp_path):
+    path = str(tmp_path / "metrics.prom")
+    metrics = Metrics()
+    metrics.workers = {"qr": 1}
+    metrics.count("qr_codes", 7)
+    metrics.add_time("encode", 1.5)
+    metrics.write_prometheus(path, {"input": 'C:\\数据\\"a".xlsx'})
+    assert os.listdir(tmp_path) == ["metrics.prom"]
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    labels = 'input="C:\\\\数据\\\\\\"a\\".xlsx"'
+    assert f"# TYPE {METRICS_PREFIX}_qr_codes gauge" in lines
+    assert f"{METRICS_PREFIX}_qr_codes{{{labels}}} 7" in lines
+    assert f'{METRICS_PREFIX}_stage_seconds{{{labels},stage="encode"}} 1.5' in lines
+    assert f'{METRICS_PREFIX}_pool_workers{{{labels},pool="qr"}} 1' in lines
+    # 每个样本行都是"名称{标签} 值"，值可以解析为数字
+    for line in lines:
+        if not line.startswith("#"):
+            float(line.rsplit(" ", 1)[1])
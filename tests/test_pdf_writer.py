@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""PDF文件的结构：交叉引用表中的偏移指向各个对象，页面树的页数正确，内容流和图像蒙版可以解压"""
+
+import math
+import re
+import zlib
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from core import qrcode_processor
+from core.pdf_writer import PdfWriter, qr_operators
+from core.qr_matrix import encode_qr_modules, pack_matrix
+from core.qrcode_processor import QRCodeProcessor
+
+QR_LENGTH_CM = 8
+
+
+def _parse(path):
+    """按交叉引用表读取全部对象，返回对象编号到对象内容的映射"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data.startswith(b"%PDF-1.4\n")
+    xref_offset = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+    header = re.match(rb"xref\n0 (\d+)\n", data[xref_offset:])
+    count = int(header.group(1))
+    entries = data[xref_offset + header.end():]
+    assert entries[:20] == b"0000000000 65535 f \n"
+
+    objects = {}
+    for obj_id in range(1, count):
+        entry = entries[obj_id * 20:(obj_id + 1) * 20]
+        assert entry.endswith(b" 00000 n \n")
+        offset = int(entry[:10])
+        # 偏移必须正好指向对象的开头
+        assert data.startswith(b"%d 0 obj\n" % obj_id, offset)
+        end = data.index(b"\nendobj\n", offset)
+        objects[obj_id] = data[offset + len(b"%d 0 obj\n" % obj_id):end]
+    trailer = entries[count * 20:]
+    assert trailer.startswith(b"trailer\n<< /Size %d /Root 1 0 R >>" % count)
+    return objects
+
+
+def _stream(body):
+    """检查流的/Length与实际长度一致并解压"""
+    head, stream = body.split(b"\nstream\n", 1)
+    assert stream.endswith(b"\nendstream")
+    stream = stream[:-len(b"\nendstream")]
+    assert int(re.search(rb"/Length (\d+)", head).group(1)) == len(stream)
+    return zlib.decompress(stream)
+
+
+def _pages(objects):
+    """按页面树返回各页的内容流和引用的图像蒙版"""
+    assert objects[1] == b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = [int(ref) for ref in re.findall(rb"(\d+) 0 R", re.search(rb"/Kids \[(.*?)\]", objects[2]).group(1))]
+    assert int(re.search(rb"/Count (\d+)", objects[2]).group(1)) == len(kids)
+    pages = []
+    for page_id in kids:
+        page = objects[page_id]
+        assert page.startswith(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 ")
+        content = _stream(objects[int(re.search(rb"/Contents (\d+) 0 R", page).group(1))])
+        masks = {name.decode(): _stream(objects[int(ref)]) for name, ref in re.findall(rb"/(Q\d+) (\d+) 0 R", page)}
+        pages.append((page, content, masks))
+    return pages
+
+
+def test_pdf_writer_structure(tmp_path):
+    path = str(tmp_path / "test.pdf")
+    matrix = pack_matrix(encode_qr_modules("SN0001"))
+    with PdfWriter(path, 595.276, 841.89, title_font=True) as writer:
+        writer.add_page(qr_operators(matrix, 10, 800, 100, 100, 4, "black"))
+        writer.add_page(b"q /Q0 Do Q\n", {"Q0": matrix})
+        writer.add_page(b"")
+    assert writer.page_count == 3
+
+    pages = _pages(_parse(path))
+    assert len(pages) == 3
+    assert all(b"/Font << /F1 3 0 R >>" in page for page, _, _ in pages)
+    assert pages[0][1].endswith(b"f Q\n")
+    assert pages[1][2] == {"Q0": matrix.data}
+    assert pages[2][1] == b""
+
+
+@pytest.mark.parametrize("rendering", ("vector", "image"))
+def test_pdf_document_pages(tmp_path, monkeypatch, rendering):
+    monkeypatch.setattr(qrcode_processor, "PDF_QR_RENDERING", rendering)
+    processor = QRCodeProcessor()
+    processor.qr_cache = None
+    processor.set_logger(lambda message: None)
+    rows, cols = processor._calculate_page_layout(QR_LENGTH_CM, "标题")
+    count = rows * cols * 2 + 1
+    matrices = [pack_matrix(encode_qr_modules("SN%04d" % index)) for index in range(count)]
+    results = [(matrix, index, index, 0) for index, matrix in enumerate(matrices, 1)]
+    page_counts = []
+    path = processor.create_pdf_document(results, str(tmp_path), QR_LENGTH_CM, "标题",
+                                         progress_callback=page_counts.append)
+
+    pages = _pages(_parse(path))
+    assert len(pages) == math.ceil(count / (rows * cols)) == 3
+    assert page_counts == [1, 2, 3]
+    for page_index, (_, content, masks) in enumerate(pages):
+        assert b"> Tj ET\n" in content  # 每页都有标题
+        page_matrices = matrices[page_index * rows * cols:(page_index + 1) * rows * cols]
+        if rendering == "image":
+            assert sorted(masks.values()) == sorted(matrix.data for matrix in page_matrices)
+        else:
+            assert not masks
+            assert content.count(b" cm\n") == len(page_matrices)
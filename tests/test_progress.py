@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""进度回调和进度日志按时间间隔节流，多线程累计的计数不丢失"""
+
+import threading
+import types
+
+import pytest
+
+from core import progress
+from core.config import INFO_MESSAGES
+from core.progress import ProgressTracker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可以手动拨动的单调时钟"""
+    clock = types.SimpleNamespace(now=100.0)
+    monkeypatch.setattr(progress, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_callback_is_throttled(clock):
+    calls = []
+    tracker = ProgressTracker(10, calls.append, callback_interval=1.0, log_interval=60.0)
+    tracker.advance()  # 第一次总会回调
+    clock.now += 0.5
+    tracker.advance()
+    clock.now += 0.6
+    tracker.advance(2)
+    tracker.advance()
+    assert calls == [1, 4]
+    # 结束时以最终的完成批次数再回调一次
+    tracker.finish()
+    assert calls == [1, 4, 5]
+    assert tracker.completed == 5
+
+
+def test_log_summarizes_batches_since_last_log(clock):
+    messages = []
+    tracker = ProgressTracker(10, log=messages.append, callback_interval=1.0, log_interval=5.0)
+    tracker.advance(items=10)
+    clock.now += 2
+    tracker.advance(items=10)
+    assert messages == []
+    clock.now += 3
+    tracker.advance(items=10)
+    assert messages == [INFO_MESSAGES["BATCH_PROGRESS"].format(3, 10, 3, 30, 5.0, 6.0)]
+
+    clock.now += 1
+    tracker.advance(2, items=20)
+    tracker.finish()
+    assert messages[1:] == [INFO_MESSAGES["BATCH_PROGRESS"].format(5, 10, 2, 20, 1.0, 20.0)]
+    # 没有新完成的批次时不再输出
+    clock.now += 10
+    tracker.finish()
+    assert len(messages) == 2
+
+
+def test_concurrent_advance():
+    calls = []
+    tracker = ProgressTracker(8000, calls.append, callback_interval=0.0, log_interval=3600.0)
+
+    def worker():
+        for _ in range(1000):
+            tracker.advance(items=3)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    tracker.finish()
+    assert (tracker.completed, tracker.items) == (8000, 24000)
+    assert calls[-1] == 8000 and max(calls) == 8000
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""二维码缓存的存取、总大小统计和按使用时间淘汰"""
+
+import itertools
+import sqlite3
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from core import qr_cache
+from core.qr_cache import QRCache
+from core.qr_matrix import PackedMatrix
+
+
+def _matrix(size, fill):
+    return PackedMatrix(size, bytes([fill]) * 100)
+
+
+def _stored_bytes(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM qr_matrix").fetchone()[0]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """每次写入使用递增的时间，淘汰顺序不受系统时钟精度影响"""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(qr_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = QRCache(path)
+    cache.put("A", _matrix(21, 1))
+    # 尚未写入数据库的结果也能取出
+    assert cache.get_many(["A", "B"]) == [_matrix(21, 1), None]
+    cache.close()
+
+    reopened = QRCache(path)
+    assert reopened.get_many(["B", "A"]) == [None, _matrix(21, 1)]
+    assert (reopened.hits, reopened.misses) == (1, 1)
+    reopened.close()
+
+
+def test_total_bytes_counts_replaced_keys_once(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = QRCache(path)
+    for fill in range(3):
+        # 同一个键再次写入时整行替换
+        cache.put("A", _matrix(21, fill))
+        cache.put("B%d" % fill, _matrix(21, fill))
+        cache.flush()
+    assert cache._total_bytes == _stored_bytes(path) == 400
+    cache.close()
+
+    # 替换以前的运行写入的键时也只计一次
+    reopened = QRCache(path)
+    reopened.put("B0", _matrix(21, 8))
+    reopened.put("C", _matrix(21, 8))
+    reopened.flush()
+    assert reopened._total_bytes == _stored_bytes(path) == 500
+    reopened.close()
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = QRCache(path, max_mb=450 / 1024 / 1024)
+    for name in "ABCD":
+        cache.put(name, _matrix(21, 0))
+        cache.flush()
+    # 使用A后B成为最久未用的条目
+    cache.get_many(["A"])
+    cache.flush()
+    cache.put("E", _matrix(21, 0))
+    cache.flush()
+    assert cache._total_bytes == _stored_bytes(path) <= cache.max_bytes * qr_cache._EVICT_TARGET
+    assert [matrix is not None for matrix in cache.get_many(list("ABCDE"))] == [True, False, True, True, True]
+    cache.close()
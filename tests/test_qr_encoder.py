@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""内置编码器与qrcode库（7.4.2）的逐位一致性，以及字符计数指示符档位边界处的版本选择"""
+
+import random
+
+import numpy as np
+import pytest
+
+qrcode = pytest.importorskip("qrcode")
+
+from core import qr_encoder
+
+ECC_LEVELS = (qr_encoder.ERROR_CORRECT_L, qr_encoder.ERROR_CORRECT_M,
+              qr_encoder.ERROR_CORRECT_Q, qr_encoder.ERROR_CORRECT_H)
+
+# 各数据模式的字符：数字、字母数字、字节（ASCII）和多字节UTF-8
+ALPHABETS = {
+    "number": "0123456789",
+    "alphanumeric": "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:",
+    "byte": "abcdefghijklmnopqrstuvwxyz;,_",
+    "utf8": "中文二维码AB12",
+}
+
+
+def _library_qr(data, ecc, version=1):
+    """按qrcode库的默认规则编码，返回(版本, 不含边框的模块矩阵)"""
+    qr = qrcode.QRCode(version=version, error_correction=ecc, border=0)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.version, np.array(qr.get_matrix(), dtype=bool)
+
+
+def _library_version(data, ecc):
+    """qrcode库为数据选择的版本，只做版本选择，不生成矩阵；超出容量时返回41"""
+    qr = qrcode.QRCode(error_correction=ecc)
+    qr.add_data(data)
+    try:
+        return qr.best_fit()
+    except (qrcode.exceptions.DataOverflowError, ValueError):
+        # qrcode 7.4.2在超出版本40时由version属性的检查抛出ValueError
+        return 41
+
+
+def _assert_same(data, ecc, version=1):
+    expected_version, expected = _library_qr(data, ecc, version)
+    matrix = qr_encoder.encode(data, ecc, version, segmentation="qrcode")
+    assert matrix.shape == (expected_version * 4 + 17,) * 2
+    assert np.array_equal(matrix, expected)
+
+
+def _mixed_payload(rng, length):
+    """由各模式的片段拼成的内容，较长的数字段和字母数字段会被qrcode库单独分段"""
+    parts = []
+    while sum(len(part) for part in parts) < length:
+        alphabet = ALPHABETS[rng.choice(("number", "alphanumeric", "byte", "utf8"))]
+        parts.append(''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 40))))
+    return ''.join(parts)[:length]
+
+
+@pytest.mark.parametrize("mode", sorted(ALPHABETS))
+@pytest.mark.parametrize("ecc", ECC_LEVELS)
+def test_single_mode_matches_library(mode, ecc):
+    rng = random.Random(f"{mode}-{ecc}")
+    for length in (1, 7, 20, 61, 150):
+        _assert_same(''.join(rng.choice(ALPHABETS[mode]) for _ in range(length)), ecc)
+
+
+def test_every_version_matches_library():
+    """逐个版本编码混合内容，纠错级别轮换，覆盖全部版本的分块、定位图形和版本信息"""
+    rng = random.Random(7)
+    for version in range(1, 41):
+        ecc = ECC_LEVELS[version % 4]
+        data = _mixed_payload(rng, rng.randint(1, 40))
+        _assert_same(data, ecc, version)
+
+
+def test_mixed_segments_match_library():
+    rng = random.Random(11)
+    for _ in range(40):
+        data = _mixed_payload(rng, rng.randint(20, 600))
+        _assert_same(data, rng.choice(ECC_LEVELS))
+
+
+def _repeat(alphabet, length):
+    return (alphabet * (length // len(alphabet) + 1))[:length]
+
+
+def _first_length_above(alphabet, ecc, version):
+    """用qrcode库二分查找使版本超过version的最短内容长度"""
+    low, high = 1, 8000
+    while low < high:
+        middle = (low + high) // 2
+        if _library_version(_repeat(alphabet, middle), ecc) > version:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+@pytest.mark.parametrize("mode", sorted(ALPHABETS))
+@pytest.mark.parametrize("edge", (9, 26))
+def test_version_class_edges_match_library(mode, edge):
+    """版本9/10和26/27两侧字符计数指示符的位数不同，刚好放满和多一个字符时选择的版本与qrcode库一致"""
+    for ecc in ECC_LEVELS:
+        length = _first_length_above(ALPHABETS[mode], ecc, edge)
+        full, over = _repeat(ALPHABETS[mode], length - 1), _repeat(ALPHABETS[mode], length)
+        assert qr_encoder.segment(full, ecc, 1, "qrcode")[0] == _library_version(full, ecc) <= edge
+        assert qr_encoder.segment(over, ecc, 1, "qrcode")[0] == _library_version(over, ecc) > edge
+    # 矩阵逐位比较较慢，每种模式只比较一个纠错级别
+    ecc = ECC_LEVELS[sorted(ALPHABETS).index(mode)]
+    length = _first_length_above(ALPHABETS[mode], ecc, edge)
+    _assert_same(_repeat(ALPHABETS[mode], length - 1), ecc)
+    _assert_same(_repeat(ALPHABETS[mode], length), ecc)
+
+
+@pytest.mark.parametrize("mode", sorted(ALPHABETS))
+def test_version_40_capacity_matches_library(mode):
+    """版本40刚好放满时与qrcode库一致，多一个字符时两者都报告超出容量"""
+    ecc = ECC_LEVELS[sorted(ALPHABETS).index(mode)]
+    length = _first_length_above(ALPHABETS[mode], ecc, 40)
+    _assert_same(_repeat(ALPHABETS[mode], length - 1), ecc)
+    with pytest.raises(qr_encoder.DataOverflowError):
+        qr_encoder.encode(_repeat(ALPHABETS[mode], length), ecc, segmentation="qrcode")
+
+
+def _fill_version_40(rng, ecc):
+    """以";"连接随机的字母数字序列号，直到按27~40档位分段时刚好放满版本40"""
+    limit = qr_encoder.capacity_bits(40, ecc)
+    data = ""
+    while True:
+        value = ''.join(rng.choice(ALPHABETS["alphanumeric"][:36]) for _ in range(rng.randint(5, 30)))
+        candidate = f"{data};{value}" if data else value
+        if qr_encoder.payload_bits(candidate, 40, "optimal") > limit:
+            return data
+        data = candidate
+
+
+def test_optimal_segmentation_fits_version_40_across_classes():
+    """
+    按1~9档位分段的结果换算到版本40的位数可能超出容量，而按27~40档位重新分段时放得下：
+    从较小的起始版本选择版本时不能在切换档位之前报告超出容量
+    """
+    rng = random.Random(3)
+    crossing = 0
+    for _ in range(20):
+        ecc = rng.choice(ECC_LEVELS)
+        data = _fill_version_40(rng, ecc)
+        raw = data.encode('utf-8')
+        small_chunks = qr_encoder._optimal_segments(raw, qr_encoder._mode_sizes(1))
+        large_sizes = qr_encoder._mode_sizes(40)
+        small_bits = sum(4 + large_sizes[mode] + qr_encoder._segment_length(mode, len(chunk))
+                         for mode, chunk in small_chunks)
+        crossing += small_bits > qr_encoder.capacity_bits(40, ecc)
+        for start in (1, 2, 10, 27):
+            assert qr_encoder.segment(data, ecc, start, "optimal")[0] == 40
+    assert crossing, "没有生成需要在27~40档位重新分段的数据"
+
+
+@pytest.mark.parametrize("edge", (9, 26))
+def test_optimal_segmentation_picks_smallest_version_at_class_edges(edge):
+    """档位边界两侧按位数最少分段选出的版本是能容纳数据的最小版本"""
+    rng = random.Random(edge)
+    for _ in range(30):
+        ecc = rng.choice(ECC_LEVELS)
+        data = ';'.join(''.join(rng.choice(ALPHABETS["alphanumeric"][:36]) for _ in range(rng.randint(3, 25)))
+                        for _ in range(rng.randint(1, 12 if edge == 9 else 60)))
+        version = qr_encoder.segment(data, ecc, 1, "optimal")[0]
+        assert qr_encoder.payload_bits(data, version, "optimal") <= qr_encoder.capacity_bits(version, ecc)
+        if version > 1:
+            smaller = version - 1
+            assert qr_encoder.payload_bits(data, smaller, "optimal") > qr_encoder.capacity_bits(smaller, ecc)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""按容量分组的每个二维码用编码器实际编码后都不超过目标版本，且每组再加一个字符串就会超出，两种分段方式都检查"""
+
+import random
+import string
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from core import qr_encoder, qr_payload
+from core.config import QR_ERROR_CORRECTION, QR_VERSION
+from core.qr_payload import iter_qr_groups
+
+ALPHABETS = {
+    "alphanumeric": string.ascii_uppercase + string.digits,
+    "digits": string.digits,
+    "mixed": string.ascii_letters + string.digits + "-_/",
+    "utf8": "中文AB12",
+}
+
+
+def _strings(kind, count, seed):
+    rng = random.Random(f"{kind}-{seed}")
+    return [''.join(rng.choice(ALPHABETS[kind]) for _ in range(rng.randint(1, 40))) for _ in range(count)]
+
+
+def _fits(data, target, segmentation):
+    try:
+        return qr_encoder.segment(data, QR_ERROR_CORRECTION, QR_VERSION, segmentation)[0] <= target
+    except qr_encoder.DataOverflowError:
+        return False
+
+
+@pytest.mark.parametrize("kind", sorted(ALPHABETS))
+@pytest.mark.parametrize("target", (1, 5, 13, 27, 40))
+@pytest.mark.parametrize("separator", (";", "+"))
+@pytest.mark.parametrize("segmentation", ("qrcode", "optimal"))
+def test_capacity_groups_encode_within_target(kind, target, separator, segmentation, monkeypatch):
+    monkeypatch.setattr(qr_payload, "QR_SEGMENTATION", segmentation)
+    strings = _strings(kind, 1500 if target >= 27 else 600, target)
+    groups = list(iter_qr_groups(strings, "capacity", target, separator=separator))
+
+    # 编号连续，拆开后与输入一致
+    assert groups[0][1] == 1 and groups[-1][2] == len(strings)
+    assert all(a[2] + 1 == b[1] for a, b in zip(groups, groups[1:]))
+    assert [group[0] for group in groups] == [separator.join(strings[a - 1:b]) for _, a, b in groups]
+
+    target = max(target, QR_VERSION)
+    matrices = qr_encoder.encode_batch([group[0] for group in groups], QR_ERROR_CORRECTION, QR_VERSION,
+                                       segmentation)
+    for (payload, first, last), matrix in zip(groups, matrices):
+        version = (matrix.shape[0] - 17) // 4
+        # 单个字符串本身超出目标版本时单独成组
+        assert version <= target or first == last
+    # 贪心装入：每组再加下一个字符串就超出目标版本
+    for (payload, _, _), (_, first, _) in zip(groups, groups[1:]):
+        assert not _fits(payload + separator + strings[first - 1], target, segmentation)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""SVG页面可被XML解析，位置探测图形只定义一次并被各二维码引用，路径与探测图形拼合后与模块矩阵一致"""
+
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from core.qr_matrix import encode_qr_modules, pack_matrix, unpack_matrix
+from core.qrcode_processor import compose_svg_page
+
+SVG = "{http://www.w3.org/2000/svg}"
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+PAYLOADS = ["SN00001;SN00002", "HELLO WORLD 123", "中文内容"]
+
+
+def _finder_modules():
+    """位置探测图形：7×7外框、3×3中心"""
+    finder = np.zeros((7, 7), dtype=bool)
+    finder[[0, -1], :] = finder[:, [0, -1]] = True
+    finder[2:5, 2:5] = True
+    return finder
+
+
+def _draw(group, size):
+    """按<use>和<path>在模块网格上还原二维码"""
+    modules = np.zeros((size, size), dtype=bool)
+    for use in group.findall(SVG + "use"):
+        col, row = int(use.get("x")), int(use.get("y"))
+        modules[row:row + 7, col:col + 7] |= _finder_modules()
+    for x, y, n in re.findall(r"M(\d+) (\d+)h(\d+)v1h-\d+z", group.find(SVG + "path").get("d")):
+        modules[int(y), int(x):int(x) + int(n)] = True
+    return modules
+
+
+def test_svg_page_reuses_finder_symbol(tmp_path):
+    matrices = [pack_matrix(encode_qr_modules(payload)) for payload in PAYLOADS]
+    qr_files_group = [(matrix, index, index, 0) for index, matrix in enumerate(matrices, 1)]
+    path = compose_svg_page(qr_files_group, str(tmp_path), 3, 2, "标题", log_error=pytest.fail)
+    assert path.endswith("1-3.svg")
+
+    root = ET.parse(path).getroot()
+    symbols = root.findall(f"{SVG}defs/{SVG}symbol")
+    assert [symbol.get("id") for symbol in symbols] == ["finder"]
+    assert root.find(SVG + "text").text == "标题"
+
+    groups = root.findall(f"{SVG}g/{SVG}g")
+    assert len(groups) == len(matrices)
+    for group, matrix in zip(groups, matrices):
+        uses = group.findall(SVG + "use")
+        assert len(uses) == 3
+        # SVG 2的href和SVG 1.1的xlink:href都指向同一个符号
+        assert all(use.get("href") == use.get(XLINK_HREF) == "#finder" for use in uses)
+        assert np.array_equal(_draw(group, matrix.size), unpack_matrix(matrix))
+
+
+def test_empty_group_writes_nothing(tmp_path):
+    assert compose_svg_page([], str(tmp_path), 3, 2, "标题") == ""
+    assert not list(tmp_path.iterdir())
+
+
+def test_placeholder_leaves_cell_empty(tmp_path):
+    """编码失败的占位结果不绘制，后面的二维码仍在原来的单元格中"""
+    matrix = pack_matrix(encode_qr_modules(PAYLOADS[0]))
+    (tmp_path / "full").mkdir()
+    full = compose_svg_page([(matrix, 1, 1, 0), (matrix, 2, 2, 0)], str(tmp_path / "full"), 3, 2, "")
+    (tmp_path / "gap").mkdir()
+    gap = compose_svg_page([(None, 1, 1, None), (matrix, 2, 2, 0)], str(tmp_path / "gap"), 3, 2, "")
+    full_groups = ET.parse(full).getroot().findall(f"{SVG}g/{SVG}g")
+    gap_groups = ET.parse(gap).getroot().findall(f"{SVG}g/{SVG}g")
+    assert [group.get("transform") for group in gap_groups] == [full_groups[1].get("transform")]